@@ -7,8 +7,30 @@ import pymongo
 from botocore.exceptions import ClientError
 
 
+def get_documentdb_secret(session: boto3.session.Session, secret_name: str) -> dict:
+    """
+    Fetches the credentials for connecting to this HelioCloud's DocumentDB instance
+    :param session: boto3.Session to use
+    :param secret_name: name of the AWS Secrets Manager secret containing connection credentials
+    :return: the secret's host, port, username & password
+    """
+    sm_client = session.client("secretsmanager")
+    try:
+        response = sm_client.get_secret_value(SecretId=secret_name)
+    except ClientError as error:
+        raise error
+    finally:
+        sm_client.close()
+
+    return json.loads(response["SecretString"])
+
+
 def get_documentdb_client(
-    session: boto3.session.Session, secret_name: str, tls_ca_file: str, local=False
+    session: boto3.session.Session,
+    secret_name: str,
+    tls_ca_file: str,
+    local=False,
+    secret: dict = None,
 ) -> pymongo.MongoClient:
     """
     Constructs and returns a MongoClient instance connected to this HelioCloud's DocumentDB instance
@@ -17,21 +39,16 @@ def get_documentdb_client(
     :param tls_ca_file: CA file to use in a secure connection
     :param local: if True, use  localhost as the hostname to connect to DocumentDB.
            Defaults to False.
+    :param secret: connection credentials already fetched with get_documentdb_secret. Defaults to
+           fetching them from the secret_name secret
     :return:
     """
 
     # Get the connection secrets
-    sm_client = session.client("secretsmanager")
-    try:
-        response = sm_client.get_secret_value(SecretId=secret_name)
-    except ClientError as error:
-        raise error
-
-    secret_string = json.loads(response["SecretString"])
+    secret_string = get_documentdb_secret(session, secret_name) if secret is None else secret
     username = secret_string["username"]
     password = secret_string["password"]
     port = secret_string["port"]
-    sm_client.close()
 
     # Allow localhost override (typically used in development scenarios)
     if local:
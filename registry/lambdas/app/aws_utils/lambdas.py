@@ -3,15 +3,67 @@ Functions for helping with AWS Lambda operations in the Registry
 """
 import os
 import boto3
-from .document_db import get_documentdb_client
+import botocore.config
+import pymongo
+from .document_db import get_documentdb_client, get_documentdb_secret
+from .resource_cache import ResourceCache
 from ..catalog.dataset_repository import DataSetRepository
+from ..core.constants import DEFAULT_RESOURCE_CACHE_TTL
+
+# Resources kept across warm invocations of a lambda, for RESOURCE_CACHE_TTL seconds
+RESOURCE_CACHE = ResourceCache(
+    ttl=float(os.environ.get("RESOURCE_CACHE_TTL", DEFAULT_RESOURCE_CACHE_TTL))
+)
+
+
+def get_session() -> boto3.Session:
+    """
+    :return: a boto3.Session, shared by warm invocations of the lambda
+    """
+    return RESOURCE_CACHE.get("session", boto3.session.Session)
+
+
+def get_client(service_name: str, max_pool_connections: int = None, slot: int = 0, **config):
+    """
+    Gets a boto3 client created from get_session(), shared by warm invocations of the lambda.
+    Clients are created under the resource cache's lock, as a boto3.Session is not thread safe.
+    :param service_name: AWS service of the client (ex. s3)
+    :param max_pool_connections: size of the client's connection pool. Defaults to boto3's default
+    :param slot: which of several clients of the same service & settings to get, for callers that
+           each need a client of their own (ex. to count the requests made through it)
+    :param config: any other botocore.config.Config settings of the client (ex. read_timeout)
+    :return: the client
+    """
+    if max_pool_connections is not None:
+        config["max_pool_connections"] = max_pool_connections
+    return RESOURCE_CACHE.get(
+        ("client", service_name, slot, repr(sorted(config.items()))),
+        lambda: get_session().client(
+            service_name, config=botocore.config.Config(**config) if config else None
+        ),
+    )
+
+
+def _is_connected(db_client: pymongo.MongoClient) -> bool:
+    """
+    :return: True if a cached MongoClient can still reach its DocumentDB instance
+    """
+    try:
+        db_client.admin.command("ping")
+    except pymongo.errors.PyMongoError as error:
+        print(f"Reconnecting to the catalog database: {error}")
+        return False
+    return True
 
 
 def get_dataset_repository(
     catalog_db_secret: str = None, session: boto3.Session = None, tls_ca_file: str = None
 ) -> DataSetRepository:
     """
-    Gets a DataSetRepository instance configured for the Registry's AWS environment.
+    Gets a DataSetRepository instance configured for the Registry's AWS environment. The
+    DocumentDB secret & connection are shared by warm invocations of the lambda: the connection is
+    checked before each reuse, reconnecting with a freshly fetched secret (the password may have
+    been rotated) if it fails.
     :param catalog_db_secret: the secret to use when fetching DocumentDB credentials from AWS
            Secrets Manager
     :param session: an optional instantiated and configured boto3.Session.
@@ -24,13 +76,31 @@ def get_dataset_repository(
         catalog_db_secret = os.environ["CATALOG_DB_SECRET"]
 
     if session is None:
-        session = boto3.Session()
+        session = get_session()
 
     if tls_ca_file is None:
         tls_ca_file = os.path.dirname(__file__) + "/../resources/global-bundle.pem"
 
-    db_client = get_documentdb_client(
-        session=session, secret_name=catalog_db_secret, tls_ca_file=tls_ca_file
+    secret_key = ("documentdb_secret", catalog_db_secret)
+
+    def validate(db_client: pymongo.MongoClient) -> bool:
+        if _is_connected(db_client):
+            return True
+        RESOURCE_CACHE.invalidate(secret_key)
+        return False
+
+    db_client = RESOURCE_CACHE.get(
+        ("documentdb_client", catalog_db_secret, tls_ca_file),
+        lambda: get_documentdb_client(
+            session=session,
+            secret_name=catalog_db_secret,
+            tls_ca_file=tls_ca_file,
+            secret=RESOURCE_CACHE.get(
+                secret_key, lambda: get_documentdb_secret(session, catalog_db_secret)
+            ),
+        ),
+        validate=validate,
+        close=lambda db_client: db_client.close(),
     )
 
     return DataSetRepository(db_client=db_client)
@@ -0,0 +1,93 @@
+"""
+A cache of the resources a lambda is slow to create (boto3 sessions & clients, secrets, database
+connections), kept across warm invocations of the lambda.
+"""
+import functools
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+
+class ResourceCache:
+    """
+    Caches resources for up to ttl seconds. AWS Lambda keeps a module's globals between the warm
+    invocations of an execution environment, so a ResourceCache held by a module lets back-to-back
+    invocations reuse the resources created by the first.
+
+    A cached resource can be re-validated each time it is reused, and is created again if it is no
+    longer valid or has expired. A discarded resource is released by its own close() method (ex. a
+    boto3 client's), unless the caller releases it some other way. Resources are created under a
+    lock, so threads of an invocation asking for the same resource at once share a single instance.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        :param ttl: number of seconds a resource is cached for, after it was created
+        :param clock: returns the current time in seconds. Defaults to time.monotonic
+        """
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__lock = threading.RLock()
+
+        # Each resource cached, with the time it was created
+        self.__resources: dict[Hashable, tuple[float, Any]] = {}
+
+    def get(
+        self,
+        key: Hashable,
+        create: Callable[[], Any],
+        validate: Callable[[Any], bool] = None,
+        close: Callable[[Any], None] = None,
+    ) -> Any:
+        """
+        Get a cached resource, creating it if it isn't cached, has expired or is no longer valid.
+        :param key: identifies the resource in the cache
+        :param create: creates the resource
+        :param validate: returns False if a cached resource can no longer be used. Defaults to
+               trusting the resource until it expires
+        :param close: releases a resource that expired or is no longer valid. Defaults to the
+               resource's close() method, if it has one
+        :return: the resource
+        """
+        with self.__lock:
+            if key in self.__resources:
+                created, resource = self.__resources[key]
+                if self.__clock() - created < self.__ttl and (
+                    validate is None or validate(resource)
+                ):
+                    return resource
+                self.invalidate(key, close)
+
+            resource = create()
+            self.__resources[key] = (self.__clock(), resource)
+            return resource
+
+    def invalidate(self, key: Hashable, close: Callable[[Any], None] = None) -> None:
+        """
+        Remove a resource from the cache, so it is created again when next asked for.
+        :param key: identifies the resource in the cache
+        :param close: releases the resource, if it was cached. Defaults to the resource's close()
+               method, if it has one
+        """
+        with self.__lock:
+            _, resource = self.__resources.pop(key, (None, None))
+            release = (
+                functools.partial(close, resource)
+                if close is not None
+                else getattr(resource, "close", None)
+            )
+            if resource is not None and callable(release):
+                # pylint: disable=broad-exception-caught
+                # The resource is being discarded, so failing to release it isn't an error
+                try:
+                    release()
+                except Exception as ex:
+                    print(f"Failed to close cached resource {key}: {ex}")
+                # pylint: enable=broad-exception-caught
+
+    def clear(self) -> None:
+        """
+        Remove every resource from the cache, without releasing them.
+        """
+        with self.__lock:
+            self.__resources.clear()
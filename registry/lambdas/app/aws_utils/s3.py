@@ -1,13 +1,29 @@
 """
 Helper methods for getting HelioCloud Registry files from S3 buckets.
+
+Only the functions reading manifests need pandas, so the manifest module (and pandas with it) is
+imported on first use: the Cataloger lambda imports this module without loading pandas.
 """
+from __future__ import annotations
+
 import json
-import pandas as pd
+from typing import TYPE_CHECKING, Iterator
 
 from boto3.session import Session
-from ..ingest.manifest import build_manifest_df
+from ..core.constants import DEFAULT_MANIFEST_CHUNK_SIZE, MANIFEST_EXTENSIONS
 from ..model.dataset import DataSet
 from ..core.exceptions import RegistryException
+from ..core.imports import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _import_manifest():
+    """
+    :return: the ingest.manifest module, imported on first use
+    """
+    return lazy_import("..ingest.manifest", package=__package__)
 
 
 def get_dataset_entries_from_s3(
@@ -50,34 +66,82 @@ def get_s3_manifest_key(entry: DataSet, base_path="") -> str:
     return base_path + entry.index.split("/", 3)[3] + "/manifest.csv"
 
 
-def get_manifest_from_s3(session: Session, bucket_name: str, manifest_key: str) -> pd.DataFrame:
+def find_manifest_key(session: Session, bucket_name: str, folder: str, s3_client=None) -> str:
     """
-    Retrieves a manifest file from AWS S3, returning as a Pandas DataFrame
+    Find the manifest file in an S3 folder, whichever of the supported formats it is in.
 
     Parameters:
         session: boto3 session to use for connecting to AWS s3
         bucket_name:  name of the AWS S3 bucket
-        manifest_key:  name of the manifest file (ex: manifest.csv)
+        folder:  S3 folder (ending in /) containing the manifest file
+        s3_client: optional S3 client to use, rather than a new one from the session
+    :return: the S3 key of the manifest file, preferring formats in the order of
+             MANIFEST_EXTENSIONS. The key of manifest.csv if there is no manifest file.
     """
-    if not manifest_key.endswith(".csv"):
-        raise RegistryException(f"Expecting .csv extension for manifest file: {manifest_key}.")
+    s3_client = session.client("s3") if s3_client is None else s3_client
+    response = s3_client.list_objects_v2(
+        Bucket=bucket_name, Prefix=folder + "manifest.", Delimiter="/"
+    )
+    keys = {content["Key"] for content in response.get("Contents", [])}
+    for extension in MANIFEST_EXTENSIONS:
+        if folder + "manifest" + extension in keys:
+            return folder + "manifest" + extension
+    return folder + "manifest.csv"
 
-    response = session.client("s3").get_object(Bucket=bucket_name, Key=manifest_key)
-    manifest_lines = []
-    for line in response["Body"].readlines():
-        # Strip leading 'b in the stream
-        line = str(line).lstrip("b'")
 
-        # Strip trailing ' and \n
-        line = line.rstrip("'")
-        line = line.rstrip("\\n")
+def get_manifest_from_s3(
+    session: Session, bucket_name: str, manifest_key: str, s3_client=None
+) -> pd.DataFrame:
+    """
+    Retrieves a manifest file from AWS S3, returning as a Pandas DataFrame
 
-        line = line.split(",")
-        if len(line) == 3:
-            manifest_lines.append(line)
+    Parameters:
+        session: boto3 session to use for connecting to AWS s3
+        bucket_name:  name of the AWS S3 bucket
+        manifest_key:  name of the manifest file (ex: manifest.csv, manifest.csv.gz,
+            manifest.csv.zst or manifest.parquet)
+        s3_client: optional S3 client to use, rather than a new one from the session
+    """
+    manifest = _import_manifest()
+    if not manifest.is_manifest_file(manifest_key):
+        raise RegistryException(
+            f"Expecting one of the extensions {MANIFEST_EXTENSIONS} for manifest file: "
+            f"{manifest_key}."
+        )
+
+    # Parse the manifest as it streams in
+    s3_client = session.client("s3") if s3_client is None else s3_client
+    response = s3_client.get_object(Bucket=bucket_name, Key=manifest_key)
+    return manifest.read_manifest(response["Body"], manifest_key)
+
+
+def iter_manifest_from_s3(
+    session: Session,
+    bucket_name: str,
+    manifest_key: str,
+    chunksize: int = DEFAULT_MANIFEST_CHUNK_SIZE,
+    s3_client=None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams a manifest file from AWS S3, a chunk of rows at a time
 
-    # Build the data frame
-    return build_manifest_df(manifest_lines)
+    Parameters:
+        session: boto3 session to use for connecting to AWS s3
+        bucket_name:  name of the AWS S3 bucket
+        manifest_key:  name of the manifest file (see get_manifest_from_s3)
+        chunksize: number of rows in each chunk
+        s3_client: optional S3 client to use, rather than a new one from the session
+    """
+    manifest = _import_manifest()
+    if not manifest.is_manifest_file(manifest_key):
+        raise RegistryException(
+            f"Expecting one of the extensions {MANIFEST_EXTENSIONS} for manifest file: "
+            f"{manifest_key}."
+        )
+
+    s3_client = session.client("s3") if s3_client is None else s3_client
+    response = s3_client.get_object(Bucket=bucket_name, Key=manifest_key)
+    return manifest.iter_manifest(response["Body"], manifest_key, chunksize)
 
 
 def get_s3_bucket_name(uri: str) -> str:
@@ -1,6 +1,7 @@
 """
 Implements generation of the catalog.json file in a HelioCloud's public S3 buckets.
 """
+import hashlib
 import json
 from collections import OrderedDict
 from dataclasses import dataclass, field
@@ -29,6 +30,11 @@ class Cataloger:  # pylint: disable=too-few-public-methods
     DataSetRepository instance for all DataSet entries, grouping them by public s3 bucket name,
     and composing individual catalog.json files for each bucket.
 
+    An incremental Cataloger only regenerates the catalog.json of buckets whose datasets changed
+    since it was last generated, found by comparing a watermark of each bucket's dataset
+    revisions against the one recorded when its catalog.json was generated. A run with nothing to
+    regenerate reads only the revisions & watermarks from the DataSetRepository.
+
     Currently, implements the CloudMe v.03 specification
     """
 
@@ -68,7 +74,10 @@ class Cataloger:  # pylint: disable=too-few-public-methods
         dataset_repository: DataSetRepository,
         name: str,
         contact: str,
+        incremental: bool = False,
     ) -> None:
+        # pylint: disable=too-many-arguments
+        # Reasonable here given the catalog fields & options the cataloger needs.
         """
         Initializes a new Cataloger instance.
 
@@ -76,6 +85,8 @@ class Cataloger:  # pylint: disable=too-few-public-methods
         :param dataset_repository: an instance of DataSetRepository containing catalog information
         :param name: value to use in the name field of catalog.json
         :param contact: value to use in the contact field of catalog.json
+        :param incremental: if True, only the catalog.json of buckets whose datasets changed since
+               it was last generated are regenerated. Otherwise every bucket's is
         """
         self.__s3client = session.client("s3")
         self.__dataset_repository = dataset_repository
@@ -83,6 +94,7 @@ class Cataloger:  # pylint: disable=too-few-public-methods
         # Name and contact information to use when generating the catalog.json
         self.__name = name
         self.__contact = contact
+        self.__incremental = incremental
 
         # List of results to return
         self.__results = list[Result]()
@@ -104,14 +116,55 @@ class Cataloger:  # pylint: disable=too-few-public-methods
                 cache[bucket_name].append(dataset)
         return cache
 
+    def __watermark(self, revisions: list[tuple[str, str]]) -> str:
+        """
+        :param revisions: dataset_id & revision of each dataset in a bucket
+        :return: identifier for the contents of the bucket's catalog.json: its datasets' revisions,
+                 and the name & contact fields
+        """
+        content = json.dumps([self.__name, self.__contact, sorted(revisions)])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def __cache_changed_datasets_by_bucket(self) -> tuple[dict[str, list[DataSet]], dict[str, str]]:
+        """
+        Caches the datasets of each bucket whose catalog.json must be regenerated, as their
+        revisions no longer match the bucket's watermark
+        :return: the datasets of each bucket that changed, and the bucket's new watermark
+        """
+        revisions = dict[str, list[tuple[str, str]]]()
+        for dataset_id, index, revision in self.__dataset_repository.get_revisions():
+            revisions.setdefault(get_s3_bucket_name(index), []).append((dataset_id, revision))
+
+        watermarks = self.__dataset_repository.get_watermarks()
+        changed = dict[str, str]()
+        for bucket, bucket_revisions in revisions.items():
+            watermark = self.__watermark(bucket_revisions)
+            if watermarks.get(bucket) != watermark:
+                changed[bucket] = watermark
+        if not changed:
+            return {}, {}
+
+        # Only the datasets of the buckets that changed are read
+        datasets = self.__dataset_repository.get_by_dataset_ids(
+            [dataset_id for bucket in changed for dataset_id, _ in revisions[bucket]]
+        )
+        cache = dict[str, list[DataSet]]()
+        for dataset in datasets:
+            cache.setdefault(get_s3_bucket_name(dataset.index), []).append(dataset)
+        return cache, changed
+
     def __generate_bucket_catalog(self):
         """
-        Creates the catalog.json file in each S3 bucket
+        Creates the catalog.json file in each S3 bucket, or when incremental in each bucket whose
+        datasets changed, recording the bucket's watermark once its catalog.json is uploaded
         :return: n/a
         """
 
         # Generates a catalog.json for each s3 bucket
-        cache = self.__cache_datasets_by_bucket()
+        if self.__incremental:
+            cache, watermarks = self.__cache_changed_datasets_by_bucket()
+        else:
+            cache, watermarks = self.__cache_datasets_by_bucket(), {}
         for bucket, datasets in cache.items():
             # Need AWS region for the bucket.
             # Special case: if the constraint is None, its actually a default region
@@ -132,6 +185,9 @@ class Cataloger:  # pylint: disable=too-few-public-methods
             self.__s3client.put_object(
                 Bucket=bucket, Body=bytes(bucket_catalog_json, "utf-8"), Key="catalog.json"
             )
+            if bucket in watermarks:
+                self.__dataset_repository.save_watermark(bucket, watermarks[bucket])
+
             # Store results
             self.__results.append(
                 Result(endpoint=catalog.endpoint, num_datasets=len(catalog.catalog))
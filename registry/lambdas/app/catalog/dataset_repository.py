@@ -2,6 +2,7 @@
 Repository implementation for storing a HelioCloud's Registry catalog.
 """
 from __future__ import annotations
+import uuid
 from typing import Any
 from pymongo import MongoClient
 from ..model.dataset import DataSet
@@ -12,21 +13,31 @@ class DataSetRepository:
     For persisting dataset records in the catalog database.
     """
 
-    def __init__(self, db_client: MongoClient, db_name="catalog", collection="datasets"):
+    def __init__(
+        self,
+        db_client: MongoClient,
+        db_name="catalog",
+        collection="datasets",
+        watermarks_collection="catalog_watermarks",
+    ):
         """
         Initialize a DataSetRepository instance connected to the
         AWS DocumentDB instance in db_client.
         :param db_client: MongoClient instance connected to the AWS DocumentDB instance to use
         :param db_name: name of the database storing the catalog in DocumentDB (default: catalog)
         :param collection: name of the collecting storing the datasets in DocumentDB
+        :param watermarks_collection: name of the collection storing the watermark of each
+               bucket's catalog.json in DocumentDB (see get_watermarks)
         """
 
         self.__catalog_db = db_client.get_database(db_name)
         self.__datasets_collection = self.__catalog_db.get_collection(collection)
+        self.__watermarks_collection = self.__catalog_db.get_collection(watermarks_collection)
 
     def save(self, datasets: list[DataSet]) -> int:
         """
         Save a list of Datasets to the repository. Returns number of documents saved successfully.
+        Each document saved is given a new revision (see get_revisions).
 
         Returns: Count of documents saved.
         """
@@ -34,7 +45,10 @@ class DataSetRepository:
         for dataset in datasets:
             result = self.__datasets_collection.replace_one(
                 filter={"_id": dataset.dataset_id},
-                replacement=DataSetRepository.__dataset_to_dict(dataset),
+                replacement={
+                    **DataSetRepository.__dataset_to_dict(dataset),
+                    "_revision": uuid.uuid4().hex,
+                },
                 upsert=True,
             )
             # If an object id came back, it was an insert
@@ -63,6 +77,39 @@ class DataSetRepository:
             else [DataSetRepository.__dataset_from_dict(result) for result in results]
         )
 
+    def get_by_dataset_ids(self, dataset_ids: list[str]) -> list[DataSet]:
+        """
+        Return the datasets with the given dataset_ids, in the order get_all returns them.
+        """
+        results = self.__datasets_collection.find(filter={"_id": {"$in": dataset_ids}})
+        return [DataSetRepository.__dataset_from_dict(result) for result in results]
+
+    def get_revisions(self) -> list[tuple[str, str, str | None]]:
+        """
+        Return the dataset_id, index & revision of every dataset in the catalog, without reading
+        the rest of each document. A dataset's revision changes each time it is saved, and is None
+        for datasets saved before revisions were recorded.
+        """
+        results = self.__datasets_collection.find(projection={"index": 1, "_revision": 1})
+        return [(result["_id"], result["index"], result.get("_revision")) for result in results]
+
+    def get_watermarks(self) -> dict[str, str]:
+        """
+        Return the watermark recorded for each bucket's catalog.json: an identifier for the
+        revisions of the datasets it was last generated from.
+        """
+        return {
+            result["_id"]: result["watermark"] for result in self.__watermarks_collection.find()
+        }
+
+    def save_watermark(self, bucket: str, watermark: str) -> None:
+        """
+        Record the watermark of a bucket's catalog.json, once it has been generated.
+        """
+        self.__watermarks_collection.replace_one(
+            filter={"_id": bucket}, replacement={"_id": bucket, "watermark": watermark}, upsert=True
+        )
+
     def delete_by_dataset_id(self, dataset_id: str) -> bool:
         """
         Delete a dataset document by id.
@@ -108,6 +155,7 @@ class DataSetRepository:
         Instantiate and return a DataSet instance from the dictionary
         retrieved from DocumentDB
         """
-        # Don't need this field from Document DB
+        # Don't need these fields from Document DB
         del dataset_dict["_id"]
+        dataset_dict.pop("_revision", None)
         return DataSet.from_serialized_dict(dataset_dict)
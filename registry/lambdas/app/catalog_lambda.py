@@ -3,19 +3,18 @@ AWS Lambda implementation for running the Cataloger service.
 """
 import os
 
-import boto3
-
-from .aws_utils.lambdas import get_dataset_repository
+from .aws_utils.lambdas import get_dataset_repository, get_session
 from .catalog.cataloger import Cataloger
 
 
 # pylint: disable=unused-argument
-# AWS Lambda requires the event & context parameters, even if they aren't used by the lambda
-# handler for the Cataloger service.
+# AWS Lambda requires the context parameter, even if it isn't used by the lambda handler for the
+# Cataloger service.
 def handler(event, context) -> dict:
     """
-    Lambda handler function for invoking the Catalog generator
-    :param event: n/a, but required by AWS Lambda
+    Lambda handler function for invoking the Catalog generator. Only the catalog.json of buckets
+    whose datasets changed since it was last generated are regenerated.
+    :param event: may contain 'force' set to true to regenerate every bucket's catalog.json
     :param context: n/a, but required by AWS Lambda
     :return: dictionary of S3 buckets updated and the number of datasets updated in each
     """
@@ -25,8 +24,8 @@ def handler(event, context) -> dict:
     # 2 - Instantiate a Cataloger instance
     # 3 - Execute the Cataloger
 
-    # Boto3 session for AWS
-    session = boto3.session.Session()
+    # Boto3 session for AWS, reused by warm invocations like the catalog connection
+    session = get_session()
 
     # DataSetRepository creation
     ds_repo = get_dataset_repository(session=session)
@@ -36,7 +35,13 @@ def handler(event, context) -> dict:
     contact = os.environ["CATALOG_CONTACT"]
 
     # Create and execute a Cataloger
-    cataloger = Cataloger(dataset_repository=ds_repo, session=session, name=name, contact=contact)
+    cataloger = Cataloger(
+        dataset_repository=ds_repo,
+        session=session,
+        name=name,
+        contact=contact,
+        incremental=not (event or {}).get("force", False),
+    )
     results = cataloger.execute()
 
     # Inform the caller how much the Catalog service processed
@@ -8,3 +8,69 @@ DEFAULT_AWS_REGION = "us-east-1"
 
 # Default ARN for a Pandas Lambda Layer (used by multiple HelioCloud lambdas)
 DEFAULT_PANDA_LAYERS_ARN = "arn:aws:lambda:us-east-1:336392948345:layer:AWSSDKPandas-Python39:6"
+
+# Default number of seconds the registry's lambdas keep the resources they are slow to create
+# (boto3 sessions & clients, secrets, DocumentDB connections) across warm invocations
+DEFAULT_RESOURCE_CACHE_TTL = 900
+
+# Default number of concurrent S3 requests an Ingester issues while validating a manifest
+DEFAULT_VALIDATION_WORKERS = 32
+
+# Default number of server-side copies an Ingester keeps in flight while installing a dataset
+DEFAULT_COPY_CONCURRENCY = 32
+
+# Default number of S3 requests an Ingester using the asyncio engine keeps in flight at once, from a
+# single event loop
+DEFAULT_ASYNC_CONCURRENCY = 512
+
+# Default size (in bytes) at which an Ingester switches to a multipart copy of a file, and the
+# size of each part copied.  Large enough that most files are copied in a single request.
+DEFAULT_MULTIPART_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_MULTIPART_CHUNKSIZE = 64 * 1024 * 1024
+
+# Number of rows in each row group of a Parquet index file.  Smaller row groups let readers skip
+# more of an index when filtering on time, at the cost of a larger file.
+DEFAULT_INDEX_ROW_GROUP_SIZE = 100_000
+
+# Maximum number of keys S3 accepts in a single DeleteObjects request
+MAX_DELETE_BATCH_SIZE = 1000
+
+# Default minimum number of seconds between checkpoints of an ingest job's journal
+DEFAULT_CHECKPOINT_INTERVAL = 30
+
+# Default number of datasets in an ingest job that an invocation of the Ingester lambda ingests at
+# once
+DEFAULT_DATASET_PARALLELISM = 4
+
+# Default number of manifest entries in each shard of a sharded ingest job, and the number of
+# shards installed at once
+DEFAULT_SHARD_SIZE = 10000
+DEFAULT_SHARD_CONCURRENCY = 16
+
+# Default minimum number of seconds, and percentage of a phase's files, between the progress
+# summaries an Ingester reports during a phase
+DEFAULT_PROGRESS_INTERVAL = 30
+DEFAULT_PROGRESS_PERCENT = 10
+
+# Number of manifest entries an Ingester looks up with HEAD requests between checkpoints of its
+# journal
+VALIDATION_BATCH_SIZE = 10000
+
+# Number of manifest rows parsed at a time when reading a manifest
+DEFAULT_MANIFEST_CHUNK_SIZE = 100_000
+
+# Extensions of the manifest formats supported: CSV, gzip or zstd compressed CSV, and Parquet
+MANIFEST_EXTENSIONS = (".csv", ".csv.gz", ".csv.zst", ".parquet")
+
+# Default largest ingest job the Ingester lambda runs itself: the number of manifest entries, and
+# total bytes of the files listed, it can validate & copy well within its 15 minute timeout. Larger
+# jobs are submitted to AWS Batch, when the Ingester is configured with a job queue
+DEFAULT_LAMBDA_MAX_ROWS = 500_000
+DEFAULT_LAMBDA_MAX_BYTES = 500 * 1024**3
+
+# Default smallest number of files an Ingester copies with an S3 Batch Operations job, when it is
+# configured with one, rather than copying them itself
+DEFAULT_BATCH_COPY_THRESHOLD = 1_000_000
+
+# Default number of seconds between checks of an S3 Batch Operations job's status
+DEFAULT_BATCH_COPY_POLL_INTERVAL = 30
@@ -0,0 +1,27 @@
+"""
+Imports of modules on first use, rather than when the module using them is loaded: optional
+dependencies only some ingest jobs need, and modules only some code paths need (ex. pandas, which
+the pandas-free ingest core never loads).
+"""
+import importlib
+from types import ModuleType
+
+from .exceptions import IngesterException
+
+
+def lazy_import(name: str, required_for: str = None, package: str = None) -> ModuleType:
+    """
+    Import a module, once it is needed.
+    :param name: name of the module (ex. pyarrow.parquet), relative to package if it starts with .
+    :param required_for: what needs the module (ex. "to read Parquet manifest files"), if it is an
+           optional dependency. Reported if the module can't be imported
+    :param package: package a relative name is resolved from, usually __package__
+    :return: the module
+    :raises IngesterException: if an optional dependency isn't installed
+    """
+    try:
+        return importlib.import_module(name, package)
+    except ImportError as error:
+        if required_for is None:
+            raise
+        raise IngesterException(f"{name.split('.')[0]} is required {required_for}.") from error
@@ -0,0 +1,320 @@
+"""
+Storage in AWS S3 through an asyncio S3 client, for the Ingester's asyncio engine.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import threading
+from typing import TYPE_CHECKING, Any, AsyncContextManager, BinaryIO, Callable, Coroutine, Optional
+
+import botocore.exceptions
+from boto3.s3.transfer import TransferConfig
+from boto3.session import Session
+
+from ..core.constants import DEFAULT_ASYNC_CONCURRENCY, MAX_DELETE_BATCH_SIZE
+from ..core.exceptions import IngesterException
+from ..core.imports import lazy_import
+from .copy_engine import get_default_transfer_config
+from .progress import ProgressReporter
+from .storage import Storage, check_head_bucket_response
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Errors a failed request can raise
+_REQUEST_ERRORS = (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError)
+
+
+def create_async_s3_client(session: Session, max_connections: int) -> AsyncContextManager:
+    """
+    Create an aiobotocore S3 client, with the region & credentials of a boto3 session.
+    aiobotocore is only required by the asyncio engine, so it is imported on first use.
+    :param session: boto3.Session instance to take the region & credentials from
+    :param max_connections: size of the client's connection pool
+    :return: async context manager opening & closing the client
+    """
+    aiobotocore_config = lazy_import("aiobotocore.config", "by the asyncio Ingester engine")
+    aiobotocore_session = lazy_import("aiobotocore.session", "by the asyncio Ingester engine")
+
+    credentials = session.get_credentials()
+    frozen = credentials.get_frozen_credentials() if credentials is not None else None
+    return aiobotocore_session.get_session().create_client(
+        "s3",
+        region_name=session.region_name,
+        aws_access_key_id=frozen.access_key if frozen else None,
+        aws_secret_access_key=frozen.secret_key if frozen else None,
+        aws_session_token=frozen.token if frozen else None,
+        config=aiobotocore_config.AioConfig(max_pool_connections=max_connections),
+    )
+
+
+class AsyncS3Storage(Storage):
+    """
+    Storage in AWS S3, issuing every request from a single asyncio event loop rather than a pool of
+    threads. Thousands of requests can be in flight at once without a thread each, bounded by a
+    semaphore of max_concurrency. Files are copied and sized by max_concurrency workers taking them
+    in turn, so a manifest of millions of files doesn't have a coroutine per file pending at once.
+
+    The event loop runs on a thread of its own, so the storage can be used from any thread like
+    the other Storage implementations. Files at or above the transfer config's multipart threshold
+    are copied in parts (UploadPartCopy), each part a request of its own.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], AsyncContextManager],
+        max_concurrency: int = DEFAULT_ASYNC_CONCURRENCY,
+        transfer_config: TransferConfig = None,
+    ) -> None:
+        """
+        :param client_factory: returns an async context manager opening an async S3 client, such
+               as create_async_s3_client
+        :param max_concurrency: maximum number of requests in flight at once
+        :param transfer_config: multipart settings for copies. Defaults to
+               copy_engine.get_default_transfer_config()
+        """
+        self.__max_concurrency = max_concurrency
+        self.__transfer_config = (
+            get_default_transfer_config() if transfer_config is None else transfer_config
+        )
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(
+            target=self.__loop.run_forever, name="AsyncS3Storage", daemon=True
+        )
+        self.__thread.start()
+
+        # The client and semaphore belong to the event loop, so are created on it
+        self.__semaphore: asyncio.Semaphore = None
+        self.__client_context: AsyncContextManager = None
+        self.__client = None
+
+        async def open_client():
+            self.__semaphore = asyncio.Semaphore(max_concurrency)
+            self.__client_context = client_factory()
+            self.__client = await self.__client_context.__aenter__()
+
+        try:
+            self.__run(open_client())
+        except Exception:
+            self.__stop()
+            raise
+
+    def __run(self, coroutine: Coroutine) -> Any:
+        """
+        :return: the result of a coroutine, run on the storage's event loop
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__loop).result()
+
+    async def __request(self, operation: str, **params) -> dict:
+        """
+        :return: the response to an S3 request, once one of the max_concurrency request slots is
+                 free
+        """
+        async with self.__semaphore:
+            return await getattr(self.__client, operation)(**params)
+
+    async def __map(self, function: Callable[[Any], Coroutine], items: list) -> list:
+        """
+        Await a coroutine for each item, from max_concurrency workers taking the items in turn.
+        :return: the result of each coroutine, in the order of the items
+        """
+        results = [None] * len(items)
+        pending = iter(enumerate(items))
+
+        async def worker():
+            # Workers share the iterator, so each item is taken by exactly one of them
+            for index, item in pending:
+                results[index] = await function(item)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.__max_concurrency, len(items)))))
+        return results
+
+    @property
+    def s3_client(self):
+        """
+        The aiobotocore S3 client used, whose event hooks are emitted from the storage's event loop
+        """
+        return self.__client
+
+    def check_bucket(self, bucket: str) -> None:
+        try:
+            response = self.__run(self.__request("head_bucket", Bucket=bucket))
+        except botocore.exceptions.ClientError as client_error:
+            raise IngesterException(client_error) from client_error
+        check_head_bucket_response(bucket, response)
+
+    async def __get_size(self, bucket: str, key: str) -> Optional[int]:
+        try:
+            response = await self.__request("head_object", Bucket=bucket, Key=key)
+        except botocore.exceptions.ClientError:
+            return None
+        return response["ContentLength"]
+
+    def get_size(self, bucket: str, key: str) -> Optional[int]:
+        return self.__run(self.__get_size(bucket, key))
+
+    def get_sizes(self, bucket: str, keys: list[str], max_workers: int) -> list[Optional[int]]:
+        return self.__run(self.__map(lambda key: self.__get_size(bucket, key), keys))
+
+    def list_objects(self, bucket: str, prefix: str, recursive: bool = True) -> pd.DataFrame:
+        params = {"Bucket": bucket, "Prefix": prefix}
+        if not recursive:
+            params["Delimiter"] = "/"
+
+        async def list_objects():
+            contents = []
+            async for page in self.__client.get_paginator("list_objects_v2").paginate(**params):
+                contents.extend(page.get("Contents", []))
+            return contents
+
+        contents = self.__run(list_objects())
+        return lazy_import("pandas").DataFrame(
+            {
+                "filename": [content["Key"] for content in contents],
+                "content_length": [content.get("Size") for content in contents],
+                "etag": [content.get("ETag") for content in contents],
+            }
+        )
+
+    async def __copy_file(
+        self, source_bucket: str, destination_bucket: str, file: tuple[str, str, int]
+    ) -> None:
+        """
+        Copy a file server side, in parts if it is at or above the multipart threshold.
+        """
+        source_key, destination_key, size = file[0], file[1], int(file[2])
+        copy_source = {"Bucket": source_bucket, "Key": source_key}
+        if size < self.__transfer_config.multipart_threshold:
+            await self.__request(
+                "copy_object",
+                CopySource=copy_source,
+                Bucket=destination_bucket,
+                Key=destination_key,
+            )
+            return
+
+        upload = await self.__request(
+            "create_multipart_upload", Bucket=destination_bucket, Key=destination_key
+        )
+        chunksize = self.__transfer_config.multipart_chunksize
+
+        async def copy_part(part_number: int, start: int) -> dict:
+            response = await self.__request(
+                "upload_part_copy",
+                CopySource=copy_source,
+                CopySourceRange=f"bytes={start}-{min(start + chunksize, size) - 1}",
+                Bucket=destination_bucket,
+                Key=destination_key,
+                PartNumber=part_number,
+                UploadId=upload["UploadId"],
+            )
+            return {"ETag": response["CopyPartResult"]["ETag"], "PartNumber": part_number}
+
+        try:
+            parts = await asyncio.gather(
+                *(
+                    copy_part(part_number, start)
+                    for part_number, start in enumerate(range(0, size, chunksize), start=1)
+                )
+            )
+            await self.__request(
+                "complete_multipart_upload",
+                Bucket=destination_bucket,
+                Key=destination_key,
+                UploadId=upload["UploadId"],
+                MultipartUpload={"Parts": parts},
+            )
+        except _REQUEST_ERRORS:
+            await self.__request(
+                "abort_multipart_upload",
+                Bucket=destination_bucket,
+                Key=destination_key,
+                UploadId=upload["UploadId"],
+            )
+            raise
+
+    def copy(
+        self,
+        source_bucket: str,
+        destination_bucket: str,
+        files: list[tuple[str, str, int]],
+        on_copied: Callable[[str], None] = None,
+        progress: ProgressReporter = None,
+    ) -> None:
+        # pylint: disable=too-many-arguments
+        async def copy_file(file: tuple[str, str, int]) -> Optional[str]:
+            source_key, _, size = file
+            try:
+                await self.__copy_file(source_bucket, destination_bucket, file)
+            except _REQUEST_ERRORS as error:
+                if progress is not None:
+                    progress.failure(f"s3://{source_bucket}/{source_key} - Error: {error}")
+                return f"\n\tFile: {source_key} - Error: {error}"
+            if progress is not None:
+                progress.update(nbytes=int(size))
+            # Run off the event loop, as the callback may use this storage itself
+            if on_copied is not None:
+                await asyncio.get_running_loop().run_in_executor(None, on_copied, source_key)
+            return None
+
+        failures = [failure for failure in self.__run(self.__map(copy_file, files)) if failure]
+        if failures:
+            raise IngesterException(
+                f"Error copying files. {len(failures)} of {len(files)} copies failed."
+                + "".join(failures)
+            )
+
+    def put_object(self, bucket: str, key: str, body: bytes) -> None:
+        self.__run(self.__request("put_object", Bucket=bucket, Key=key, Body=body))
+
+    def get_object(self, bucket: str, key: str) -> Optional[BinaryIO]:
+        async def get_object():
+            response = await self.__request("get_object", Bucket=bucket, Key=key)
+            async with response["Body"] as body:
+                return await body.read()
+
+        try:
+            return io.BytesIO(self.__run(get_object()))
+        except botocore.exceptions.ClientError as client_error:
+            if client_error.response.get("Error", {}).get("Code") != "NoSuchKey":
+                raise IngesterException(client_error) from client_error
+            return None
+
+    def delete_objects(self, bucket: str, keys: list[str]) -> list[str]:
+        async def delete_batch(batch: list[str]) -> list[str]:
+            # Only the keys that failed are returned in quiet mode
+            try:
+                response = await self.__request(
+                    "delete_objects",
+                    Bucket=bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+            except botocore.exceptions.ClientError as client_error:
+                return [f"{key} - Error: {client_error}" for key in batch]
+            return [
+                f"{error['Key']} - Error: {error.get('Code')} {error.get('Message')}"
+                for error in response.get("Errors", [])
+            ]
+
+        async def delete_batches():
+            return await asyncio.gather(
+                *(
+                    delete_batch(keys[start : start + MAX_DELETE_BATCH_SIZE])
+                    for start in range(0, len(keys), MAX_DELETE_BATCH_SIZE)
+                )
+            )
+
+        return [failure for failures in self.__run(delete_batches()) for failure in failures]
+
+    def __stop(self) -> None:
+        """
+        Stop the event loop, and its thread
+        """
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__loop.close()
+
+    def close(self) -> None:
+        self.__run(self.__client_context.__aexit__(None, None, None))
+        self.__stop()
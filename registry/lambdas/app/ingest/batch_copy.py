@@ -0,0 +1,347 @@
+"""
+Installs a dataset's files with an S3 Batch Operations job, for datasets of millions of files. S3
+drives the copies, retrying and reporting on each, rather than an Ingester copying every file:
+- the files to copy are listed in a Batch Operations manifest, uploaded to the ingest bucket
+- a job is submitted with the manifest, each of its tasks copying one file in an invocation of
+  the Ingester lambda (see run_copy_tasks), and polled until it completes
+- the job's completion report is read back for the files that were copied
+"""
+import csv
+import hashlib
+import io
+import json
+import time
+import urllib.parse
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import BinaryIO, Callable
+
+from ..core.constants import DEFAULT_BATCH_COPY_POLL_INTERVAL
+from ..core.exceptions import IngesterException
+from ..model.dataset import FileType
+from .storage import Storage
+
+# Columns of a Batch Operations completion report (format Report_CSV_20180820)
+REPORT_COLUMNS = [
+    "Bucket",
+    "Key",
+    "VersionId",
+    "TaskStatus",
+    "ErrorCode",
+    "HTTPStatusCode",
+    "ResultMessage",
+]
+
+# Statuses a Batch Operations job ends in
+FINAL_JOB_STATUSES = ("Complete", "Failed", "Cancelled")
+
+
+def get_destination_key(destination_folder: str, uploaded_file: str) -> str:
+    """
+    :param destination_folder: folder (ending in /) the dataset is installed in
+    :param uploaded_file: path of a file under the dataset's folder in the ingest job
+    :return: key the file is installed at: its path under the destination folder, its extension
+             normalized (ex. .FTS to .fits)
+    """
+    filename_split = uploaded_file.rsplit(".", 1)
+    extension = filename_split[-1].lower()
+    return destination_folder + ".".join([filename_split[0], FileType(extension).value])
+
+
+@dataclass
+class CopyJob:
+    """
+    A Batch Operations job copying the files of a dataset from an ingest job
+    """
+
+    # Bucket the files are copied from, which also holds the job's manifest & completion report
+    source_bucket: str = ""
+
+    # Prefix the dataset's files were uploaded under (ex. my_job/MMS/)
+    source_prefix: str = ""
+
+    # Bucket, and folder within it, the files are copied to
+    destination_bucket: str = ""
+    destination_folder: str = ""
+
+    # Key of the job's manifest, and prefix its completion report is written under
+    manifest_key: str = ""
+    report_prefix: str = ""
+
+    @property
+    def user_arguments(self) -> dict[str, str]:
+        """
+        :return: the job's arguments passed to each of its tasks (see run_copy_tasks)
+        """
+        return {
+            "sourcePrefix": self.source_prefix,
+            "destinationBucket": self.destination_bucket,
+            "destinationFolder": self.destination_folder,
+        }
+
+
+def write_copy_manifest(bucket: str, keys: list[str]) -> bytes:
+    """
+    :param bucket: name of the bucket the files are in
+    :param keys: key of each file to copy
+    :return: a Batch Operations manifest (format S3BatchOperations_CSV_20180820) of the files
+    """
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerows([bucket, urllib.parse.quote(key)] for key in keys)
+    return output.getvalue().encode("utf-8")
+
+
+def read_completion_report(
+    get_object: Callable[[str, str], BinaryIO], bucket: str, report_prefix: str, job_id: str
+) -> dict[str, tuple[bool, str]]:
+    """
+    Read a Batch Operations job's completion report, from the manifest listing its results files.
+    :param get_object: returns the contents of an object, given its bucket & key
+    :param bucket: name of the bucket the report was written to
+    :param report_prefix: prefix the report was written under
+    :param job_id: id of the job
+    :return: the result of each of the job's tasks, by key: whether it succeeded, and its message
+    """
+    manifest = json.load(get_object(bucket, f"{report_prefix}/job-{job_id}/manifest.json"))
+    results = {}
+    for results_file in manifest["Results"]:
+        body = io.TextIOWrapper(get_object(results_file["Bucket"], results_file["Key"]), "utf-8")
+        for row in csv.reader(body):
+            task = dict(zip(REPORT_COLUMNS, row))
+            results[urllib.parse.unquote_plus(task["Key"])] = (
+                task["TaskStatus"] == "succeeded",
+                task["ResultMessage"],
+            )
+    return results
+
+
+def run_copy_tasks(s3_client, event: dict) -> dict:
+    """
+    Run the tasks of a Batch Operations copy job invoking the Ingester lambda, copying each
+    task's file to where the Ingester installs it.
+    :param s3_client: S3 client to copy with
+    :param event: the lambda's event, from Batch Operations (invocation schema 2.0)
+    :return: the lambda's response to Batch Operations, with the result of each task
+    """
+    arguments = event["job"]["userArguments"]
+    results = []
+    for task in event["tasks"]:
+        # Keys are URL encoded, as they are in the job's manifest
+        source_key = urllib.parse.unquote_plus(task["s3Key"])
+        uploaded_file = source_key[len(arguments["sourcePrefix"]) :]
+        try:
+            destination_key = get_destination_key(arguments["destinationFolder"], uploaded_file)
+            s3_client.copy(
+                {"Bucket": task["s3Bucket"], "Key": source_key},
+                arguments["destinationBucket"],
+                destination_key,
+            )
+            result = {"resultCode": "Succeeded", "resultString": destination_key}
+        # pylint: disable=broad-exception-caught
+        # The failure is reported back for the task, and in the job's completion report
+        except Exception as ex:
+            result = {"resultCode": "PermanentFailure", "resultString": str(ex)}
+        # pylint: enable=broad-exception-caught
+        results.append({"taskId": task["taskId"], **result})
+
+    return {
+        "invocationSchemaVersion": "2.0",
+        "treatMissingKeysAs": "PermanentFailure",
+        "invocationId": event["invocationId"],
+        "results": results,
+    }
+
+
+class CopyJobRunner(ABC):  # pylint: disable=too-few-public-methods
+    """
+    Runs the Batch Operations copy jobs installing datasets
+    """
+
+    @abstractmethod
+    def run(self, job: CopyJob) -> dict[str, tuple[bool, str]]:
+        """
+        Run a copy job, blocking until it completes. The job's manifest has been uploaded.
+        :return: the result of each task in the job's completion report, by the source key of
+                 its file: whether the file was copied, and the task's message
+        :raises IngesterException: if the job failed, or was cancelled
+        """
+
+
+class S3BatchCopyJobRunner(CopyJobRunner):  # pylint: disable=too-few-public-methods
+    """
+    Runs copy jobs on S3 Batch Operations, each task invoking the Ingester lambda.
+    """
+
+    def __init__(
+        self,
+        s3control_client,
+        s3_client,
+        role_arn: str,
+        function_arn: str,
+        poll_interval: float = DEFAULT_BATCH_COPY_POLL_INTERVAL,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        # pylint: disable=too-many-arguments
+        """
+        :param s3control_client: boto3 S3 Control client, to submit & poll jobs with
+        :param s3_client: boto3 S3 client, to read the jobs' manifests & reports with
+        :param role_arn: ARN of the IAM role Batch Operations runs jobs as. Jobs are submitted to
+               the role's account
+        :param function_arn: ARN of the Ingester lambda, invoked by each task
+        :param poll_interval: seconds between checks of a job's status
+        :param sleep: sleeps for a number of seconds. Defaults to time.sleep
+        """
+        self.__s3control_client = s3control_client
+        self.__s3_client = s3_client
+        self.__account_id = role_arn.split(":")[4]
+        self.__role_arn = role_arn
+        self.__function_arn = function_arn
+        self.__poll_interval = poll_interval
+        self.__sleep = sleep
+
+    def run(self, job: CopyJob) -> dict[str, tuple[bool, str]]:
+        etag = self.__s3_client.head_object(Bucket=job.source_bucket, Key=job.manifest_key)["ETag"]
+
+        # Submitting the same manifest again, as a re-run of an interrupted ingest does, resumes
+        # waiting on the job already submitted for it
+        job_id = self.__s3control_client.create_job(
+            AccountId=self.__account_id,
+            ConfirmationRequired=False,
+            Operation={
+                "LambdaInvoke": {
+                    "FunctionArn": self.__function_arn,
+                    "InvocationSchemaVersion": "2.0",
+                    "UserArguments": job.user_arguments,
+                }
+            },
+            Report={
+                "Bucket": f"arn:aws:s3:::{job.source_bucket}",
+                "Format": "Report_CSV_20180820",
+                "Enabled": True,
+                "Prefix": job.report_prefix,
+                "ReportScope": "AllTasks",
+            },
+            Manifest={
+                "Spec": {"Format": "S3BatchOperations_CSV_20180820", "Fields": ["Bucket", "Key"]},
+                "Location": {
+                    "ObjectArn": f"arn:aws:s3:::{job.source_bucket}/{job.manifest_key}",
+                    "ETag": etag,
+                },
+            },
+            ClientRequestToken=hashlib.sha256(
+                f"{job.source_bucket}/{job.manifest_key}:{etag}".encode("utf-8")
+            ).hexdigest(),
+            Priority=10,
+            RoleArn=self.__role_arn,
+            Description=f"HelioCloud ingest of {job.source_prefix}",
+        )["JobId"]
+        print(f"Submitted S3 Batch Operations job {job_id} to copy {job.source_prefix}.")
+
+        status = self.__wait(job_id)
+        if status["Status"] != "Complete":
+            raise IngesterException(
+                f"S3 Batch Operations job {job_id} {status['Status']}: "
+                f"{status.get('FailureReasons', [])}"
+            )
+        return read_completion_report(
+            lambda bucket, key: self.__s3_client.get_object(Bucket=bucket, Key=key)["Body"],
+            job.source_bucket,
+            job.report_prefix,
+            job_id,
+        )
+
+    def __wait(self, job_id: str) -> dict:
+        """
+        Poll a job until it ends, reporting its progress.
+        :return: the job's final description
+        """
+        while True:
+            status = self.__s3control_client.describe_job(
+                AccountId=self.__account_id, JobId=job_id
+            )["Job"]
+            progress = status.get("ProgressSummary", {})
+            print(
+                f"S3 Batch Operations job {job_id} {status['Status']}: "
+                f"{progress.get('NumberOfTasksSucceeded', 0)} succeeded, "
+                f"{progress.get('NumberOfTasksFailed', 0)} failed of "
+                f"{progress.get('TotalNumberOfTasks', 0)} tasks."
+            )
+            if status["Status"] in FINAL_JOB_STATUSES:
+                return status
+            self.__sleep(self.__poll_interval)
+
+
+class LocalCopyJobRunner(CopyJobRunner):  # pylint: disable=too-few-public-methods
+    """
+    Runs copy jobs in process against a Storage, as Batch Operations would: every file in the
+    job's manifest is copied, and a completion report written and read back in the format Batch
+    Operations writes. For testing, and for ingesting into a filesystem.
+    """
+
+    def __init__(self, storage: Storage) -> None:
+        """
+        :param storage: where the ingest & destination buckets are
+        """
+        self.__storage = storage
+
+    def run(self, job: CopyJob) -> dict[str, tuple[bool, str]]:
+        manifest = self.__storage.get_object(job.source_bucket, job.manifest_key).read()
+        tasks = list(csv.reader(io.StringIO(manifest.decode("utf-8"))))
+        source_keys = [urllib.parse.unquote(key) for _, key in tasks]
+
+        # Copy every file, noting those copied before any failure is raised
+        copied = set[str]()
+        message = "Successful"
+        try:
+            self.__storage.copy(
+                source_bucket=job.source_bucket,
+                destination_bucket=job.destination_bucket,
+                files=[
+                    (
+                        key,
+                        get_destination_key(job.destination_folder, key[len(job.source_prefix) :]),
+                        0,
+                    )
+                    for key in source_keys
+                ],
+                on_copied=copied.add,
+            )
+        except IngesterException as ex:
+            message = ex.message.split("\n", 1)[0]
+
+        job_id = self.__write_report(job, tasks, [key in copied for key in source_keys], message)
+        return read_completion_report(
+            self.__storage.get_object, job.source_bucket, job.report_prefix, job_id
+        )
+
+    def __write_report(
+        self, job: CopyJob, tasks: list[list[str]], copied: list[bool], message: str
+    ) -> str:
+        """
+        Write a job's completion report, as Batch Operations does.
+        :param tasks: bucket & key of each task in the job's manifest
+        :param copied: whether each task's file was copied
+        :param message: the result message of the tasks that failed
+        :return: the id given to the job
+        """
+        job_id = str(uuid.uuid4())
+        results_key = f"{job.report_prefix}/job-{job_id}/results/{uuid.uuid4().hex}.csv"
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        for (bucket, key), succeeded in zip(tasks, copied):
+            writer.writerow(
+                [bucket, key, "", "succeeded", "200", "200", "Successful"]
+                if succeeded
+                else [bucket, key, "", "failed", "PermanentFailure", "500", message]
+            )
+        self.__storage.put_object(job.source_bucket, results_key, output.getvalue().encode("utf-8"))
+        self.__storage.put_object(
+            job.source_bucket,
+            f"{job.report_prefix}/job-{job_id}/manifest.json",
+            json.dumps({"Results": [{"Bucket": job.source_bucket, "Key": results_key}]}).encode(
+                "utf-8"
+            ),
+        )
+        return job_id
@@ -0,0 +1,539 @@
+"""
+A pandas-free ingest core. The manifest and the files installed are held as compact typed columns
+(arrays of timestamps & sizes, and a list of keys) and parsed with the csv module, so a dataset can
+be ingested without pandas, and in less memory per manifest entry.
+
+Produces the same index files and catalog updates as the Ingester, for ingest jobs with CSV
+manifests (optionally gzip or zstd compressed) and CSV indexes, validated with a HEAD request per
+file. Jobs needing anything else (Parquet manifests or indexes, LIST validation, journaling,
+sharding or skipping unchanged files) are run by the Ingester.
+"""
+# Each phase mirrors the Ingester's, on columns instead of dataframes
+# pylint: disable=duplicate-code
+import csv
+import datetime
+import gzip
+import io
+import os
+import re
+import time
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterable, Optional
+
+import boto3
+import botocore.config
+from boto3.s3.transfer import TransferConfig
+from boto3.session import Session
+
+from ..aws_utils.s3 import get_bucket_name, get_bucket_subfolder
+from ..catalog.dataset_repository import DataSetRepository
+from ..core.constants import (
+    DEFAULT_PROGRESS_INTERVAL,
+    DEFAULT_PROGRESS_PERCENT,
+    DEFAULT_VALIDATION_WORKERS,
+    MAX_DELETE_BATCH_SIZE,
+    VALIDATION_BATCH_SIZE,
+)
+from ..core.exceptions import IngesterException
+from ..core.imports import lazy_import
+from ..model.dataset import DataSet, FileType, IndexType
+from .copy_engine import get_default_transfer_config
+from .instrumentation import Instrumentation
+from .progress import ProgressReporter
+from .result import FileStatus, Result
+from .storage import S3Storage, Storage
+
+# Columns a manifest must have (see manifest.MANIFEST_COLUMNS)
+MANIFEST_COLUMNS = ("time", "s3key", "filesize")
+
+# Header row of a CSV index file (see index_file.write_index_file)
+INDEX_HEADER = "# startDate, key, size\n"
+
+# Extensions of the dataset files that can be ingested, each mapped to its FileType
+_FILE_TYPES = FileType.by_extension()
+
+# Timestamps are held as nanoseconds since the epoch, in UTC, as pandas does
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_NANOSECONDS = 1_000_000_000
+
+# Fractional seconds at the end of a timestamp, before any UTC offset
+_FRACTION = re.compile(r"(?<=\d)[.,](\d+)(?=([+-]\d\d(:?\d\d)?)?$)")
+
+
+def parse_time(text: str) -> int:
+    """
+    Parse an ISO 8601 timestamp, as found in manifests and CSV index files. Timestamps without a
+    UTC offset are taken to be in UTC.
+    :return: the timestamp in nanoseconds since the epoch
+    """
+    text = text.strip()
+
+    # datetime only reads a UTC designator of "Z" from Python 3.11, and never reads "z"
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+
+    # datetime only reads fractional seconds to the microsecond, so they are parsed separately
+    nanoseconds = 0
+    fraction = _FRACTION.search(text) if "." in text or "," in text else None
+    if fraction is not None:
+        nanoseconds = int(fraction.group(1)[:9].ljust(9, "0"))
+        text = text[: fraction.start()] + text[fraction.end(1) :]
+    try:
+        value = datetime.datetime.fromisoformat(text)
+    except ValueError as ex:
+        raise IngesterException(f"Invalid time: {text}") from ex
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * _NANOSECONDS + nanoseconds
+
+
+def to_datetime(nanoseconds: int) -> datetime.datetime:
+    """
+    :return: a timestamp in nanoseconds since the epoch as a UTC datetime, to the microsecond
+    """
+    return _EPOCH + datetime.timedelta(microseconds=nanoseconds // 1000)
+
+
+def format_time(nanoseconds: int) -> str:
+    """
+    :return: a timestamp in nanoseconds since the epoch, formatted as pandas writes a UTC
+             timestamp to CSV (ex. 2015-09-01 12:11:14+00:00)
+    """
+    seconds, fraction = divmod(nanoseconds, _NANOSECONDS)
+    text = (_EPOCH + datetime.timedelta(seconds=seconds)).isoformat(sep=" ")
+    if fraction == 0:
+        return text
+    digits = f"{fraction:09d}" if fraction % 1000 else f"{fraction // 1000:06d}"
+    return f"{text[:-6]}.{digits}{text[-6:]}"
+
+
+@dataclass
+class ManifestColumns:
+    """
+    A manifest, as one typed column per manifest column
+    """
+
+    # Start time of each file, in nanoseconds since the epoch (UTC)
+    times: array = field(default_factory=lambda: array("q"))
+
+    # Key of each file, relative to the dataset's folder in the ingest job
+    keys: list[str] = field(default_factory=list)
+
+    # Size of each file, in bytes
+    sizes: array = field(default_factory=lambda: array("q"))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def append(self, start: int, key: str, size: int) -> None:
+        """
+        Add a file to the manifest
+        """
+        self.times.append(start)
+        self.keys.append(key)
+        self.sizes.append(size)
+
+
+def read_manifest_columns(data: BinaryIO, filename: str = "manifest.csv") -> ManifestColumns:
+    """
+    Parse a CSV manifest with the csv module as it is read. Compressed manifests are decompressed
+    as they are read.
+    :param data: binary file-like object to read the manifest from, e.g. the body of an S3 object
+    :param filename: name of the manifest file, whose extension gives its format: .csv, .csv.gz or
+           .csv.zst
+    :return: the manifest's time, s3key & filesize columns
+    """
+    if filename.endswith(".gz"):
+        data = gzip.GzipFile(fileobj=data, mode="rb")
+    elif filename.endswith(".zst"):
+        zstandard = lazy_import("zstandard", "to read zstd compressed manifest files")
+        data = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(data))
+    elif not filename.endswith(".csv"):
+        raise IngesterException(f"Only CSV manifests can be ingested without pandas: {filename}.")
+
+    reader = csv.reader(io.TextIOWrapper(data, encoding="UTF-8", newline=""))
+
+    # The header's column names may be prefixed with # and padded with spaces
+    columns = [column.replace("#", "").strip() for column in next(reader, [])]
+    if not all(column in columns for column in MANIFEST_COLUMNS):
+        raise IngesterException(
+            "Manifest file is missing one of the required headers: "
+            + str(list(MANIFEST_COLUMNS))
+            + "."
+        )
+    time_column, key_column, size_column = (columns.index(column) for column in MANIFEST_COLUMNS)
+
+    manifest = ManifestColumns()
+    append_time, append_key, append_size = (
+        manifest.times.append,
+        manifest.keys.append,
+        manifest.sizes.append,
+    )
+    try:
+        for row in reader:
+            # Blank lines are skipped, as pandas does
+            if row:
+                append_time(parse_time(row[time_column]))
+                append_key(row[key_column])
+                append_size(int(row[size_column]))
+    except (ValueError, IndexError, OSError, csv.Error) as ex:
+        raise IngesterException(str(ex)) from ex
+    return manifest
+
+
+def write_index_csv(rows: Iterable[tuple[int, str, int]]) -> bytes:
+    """
+    Serialize a year's CSV index, byte for byte as index_file.write_index_file does.
+    :param rows: the startDate (nanoseconds since the epoch), key & size of each file in the index
+    :return: the contents of the index file
+    """
+    buffer = io.StringIO()
+    buffer.write(INDEX_HEADER)
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, quotechar="'", lineterminator=os.linesep)
+    writer.writerows((format_time(start), key, size) for start, key, size in rows)
+    return buffer.getvalue().encode("UTF-8")
+
+
+def read_index_csv(data: BinaryIO) -> list[tuple[int, str, int]]:
+    """
+    Load a year's CSV index.
+    :return: the startDate (nanoseconds since the epoch), key & size of each file in the index
+    """
+    reader = csv.reader(io.TextIOWrapper(data, encoding="UTF-8", newline=""), quotechar="'")
+
+    # Skip the unquoted header row
+    next(reader, None)
+    return [(parse_time(start), key, int(size)) for start, key, size in reader]
+
+
+class ColumnarIngester:  # pylint: disable=too-many-instance-attributes
+    """
+    Ingests a dataset as the Ingester does, without pandas: validates the files listed in the
+    manifest, copies them into the dataset's bucket, writes the dataset's yearly CSV index files,
+    updates its catalog entry, then cleans up the upload.
+    """
+
+    def __init__(
+        self,
+        ingest_bucket: str,
+        ingest_folder: str,
+        manifest: ManifestColumns,
+        entry_dataset: DataSet,
+        ds_repo: DataSetRepository,
+        session: Session = None,
+        validation_workers: int = DEFAULT_VALIDATION_WORKERS,
+        transfer_config: TransferConfig = None,
+        incremental: bool = False,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        progress_percent: float = DEFAULT_PROGRESS_PERCENT,
+        storage: Storage = None,
+    ) -> None:
+        # pylint: disable=too-many-arguments
+        """
+        :param ingest_bucket: name of the S3 bucket that this Ingester instance should read from
+        :param ingest_folder: name of the sub-folder in the ingest_bucket that contains job
+        :param manifest: the manifest, as read by read_manifest_columns
+        :param entry_dataset: dataset instance containing details for this ingest job
+        :param ds_repo: dataset repository to place entries into
+        :param session: boto3.Session instance to use. Defaults to a new session
+        :param validation_workers: maximum number of manifest entries validated concurrently
+        :param transfer_config: copy concurrency & multipart settings used when installing the
+               dataset. Defaults to copy_engine.get_default_transfer_config()
+        :param incremental: if True, the files ingested are merged into the dataset's existing
+               index files and catalog entry, instead of replacing them
+        :param progress_interval: minimum seconds between progress summaries
+        :param progress_percent: percentage of the files between progress summaries
+        :param storage: where the ingest & destination buckets are. Defaults to S3, using a client
+               from the session. Storage provided is not closed by the ColumnarIngester
+        """
+        if validation_workers < 1:
+            raise IngesterException(
+                f"Validation workers must be a positive number, got: {validation_workers}."
+            )
+        if entry_dataset.indextype == IndexType.PARQUET:
+            raise IngesterException("Only CSV index files can be written without pandas.")
+
+        self.__ingest_bucket = ingest_bucket
+        self.__manifest = manifest
+        self.__entry_dataset = entry_dataset
+        self.__ds_repo = ds_repo
+        self.__incremental = incremental
+        self.__validation_workers = validation_workers
+        self.__progress_interval = progress_interval
+        self.__progress_percent = progress_percent
+
+        # Where the dataset's files are uploaded to, and installed to
+        self.__upload_prefix = os.path.join(ingest_folder, entry_dataset.dataset_id, "")
+        self.__destination_bucket = get_bucket_name(entry_dataset.index)
+        self.__destination_folder = get_bucket_subfolder(entry_dataset.index)
+        if not self.__destination_folder.endswith("/"):
+            self.__destination_folder += "/"
+
+        # Storage of the buckets, by default S3 through a client shared by all workers
+        if transfer_config is None:
+            transfer_config = get_default_transfer_config()
+        self.__max_connections = max(validation_workers, transfer_config.max_concurrency)
+        self.__owns_storage = storage is None
+        if storage is None:
+            session = boto3.session.Session() if session is None else session
+            s3_client = session.client(
+                "s3", config=botocore.config.Config(max_pool_connections=self.__max_connections)
+            )
+            storage = S3Storage(s3_client, transfer_config=transfer_config)
+        self.__storage = storage
+        self.__instrumentation = Instrumentation(
+            storage.s3_client if isinstance(storage, S3Storage) else None
+        )
+
+        # Key of each file installed in the destination bucket, in manifest order
+        self.__installed_keys = list[str]()
+
+        self.__result = Result()
+
+    def __validate_manifest(self) -> None:
+        """
+        Validate each entry in the manifest, as the Ingester does in its HEAD validation mode,
+        reporting every entry if any is invalid.
+        """
+        counts = Counter(self.__manifest.keys)
+        statuses = list[str]()
+        progress = self.__progress("validate_manifest", len(self.__manifest))
+        start = time.perf_counter()
+        for batch in range(0, len(self.__manifest), VALIDATION_BATCH_SIZE):
+            statuses += self.__check_files(batch, counts, progress)
+        progress.finish()
+
+        elapsed = time.perf_counter() - start
+        self.__result.files_validated_per_second = len(statuses) / elapsed if elapsed > 0 else 0.0
+        print(
+            f"Validated {len(statuses)} manifest entries in {elapsed:.2f}s "
+            f"({self.__result.files_validated_per_second:.1f} files/s, "
+            f"{self.__validation_workers} workers)."
+        )
+
+        valid_count = statuses.count(FileStatus.VALID.name)
+        if valid_count < len(statuses):
+            raise IngesterException(
+                f"Error validating manifest entries. Only {valid_count} records were valid out of "
+                f"{len(statuses)} files checked."
+                + "".join(
+                    f"\n\tFile: {self.__upload_prefix}{key} - Status: {status}"
+                    for key, status in zip(self.__manifest.keys, statuses)
+                )
+            )
+
+    def __check_files(self, batch: int, counts: Counter, progress: ProgressReporter) -> list[str]:
+        """
+        Look up the files of VALIDATION_BATCH_SIZE manifest entries in the ingest bucket.
+        :param batch: position of the batch's first entry in the manifest
+        :param counts: number of times each key is listed in the manifest
+        :param progress: reporter for the entries checked
+        :return: the status of each entry in the batch
+        """
+        keys = self.__manifest.keys[batch : batch + VALIDATION_BATCH_SIZE]
+        filenames = [self.__upload_prefix + key for key in keys]
+        sizes = self.__storage.get_sizes(self.__ingest_bucket, filenames, self.__validation_workers)
+        statuses = list[str]()
+        for index, (key, filename, size) in enumerate(zip(keys, filenames, sizes), start=batch):
+            failed = self.__file_status(filename, self.__manifest.sizes[index], size)
+            if counts[key] > 1:
+                failed.append(FileStatus.DUPLICATE.name)
+            statuses.append(", ".join(failed) or FileStatus.VALID.name)
+            if failed:
+                progress.failure(f"s3://{self.__ingest_bucket}/{filename} {statuses[-1]}")
+        progress.update(count=statuses.count(FileStatus.VALID.name))
+        return statuses
+
+    @staticmethod
+    def __file_status(filename: str, filesize: int, content_length: Optional[int]) -> list[str]:
+        """
+        :return: the names of the checks a file failed, other than being listed twice
+        """
+        if content_length is None:
+            return [FileStatus.NOT_FOUND.name]
+        failed = []
+        if content_length != filesize:
+            failed.append(FileStatus.WRONG_SIZE.name)
+        if filename.rsplit(".", 1)[-1].lower() not in _FILE_TYPES:
+            failed.append(FileStatus.BAD_EXTENSION.name)
+        return failed
+
+    def __install_dataset(self) -> None:
+        """
+        Copy the files into the destination bucket, named with their normalized extension.
+        """
+        copies = list[tuple[str, str, int]]()
+        for key, size in zip(self.__manifest.keys, self.__manifest.sizes):
+            name, extension = key.rsplit(".", 1)
+            destination_key = (
+                f"{self.__destination_folder}{name}.{FileType(extension.lower()).value}"
+            )
+            copies.append((self.__upload_prefix + key, destination_key, size))
+            self.__installed_keys.append(f"s3://{self.__destination_bucket}/{destination_key}")
+        self.__result.bytes_copied = sum(self.__manifest.sizes)
+
+        print(f"Copying {len(copies)} files.")
+        progress = self.__progress("install", len(copies))
+        try:
+            self.__storage.copy(
+                source_bucket=self.__ingest_bucket,
+                destination_bucket=self.__destination_bucket,
+                files=copies,
+                progress=progress,
+            )
+        finally:
+            progress.finish()
+
+    def __install_index_files(self) -> None:
+        """
+        Write one index file per year of the files installed, in the order the years first appear
+        in the manifest. An incremental ingest merges the files into the existing index files.
+        """
+        rows_by_year = dict[int, array]()
+        for row, start in enumerate(self.__manifest.times):
+            rows_by_year.setdefault(to_datetime(start).year, array("q")).append(row)
+
+        for year, rows in rows_by_year.items():
+            key = f"{self.__destination_folder}{self.__entry_dataset.dataset_id}_{year}.csv"
+            index = [
+                (self.__manifest.times[row], self.__installed_keys[row], self.__manifest.sizes[row])
+                for row in rows
+            ]
+            if self.__incremental:
+                index = self.__merge_index_file(key, index)
+            self.__storage.put_object(
+                bucket=self.__destination_bucket, key=key, body=write_index_csv(index)
+            )
+            print(f"Uploading index file to bucket: {self.__destination_bucket}, key: {key}.")
+
+    def __merge_index_file(
+        self, key: str, index: list[tuple[int, str, int]]
+    ) -> list[tuple[int, str, int]]:
+        """
+        Merge a year's installed files into its existing index file, if there is one, replacing
+        the entries of files installed again.
+        :return: the merged index for the year, sorted by startDate
+        """
+        index = sorted(index, key=lambda entry: entry[0])
+        existing = self.__storage.get_object(self.__destination_bucket, key)
+        if existing is None:
+            print(f"No index file at key: {key}. Creating a new one.")
+            return index
+
+        installed = {entry[1] for entry in index}
+        existing_index = [entry for entry in read_index_csv(existing) if entry[1] not in installed]
+        print(
+            f"Merging {len(index)} files into {len(existing_index)} entries of index file at key: "
+            f"{key}."
+        )
+        return sorted(existing_index + index, key=lambda entry: entry[0])
+
+    def __update_catalog(self) -> None:
+        """
+        Update the dataset's catalog entry with the time range & file formats of the manifest.
+        """
+        times = self.__manifest.times
+        start_date = to_datetime(min(times)) if times else None
+        end_date = to_datetime(max(times)) if times else None
+        extensions = dict.fromkeys(key.rsplit(".", 1)[-1].lower() for key in self.__manifest.keys)
+        filetypes = [FileType(extension) for extension in extensions]
+
+        # An incremental ingest widens the time range & file formats of the existing catalog entry.
+        # An empty manifest has no time range, so leaves the existing one as it is
+        existing = (
+            self.__ds_repo.get_by_dataset_id(self.__entry_dataset.dataset_id)
+            if self.__incremental
+            else None
+        )
+        if existing is not None:
+            if existing.start is not None:
+                existing_start = ColumnarIngester.__to_utc(existing.start)
+                start_date = (
+                    existing_start if start_date is None else min(start_date, existing_start)
+                )
+            if existing.stop is not None:
+                existing_stop = ColumnarIngester.__to_utc(existing.stop)
+                end_date = existing_stop if end_date is None else max(end_date, existing_stop)
+            filetypes += [ft for ft in existing.filetype or [] if ft not in filetypes]
+        self.__entry_dataset.start = start_date
+        self.__entry_dataset.stop = end_date
+        self.__entry_dataset.filetype = filetypes
+        self.__ds_repo.save([self.__entry_dataset])
+
+    def __clean_up(self) -> None:
+        """
+        Remove the uploaded files, MAX_DELETE_BATCH_SIZE keys at a time.
+        """
+        progress = self.__progress("clean_up", len(self.__manifest))
+
+        def delete_batch(batch: list[str]) -> list[str]:
+            failures = self.__storage.delete_objects(self.__ingest_bucket, batch)
+            for failure in failures:
+                progress.failure(failure)
+            progress.update(count=len(batch) - len(failures))
+            return failures
+
+        keys = [self.__upload_prefix + key for key in self.__manifest.keys]
+        batches = [
+            keys[start : start + MAX_DELETE_BATCH_SIZE]
+            for start in range(0, len(keys), MAX_DELETE_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=self.__max_connections) as executor:
+            for failures in executor.map(delete_batch, batches):
+                self.__result.cleanup_failures.extend(failures)
+        progress.finish()
+
+    def __progress(self, phase: str, total: int) -> ProgressReporter:
+        return ProgressReporter(
+            phase=phase,
+            total=total,
+            interval=self.__progress_interval,
+            percent_step=self.__progress_percent,
+        )
+
+    @staticmethod
+    def __to_utc(value: datetime.datetime) -> datetime.datetime:
+        """
+        :return: the datetime in UTC, assuming naive datetimes are in UTC
+        """
+        if value.tzinfo is None:
+            return value.replace(tzinfo=datetime.timezone.utc)
+        return value.astimezone(datetime.timezone.utc)
+
+    def close(self) -> None:
+        """
+        Release the storage, if the ColumnarIngester created it. Called by execute.
+        """
+        self.__instrumentation.close()
+        if self.__owns_storage:
+            self.__storage.close()
+
+    def execute(self) -> Result:
+        """
+        Validate, install, index, catalog & clean up after the dataset.
+        :return: the results of the ingest
+        """
+        try:
+            with self.__instrumentation.phase("validate_destination"):
+                self.__storage.check_bucket(self.__destination_bucket)
+            with self.__instrumentation.phase("validate_manifest"):
+                self.__validate_manifest()
+            with self.__instrumentation.phase("install"):
+                self.__install_dataset()
+            with self.__instrumentation.phase("index"):
+                self.__install_index_files()
+            with self.__instrumentation.phase("catalog"):
+                self.__update_catalog()
+            with self.__instrumentation.phase("clean_up"):
+                self.__clean_up()
+        finally:
+            self.close()
+
+        self.__result.dataset_updated = self.__entry_dataset.dataset_id
+        self.__result.files_contributed = len(self.__manifest)
+        self.__result.phases = self.__instrumentation.phases
+        return self.__result
@@ -0,0 +1,304 @@
+"""
+Fans an ingest job out across shards of its manifest, so that a large dataset can be copied by many
+Ingesters at once, once validated, then indexed and cataloged in a single step.
+"""
+import io
+import json
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+import pandas as pd
+
+from ..core.constants import DEFAULT_SHARD_CONCURRENCY, DEFAULT_SHARD_SIZE
+from ..core.exceptions import IngesterException
+from .ingester import Ingester, Result
+from .manifest import MANIFEST_COLUMNS, read_manifest
+
+
+@dataclass
+class Shard:
+    """
+    A contiguous slice of an ingest job's manifest, installed by a single Ingester.
+    """
+
+    # Folder in the ingest bucket containing the ingest job
+    ingest_folder: str = ""
+
+    # Dataset the manifest belongs to
+    dataset_id: str = ""
+
+    # Position of this shard amongst the manifest's shards
+    index: int = 0
+
+    # Manifest rows in the shard, from start up to (but not including) stop
+    start: int = 0
+    stop: int = 0
+
+    @property
+    def records_key(self) -> str:
+        """
+        S3 key in the ingest bucket that the files installed by this shard are saved to
+        """
+        return os.path.join(self.ingest_folder, ".shards", self.dataset_id, f"{self.index:05d}.csv")
+
+    @property
+    def manifest_key(self) -> str:
+        """
+        S3 key in the ingest bucket that the shard's rows of the manifest are saved to
+        """
+        return os.path.join(
+            self.ingest_folder, ".shards", self.dataset_id, f"{self.index:05d}.manifest.csv"
+        )
+
+
+def save_shard_manifest(s3_client, bucket: str, shard: Shard, manifest_df: pd.DataFrame):
+    """
+    Save a shard's rows of the manifest to the ingest bucket, so the Ingester installing the shard
+    reads only its own rows rather than the whole manifest.
+    :param s3_client: boto3 S3 client to use
+    :param bucket: name of the ingest bucket
+    :param shard: the shard to install
+    :param manifest_df: the shard's rows of the manifest
+    """
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=shard.manifest_key,
+        Body=manifest_df[MANIFEST_COLUMNS].to_csv(index=False).encode("utf-8"),
+    )
+
+
+def load_shard_manifest(s3_client, bucket: str, shard: Shard) -> pd.DataFrame:
+    """
+    Load a shard's rows of the manifest from the ingest bucket.
+    :param s3_client: boto3 S3 client to use
+    :param bucket: name of the ingest bucket
+    :param shard: the shard to install
+    :return: the shard's rows of the manifest, indexed by their position in the whole manifest
+    """
+    response = s3_client.get_object(Bucket=bucket, Key=shard.manifest_key)
+    manifest_df = read_manifest(response["Body"], shard.manifest_key)
+    manifest_df.index += shard.start
+    return manifest_df
+
+
+def save_shard_records(s3_client, bucket: str, shard: Shard, installed_files: pd.DataFrame):
+    """
+    Save the files installed by a shard to the ingest bucket, for the coordinator to collect.
+    :param s3_client: boto3 S3 client to use
+    :param bucket: name of the ingest bucket
+    :param shard: the shard installed
+    :param installed_files: the files installed by the shard, as returned by Ingester.install
+    """
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=shard.records_key,
+        Body=installed_files.to_csv(index=False).encode("utf-8"),
+    )
+
+
+def load_shard_records(s3_client, bucket: str, shard: Shard) -> pd.DataFrame:
+    """
+    Load, then remove, the files installed by a shard from the ingest bucket.
+    :param s3_client: boto3 S3 client to use
+    :param bucket: name of the ingest bucket
+    :param shard: the shard installed
+    :return: dataframe of the startDate, key & size of each file installed by the shard
+    """
+    response = s3_client.get_object(Bucket=bucket, Key=shard.records_key)
+    installed_files = pd.read_csv(io.BytesIO(response["Body"].read()))
+    installed_files["startDate"] = pd.to_datetime(installed_files["startDate"], utc=True)
+    s3_client.delete_object(Bucket=bucket, Key=shard.records_key)
+    return installed_files
+
+
+class ShardExecutor(ABC):  # pylint: disable=too-few-public-methods
+    """
+    Installs the shards of an ingest job.
+    """
+
+    @abstractmethod
+    def run(self, shards: list[Shard], manifest_df: pd.DataFrame) -> list[pd.DataFrame]:
+        """
+        Install each shard, blocking until they have all been installed.
+        :param shards: the shards to install
+        :param manifest_df: the whole manifest, whose rows of each shard are installed by the
+               shard's Ingester
+        :return: the files installed by each shard, in the order of shards
+        :raises IngesterException: if any shard could not be installed
+        """
+
+
+class LocalShardExecutor(ShardExecutor):  # pylint: disable=too-few-public-methods
+    """
+    Installs shards in this process, on a pool of threads. Used when testing and for running
+    sharded jobs outside of AWS Lambda.
+    """
+
+    def __init__(
+        self,
+        worker: Callable[[Shard, pd.DataFrame], pd.DataFrame],
+        max_workers: int = DEFAULT_SHARD_CONCURRENCY,
+    ) -> None:
+        """
+        :param worker: installs a shard given its rows of the manifest, returning the files
+               installed (see Ingester.install)
+        :param max_workers: maximum number of shards installed at once
+        """
+        self.__worker = worker
+        self.__max_workers = max_workers
+
+    def run(self, shards: list[Shard], manifest_df: pd.DataFrame) -> list[pd.DataFrame]:
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            futures = [
+                executor.submit(self.__worker, shard, manifest_df.iloc[shard.start : shard.stop])
+                for shard in shards
+            ]
+        return _gather(shards, futures)
+
+
+class LambdaShardExecutor(ShardExecutor):  # pylint: disable=too-few-public-methods
+    """
+    Installs each shard in its own invocation of the Ingester lambda, passing the invocation its
+    rows of the manifest and collecting the files it installed through the ingest bucket.
+    """
+
+    def __init__(
+        self,
+        lambda_client,
+        s3_client,
+        function_name: str,
+        ingest_bucket: str,
+        max_concurrency: int = DEFAULT_SHARD_CONCURRENCY,
+        options: dict[str, Any] = None,
+    ) -> None:
+        # pylint: disable=too-many-arguments
+        """
+        :param lambda_client: boto3 Lambda client invoking the Ingester lambda, whose connection
+               pool & read timeout allow max_concurrency invocations of up to 15 minutes at once
+        :param s3_client: boto3 S3 client reading the shards' records
+        :param function_name: name of the Ingester lambda to invoke
+        :param ingest_bucket: name of the ingest bucket the shards' records are saved to
+        :param max_concurrency: maximum number of shards installed at once
+        :param options: additional fields of the ingest job's event, passed on to each invocation
+        """
+        self.__lambda_client = lambda_client
+        self.__s3_client = s3_client
+        self.__function_name = function_name
+        self.__ingest_bucket = ingest_bucket
+        self.__max_concurrency = max_concurrency
+        self.__options = {} if options is None else options
+
+    def __invoke(self, shard: Shard, manifest_df: pd.DataFrame) -> pd.DataFrame:
+        save_shard_manifest(self.__s3_client, self.__ingest_bucket, shard, manifest_df)
+        try:
+            response = self.__lambda_client.invoke(
+                FunctionName=self.__function_name,
+                InvocationType="RequestResponse",
+                Payload=json.dumps(
+                    {**self.__options, "job_folder": shard.ingest_folder, "shard": asdict(shard)}
+                ),
+            )
+            payload = response["Payload"].read().decode("utf-8")
+            if "FunctionError" in response:
+                raise IngesterException(payload)
+            return load_shard_records(self.__s3_client, self.__ingest_bucket, shard)
+        finally:
+            self.__s3_client.delete_object(Bucket=self.__ingest_bucket, Key=shard.manifest_key)
+
+    def run(self, shards: list[Shard], manifest_df: pd.DataFrame) -> list[pd.DataFrame]:
+        with ThreadPoolExecutor(max_workers=self.__max_concurrency) as executor:
+            futures = [
+                executor.submit(self.__invoke, shard, manifest_df.iloc[shard.start : shard.stop])
+                for shard in shards
+            ]
+        return _gather(shards, futures)
+
+
+def _gather(shards: list[Shard], futures: list[Future]) -> list[pd.DataFrame]:
+    """
+    :param shards: the shards installed
+    :param futures: the completed future installing each shard
+    :return: the files installed by each shard
+    :raises IngesterException: listing every shard that failed
+    """
+    failures = [
+        f"\n\tShard: {shard.index} (rows {shard.start}-{shard.stop}) - Error: {future.exception()}"
+        for shard, future in zip(shards, futures)
+        if future.exception() is not None
+    ]
+    if failures:
+        raise IngesterException(
+            f"Error installing shards. {len(failures)} of {len(shards)} shards failed."
+            + "".join(failures)
+        )
+    return [future.result() for future in futures]
+
+
+class ShardedIngester:  # pylint: disable=too-few-public-methods
+    """
+    Coordinates a sharded ingest job. The whole manifest is validated, then split into shards of at
+    most shard_size entries, each copied by its own Ingester through a ShardExecutor. The files
+    installed by every shard are then indexed and cataloged once, by an Ingester for the whole
+    manifest.
+    """
+
+    def __init__(
+        self,
+        ingester: Ingester,
+        ingest_folder: str,
+        dataset_id: str,
+        manifest_df: pd.DataFrame,
+        executor: ShardExecutor,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+    ) -> None:
+        # pylint: disable=too-many-arguments
+        """
+        :param ingester: Ingester for the whole manifest, used to validate, index & catalog the
+               dataset
+        :param ingest_folder: name of the sub-folder in the ingest bucket that contains the job
+        :param dataset_id: dataset being ingested
+        :param manifest_df: the whole manifest
+        :param executor: installs the shards
+        :param shard_size: maximum number of manifest entries in each shard
+        """
+        if shard_size < 1:
+            raise IngesterException(f"Shard size must be a positive number, got: {shard_size}.")
+
+        self.__ingester = ingester
+        self.__executor = executor
+        self.__manifest_df = manifest_df
+        manifest_size = len(manifest_df)
+        self.__shards = [
+            Shard(
+                ingest_folder=ingest_folder,
+                dataset_id=dataset_id,
+                index=index,
+                start=start,
+                stop=min(start + shard_size, manifest_size),
+            )
+            for index, start in enumerate(range(0, manifest_size, shard_size))
+        ]
+
+    @property
+    def shards(self) -> list[Shard]:
+        """
+        The shards the manifest is split into
+        """
+        return list(self.__shards)
+
+    def execute(self) -> Result:
+        """
+        Install every shard, then index & catalog all the files installed.
+        :return: the results of the ingest
+        """
+        # The whole manifest is validated before any shard is installed, so an invalid entry in one
+        # shard fails the ingest before any other shard has copied files. Shards install without
+        # validating their rows again
+        self.__ingester.validate()
+
+        print(f"Installing {len(self.__shards)} shards.")
+        installed_files = self.__executor.run(self.__shards, self.__manifest_df)
+        return self.__ingester.publish(pd.concat(installed_files, ignore_index=True))
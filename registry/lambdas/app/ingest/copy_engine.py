@@ -0,0 +1,146 @@
+"""
+Server-side copy engine used by the Ingester to install dataset files into a Registry bucket.
+"""
+import functools
+from typing import Callable
+
+import botocore.exceptions
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+from s3transfer.exceptions import TransferNotDoneError
+from s3transfer.subscribers import BaseSubscriber
+
+from ..core.constants import (
+    DEFAULT_COPY_CONCURRENCY,
+    DEFAULT_MULTIPART_CHUNKSIZE,
+    DEFAULT_MULTIPART_THRESHOLD,
+)
+from ..core.exceptions import IngesterException
+from .progress import ProgressReporter
+
+# Errors a failed copy can raise
+_COPY_ERRORS = (
+    botocore.exceptions.BotoCoreError,
+    botocore.exceptions.ClientError,
+    TransferNotDoneError,
+)
+
+
+def get_default_transfer_config() -> TransferConfig:
+    """
+    :return: the TransferConfig an Ingester copies files with when none is provided
+    """
+    return TransferConfig(
+        max_concurrency=DEFAULT_COPY_CONCURRENCY,
+        multipart_threshold=DEFAULT_MULTIPART_THRESHOLD,
+        multipart_chunksize=DEFAULT_MULTIPART_CHUNKSIZE,
+    )
+
+
+class _CopySubscriber(BaseSubscriber):
+    """
+    Supplies the size of the file being copied, so the transfer manager doesn't have to HEAD the
+    source object, and reports the outcome of the copy.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        source: str,
+        on_copied: Callable[[], None] = None,
+        progress: ProgressReporter = None,
+    ):
+        self.__size = size
+        self.__source = source
+        self.__on_copied = on_copied
+        self.__progress = progress
+
+    def on_queued(self, future, **kwargs):
+        future.meta.provide_transfer_size(self.__size)
+
+    def on_done(self, future, **kwargs):
+        try:
+            future.result()
+        except _COPY_ERRORS as error:
+            if self.__progress is not None:
+                self.__progress.failure(f"{self.__source} - Error: {error}")
+            return
+        if self.__progress is not None:
+            self.__progress.update(nbytes=self.__size)
+        if self.__on_copied is not None:
+            self.__on_copied()
+
+
+class CopyEngine:  # pylint: disable=too-few-public-methods
+    """
+    Copies S3 objects between buckets server side (CopyObject, or UploadPartCopy for files at or
+    above the multipart threshold), keeping many copies in flight at once.
+
+    All copies are scheduled on a single transfer manager, so they share one worker pool and the
+    connection pool of the S3 client provided. That client's max_pool_connections should be at
+    least the transfer config's max_concurrency.
+    """
+
+    def __init__(self, s3_client, transfer_config: TransferConfig = None) -> None:
+        """
+        :param s3_client: boto3 S3 client to issue the copies with
+        :param transfer_config: concurrency and multipart settings for the copies. Defaults to
+               get_default_transfer_config()
+        """
+        self.__s3_client = s3_client
+        self.__transfer_config = (
+            get_default_transfer_config() if transfer_config is None else transfer_config
+        )
+
+    def copy(
+        self,
+        source_bucket: str,
+        destination_bucket: str,
+        files: list[tuple[str, str, int]],
+        on_copied: Callable[[str], None] = None,
+        progress: ProgressReporter = None,
+    ) -> None:
+        # pylint: disable=too-many-arguments, too-many-locals
+        """
+        Copy files from the source bucket to the destination bucket, blocking until all the copies
+        have finished.
+        :param source_bucket: name of the S3 bucket to copy from
+        :param destination_bucket: name of the S3 bucket to copy to
+        :param files: source key, destination key and size in bytes of each file to copy
+        :param on_copied: optional function called with the source key of each successful copy, as
+               soon as that copy completes
+        :param progress: optional reporter counting the files and bytes copied, and reporting each
+               copy that failed
+        :raises IngesterException: if any of the copies failed
+        """
+        futures = []
+        with create_transfer_manager(self.__s3_client, self.__transfer_config) as manager:
+            for source_key, destination_key, size in files:
+                notify = None if on_copied is None else functools.partial(on_copied, source_key)
+                subscriber = _CopySubscriber(
+                    size=int(size),
+                    source=f"s3://{source_bucket}/{source_key}",
+                    on_copied=notify,
+                    progress=progress,
+                )
+                futures.append(
+                    manager.copy(
+                        copy_source={"Bucket": source_bucket, "Key": source_key},
+                        bucket=destination_bucket,
+                        key=destination_key,
+                        subscribers=[subscriber],
+                    )
+                )
+
+        # Every copy has completed once the transfer manager shuts down. Gather up any failures
+        failures = list[str]()
+        for (source_key, _, _), future in zip(files, futures):
+            try:
+                future.result()
+            except _COPY_ERRORS as error:
+                failures.append(f"\n\tFile: {source_key} - Error: {error}")
+
+        if failures:
+            raise IngesterException(
+                f"Error copying files. {len(failures)} of {len(files)} copies failed."
+                + "".join(failures)
+            )
@@ -0,0 +1,121 @@
+"""
+Chooses where an ingest job runs: within the Ingester lambda, or - for jobs too large for the
+lambda's 15 minute, memory & /tmp limits - as a job on a batch worker (see app.ingest_batch).
+"""
+from __future__ import annotations
+
+import enum
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable
+
+from ..core.constants import DEFAULT_LAMBDA_MAX_BYTES, DEFAULT_LAMBDA_MAX_ROWS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class Backend(enum.Enum):
+    """
+    Where an ingest job runs
+    """
+
+    # Within an invocation of the Ingester lambda
+    LAMBDA = "LAMBDA"
+
+    # As an AWS Batch job, running app.ingest_batch in a container
+    BATCH = "BATCH"
+
+
+@dataclass
+class JobSize:
+    """
+    The size of an ingest job, summed over the manifests of its datasets
+    """
+
+    # Number of manifest entries
+    rows: int = 0
+
+    # Total size (in bytes) of the files listed
+    bytes: int = 0
+
+    def add(self, manifest_df: pd.DataFrame) -> None:
+        """
+        Add a chunk of a manifest to the job's size
+        """
+        self.rows += len(manifest_df)
+        self.bytes += int(manifest_df["filesize"].sum())
+
+
+def choose_backend(
+    manifests: Iterable[Iterable[pd.DataFrame]],
+    max_rows: int = DEFAULT_LAMBDA_MAX_ROWS,
+    max_bytes: int = DEFAULT_LAMBDA_MAX_BYTES,
+) -> tuple[Backend, JobSize]:
+    """
+    Choose where an ingest job runs from the size of its manifests. Manifests are read a chunk at a
+    time, stopping as soon as the job is known to be too large for the lambda.
+    :param manifests: the chunks of each of the job's manifests
+    :param max_rows: most manifest entries the lambda ingests
+    :param max_bytes: most bytes of files the lambda ingests
+    :return: the backend to run the job on, and the size of the job read to choose it
+    """
+    size = JobSize()
+    for manifest_chunks in manifests:
+        for chunk_df in manifest_chunks:
+            size.add(chunk_df)
+            if size.rows > max_rows or size.bytes > max_bytes:
+                return Backend.BATCH, size
+    return Backend.LAMBDA, size
+
+
+def get_batch_command(ingest_folder: str, options: dict[str, bool]) -> list[str]:
+    """
+    :param ingest_folder: folder in the ingest bucket containing the ingest job
+    :param options: the job's Ingester options, each passed on as a flag when set
+    :return: the command running an ingest job in the batch container
+    """
+    flags = [f"--{option.replace('_', '-')}" for option, value in options.items() if value]
+    return ["python", "-m", "app.ingest_batch", ingest_folder, *flags]
+
+
+class BatchSubmitter:  # pylint: disable=too-few-public-methods
+    """
+    Submits ingest jobs to an AWS Batch job queue, each run by a container of the job definition
+    """
+
+    def __init__(self, batch_client, job_queue: str, job_definition: str) -> None:
+        """
+        :param batch_client: boto3 AWS Batch client
+        :param job_queue: name or ARN of the job queue to submit to
+        :param job_definition: name or ARN of the job definition running the batch container
+        """
+        self.__batch_client = batch_client
+        self.__job_queue = job_queue
+        self.__job_definition = job_definition
+
+    def submit(
+        self, ingest_folder: str, options: dict[str, bool], environment: dict[str, str] = None
+    ) -> dict[str, str]:
+        """
+        Submit an ingest job
+        :param ingest_folder: folder in the ingest bucket containing the ingest job
+        :param options: the job's Ingester options
+        :param environment: environment variables to set in the batch container, in addition to
+               those of the job definition
+        :return: the id & name of the submitted job
+        """
+        # Job names are up to 128 letters, numbers, hyphens & underscores
+        job_name = "ingest-" + re.sub(r"[^A-Za-z0-9_-]", "-", ingest_folder.strip("/"))[:121]
+        container_overrides = {"command": get_batch_command(ingest_folder, options)}
+        if environment:
+            container_overrides["environment"] = [
+                {"name": name, "value": value} for name, value in environment.items()
+            ]
+        response = self.__batch_client.submit_job(
+            jobName=job_name,
+            jobQueue=self.__job_queue,
+            jobDefinition=self.__job_definition,
+            containerOverrides=container_overrides,
+        )
+        return {"job_id": response["jobId"], "job_name": response["jobName"]}
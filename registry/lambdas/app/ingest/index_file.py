@@ -0,0 +1,176 @@
+"""
+Helper methods for reading and writing the yearly index files of a dataset, in each of the
+supported index types.
+"""
+import csv
+import io
+import os
+import tempfile
+from typing import Iterator
+
+import pandas as pd
+
+from ..core.constants import DEFAULT_INDEX_ROW_GROUP_SIZE
+from ..core.imports import lazy_import
+from ..model.dataset import IndexType
+
+# Columns of an index file
+INDEX_COLUMNS = ["startDate", "key", "size"]
+
+
+def get_index_file_extension(indextype: IndexType) -> str:
+    """
+    :return: the file extension of index files of the given type
+    """
+    return "parquet" if indextype == IndexType.PARQUET else "csv"
+
+
+def write_index_file(index_df: pd.DataFrame, indextype: IndexType) -> bytes:
+    """
+    Serialize a year's index.
+    :param index_df: dataframe of the startDate, key & size of each file in the index
+    :param indextype: type of index file to write
+    :return: the contents of the index file
+    """
+    if indextype == IndexType.PARQUET:
+        return _write_parquet(index_df)
+
+    # The header row is written without quotes, per the spec
+    buffer = io.StringIO()
+    buffer.write("# startDate, key, size\n")
+    index_df.to_csv(
+        buffer,
+        header=False,
+        index=False,
+        quoting=csv.QUOTE_ALL,
+        quotechar="'",
+        columns=INDEX_COLUMNS,
+    )
+    return buffer.getvalue().encode("UTF-8")
+
+
+def read_index_file(data, indextype: IndexType) -> pd.DataFrame:
+    """
+    Load a year's index.
+    :param data: file-like object holding the contents of the index file
+    :param indextype: type of the index file
+    :return: dataframe of the startDate (UTC), key & size of each file in the index
+    """
+    if indextype == IndexType.PARQUET:
+        return _read_parquet(data)
+
+    # Skip the unquoted header row
+    index_df = pd.read_csv(
+        data,
+        skiprows=1,
+        header=None,
+        names=INDEX_COLUMNS,
+        quotechar="'",
+        dtype={"key": "string", "size": "int64"},
+    )
+    index_df["startDate"] = pd.to_datetime(index_df["startDate"], utc=True)
+    return index_df
+
+
+class IndexBuilder:
+    """
+    Builds the yearly indexes of a dataset from the files installed a chunk at a time, so a dataset
+    of any size can be indexed without holding all of its installed files in memory. Each chunk's
+    files are spilled to a temporary directory, one partial per year, and each year's partials are
+    only merged when its index is written. The memory needed is that of the dataset's largest
+    year, as a year's index is written as a whole.
+    """
+
+    def __init__(self, spill_dir: str = None) -> None:
+        """
+        :param spill_dir: directory in which to create the temporary directory the partials are
+               spilled to. Defaults to the system's temporary directory
+        """
+        # Removed by close, as the partials are needed long after construction
+        # pylint: disable=consider-using-with
+        self.__temp_dir = tempfile.TemporaryDirectory(prefix="index-", dir=spill_dir)
+
+        # Paths of the partials spilled for each year, in the order added
+        self.__partials = dict[int, list[str]]()
+        self.__files = 0
+
+    @property
+    def files(self) -> int:
+        """
+        Number of files added to the indexes
+        """
+        return self.__files
+
+    def add(self, installed_files: pd.DataFrame) -> None:
+        """
+        Add a chunk of installed files to the indexes of their years.
+        :param installed_files: dataframe of the startDate, key & size of each file installed
+        """
+        years = installed_files["startDate"].dt.year
+        for year, year_df in installed_files.groupby(years, sort=False):
+            partials = self.__partials.setdefault(year, [])
+            path = os.path.join(self.__temp_dir.name, f"{year}-{len(partials):06d}.pkl")
+            year_df[INDEX_COLUMNS].to_pickle(path)
+            partials.append(path)
+        self.__files += len(installed_files)
+
+    def years(self) -> Iterator[tuple[int, pd.DataFrame]]:
+        """
+        :return: iterator over each year and its index, in the order the years were first added.
+                 Only one year's index is held in memory at a time, but all of that year's files
+        """
+        for year, partials in self.__partials.items():
+            yield year, pd.concat([pd.read_pickle(path) for path in partials], ignore_index=True)
+
+    def close(self) -> None:
+        """
+        Remove the spilled partials
+        """
+        self.__temp_dir.cleanup()
+
+
+def _import_pyarrow():
+    """
+    :return: the pyarrow & pyarrow.parquet modules. pyarrow is only required for datasets with
+             Parquet indexes, so it is imported on first use.
+    """
+    required_for = "to read and write Parquet index files"
+    return lazy_import("pyarrow", required_for), lazy_import("pyarrow.parquet", required_for)
+
+
+def _write_parquet(index_df: pd.DataFrame) -> bytes:
+    """
+    Parquet indexes are typed, sorted by startDate and split into row groups of
+    DEFAULT_INDEX_ROW_GROUP_SIZE rows, so readers can skip row groups by their startDate
+    statistics.
+    """
+    pyarrow, parquet = _import_pyarrow()
+    schema = pyarrow.schema(
+        [
+            ("startDate", pyarrow.timestamp("ns", tz="UTC")),
+            ("key", pyarrow.string()),
+            ("size", pyarrow.int64()),
+        ]
+    )
+    table = pyarrow.Table.from_pandas(
+        index_df[INDEX_COLUMNS].sort_values("startDate", kind="stable"),
+        schema=schema,
+        preserve_index=False,
+    )
+    buffer = pyarrow.BufferOutputStream()
+    # Timestamps are stored in microseconds, which every Parquet reader supports
+    parquet.write_table(
+        table,
+        buffer,
+        row_group_size=DEFAULT_INDEX_ROW_GROUP_SIZE,
+        coerce_timestamps="us",
+        allow_truncated_timestamps=True,
+    )
+    return buffer.getvalue().to_pybytes()
+
+
+def _read_parquet(data) -> pd.DataFrame:
+    _, parquet = _import_pyarrow()
+    index_df = parquet.read_table(io.BytesIO(data.read())).to_pandas()
+    index_df["key"] = index_df["key"].astype("string")
+    return index_df
@@ -2,48 +2,68 @@
 Implements the ingest process for the HelioCloud Registry. Responsible for registering new
 Heliophysics datasets within a HelioCloud's Registry.
 """
-import csv
 import datetime
+import functools
+import hashlib
 import os
-from dataclasses import dataclass
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from typing import Callable, Iterable
 
 import boto3
-import botocore.exceptions
+import botocore.config
 import pandas as pd
+from boto3.s3.transfer import TransferConfig
 from boto3.session import Session
 
+from ..core.constants import (
+    DEFAULT_ASYNC_CONCURRENCY,
+    DEFAULT_BATCH_COPY_THRESHOLD,
+    DEFAULT_PROGRESS_INTERVAL,
+    DEFAULT_PROGRESS_PERCENT,
+    DEFAULT_VALIDATION_WORKERS,
+    MAX_DELETE_BATCH_SIZE,
+    VALIDATION_BATCH_SIZE,
+)
 from ..core.exceptions import IngesterException
 from ..catalog.dataset_repository import DataSetRepository
 from ..model.dataset import DataSet, FileType
 from ..aws_utils.s3 import get_bucket_name, get_bucket_subfolder
-
-
-class FileStatus(Enum):
-    """
-    Help describe the status of a file during validation of the manifest.
-    """
-
-    NOT_FOUND = "NOT_FOUND"
-    WRONG_SIZE = "WRONG_SIZE"
-    BAD_EXTENSION = "BAD_EXTENSION"
-    VALID = "VALID"
-
-
-@dataclass
-class Result:
+from .async_storage import AsyncS3Storage, create_async_s3_client
+from .batch_copy import CopyJob, CopyJobRunner, get_destination_key, write_copy_manifest
+from .copy_engine import get_default_transfer_config
+from .index_file import (
+    INDEX_COLUMNS,
+    IndexBuilder,
+    get_index_file_extension,
+    read_index_file,
+    write_index_file,
+)
+from .instrumentation import Instrumentation
+from .journal import IngestJournal
+from .manifest import ManifestSummary
+from .modes import Engine, ValidationMode
+from .progress import ProgressReporter
+from .result import FileStatus, Result
+from .storage import S3Storage, Storage
+
+
+# Extensions of the dataset files that can be ingested, each mapped to its FileType
+_FILE_TYPES = FileType.by_extension()
+
+
+class Phase(Enum):
     """
-    Stores the results of a Ingester run
+    Phases of an ingest that are recorded in the ingest job's journal once complete.
     """
 
-    # Name the dataset in the catalog that was updated with this ingest job
-    dataset_updated: str = ""
-
-    # Number of files - new or updated - contributed to the dataset
-    files_contributed: int = ""
+    INDEXED = "INDEXED"
+    CATALOGED = "CATALOGED"
 
 
-class Ingester:  # pylint: disable=too-few-public-methods, too-many-instance-attributes
+class Ingester:  # pylint: disable=too-many-instance-attributes
     """
     An Ingester instance is used to ingest new or updated datasets into a HelioCloud's Registry,
     making them available in the Registry's public s3 buckets.
@@ -64,10 +84,23 @@ class Ingester:  # pylint: disable=too-few-public-methods, too-many-instance-att
         manifest_df: pd.DataFrame,
         entry_dataset: DataSet,
         ds_repo: DataSetRepository,
-        tmp_dir="/tmp",
+        tmp_dir: str = None,
         session: Session = boto3.session.Session(),
+        validation_workers: int = DEFAULT_VALIDATION_WORKERS,
+        validation_mode: ValidationMode = ValidationMode.HEAD,
+        transfer_config: TransferConfig = None,
+        resumable: bool = False,
+        shard_index: int = None,
+        incremental: bool = False,
+        skip_unchanged: bool = False,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        progress_percent: float = DEFAULT_PROGRESS_PERCENT,
+        storage: Storage = None,
+        engine: Engine = Engine.THREADS,
+        copy_job_runner: CopyJobRunner = None,
+        batch_copy_threshold: int = DEFAULT_BATCH_COPY_THRESHOLD,
     ) -> None:
-        # pylint: disable=too-many-arguments
+        # pylint: disable=too-many-arguments, too-many-locals
         # Reasonable here given the information the ingester needs.
         """
         Initialize a new ingester instance
@@ -76,9 +109,46 @@ class Ingester:  # pylint: disable=too-few-public-methods, too-many-instance-att
         :param manifest_df: dataframe from a loaded manifest file
         :param entry_dataset: dataset instance containing details for this ingest job
         :param ds_repo: dataset repository to place entries into
-        :param tmp_dir: local directory for temp file creation
+        :param tmp_dir: deprecated, and ignored: index files are no longer written to a local
+               directory before being uploaded
         :param session: boto3.Session instance to use
+        :param validation_workers: maximum number of manifest entries validated concurrently
+        :param validation_mode: how files listed in the manifest are checked in the ingest bucket
+        :param transfer_config: copy concurrency & multipart settings used when installing the
+               dataset. Defaults to copy_engine.get_default_transfer_config()
+        :param resumable: if True, progress is journaled to the ingest bucket so a later Ingester
+               run for the same ingest_folder and manifest can resume from the last checkpoint
+        :param shard_index: set when this Ingester only installs one shard of a larger manifest,
+               giving the shard its own journal
+        :param incremental: if True, the files ingested are merged into the dataset's existing
+               index files and catalog entry, instead of replacing them
+        :param skip_unchanged: if True, files already in the destination bucket with the same size
+               and ETag are not copied again. Files copied in parts are always copied again, as
+               their multipart ETags differ from their source's
+        :param progress_interval: minimum seconds between the progress summaries reported while
+               validating, copying and cleaning up files. 0 disables time based summaries
+        :param progress_percent: percentage of the files between progress summaries. 0 disables
+               percentage based summaries
+        :param storage: where the ingest & destination buckets are. Defaults to S3, using a client
+               from the session. Storage provided is not closed by the Ingester, so it can be
+               shared by several Ingesters
+        :param engine: how requests are issued to S3 when the storage is not provided. The asyncio
+               engine requires aiobotocore
+        :param copy_job_runner: runs S3 Batch Operations jobs copying the dataset's files, when
+               there are at least batch_copy_threshold of them to copy. Defaults to the Ingester
+               always copying the files itself
+        :param batch_copy_threshold: smallest number of files copied with a Batch Operations job
         """
+        if tmp_dir is not None:
+            warnings.warn(
+                "The Ingester's tmp_dir parameter is deprecated and ignored.",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+        if validation_workers < 1:
+            raise IngesterException(
+                f"Validation workers must be a positive number, got: {validation_workers}."
+            )
 
         # Name of the S3 bucket the ingest operation will run against
         self.__ingest_bucket = ingest_bucket
@@ -89,6 +159,9 @@ class Ingester:  # pylint: disable=too-few-public-methods, too-many-instance-att
         # Destination on AWS s3 for the ingest
         self.__destination_bucket = get_bucket_name(self.__entry_dataset.index)
 
+        # Prefix in the ingest bucket under which the dataset's files were uploaded
+        self.__upload_prefix = os.path.join(ingest_folder, self.__entry_dataset.dataset_id, "")
+
         # Sub folder in S3/Local file system into which the ingested data set will be copied
         self.__destination_folder = get_bucket_subfolder(self.__entry_dataset.index)
         if not self.__destination_folder.endswith("/"):
@@ -100,11 +173,66 @@ class Ingester:  # pylint: disable=too-few-public-methods, too-many-instance-att
         # Reference to dataset repository
         self.__ds_repo = ds_repo
 
-        # AWS session
-        self.__s3_client = session.client("s3")
+        # Whether this ingest adds to the dataset's existing index files & catalog entry
+        self.__incremental = incremental
+        self.__skip_unchanged = skip_unchanged
+
+        # Size of the worker pool used to validate the manifest, and how it is validated
+        self.__validation_workers = validation_workers
+        self.__validation_mode = validation_mode
+
+        # How often progress is reported during the phases that process every file
+        self.__progress_interval = progress_interval
+        self.__progress_percent = progress_percent
+
+        # Storage of the buckets, by default S3 through a client from the AWS session. The client
+        # is shared by all workers, so its connection pool must be large enough to serve each of
+        # them
+        if transfer_config is None:
+            transfer_config = get_default_transfer_config()
+        self.__max_connections = max(validation_workers, transfer_config.max_concurrency)
+        self.__owns_storage = storage is None
+        if storage is None and engine == Engine.ASYNCIO:
+            storage = AsyncS3Storage(
+                client_factory=functools.partial(
+                    create_async_s3_client, session, DEFAULT_ASYNC_CONCURRENCY
+                ),
+                transfer_config=transfer_config,
+            )
+        elif storage is None:
+            s3_client = session.client(
+                "s3", config=botocore.config.Config(max_pool_connections=self.__max_connections)
+            )
+            storage = S3Storage(s3_client, transfer_config=transfer_config)
+        self.__storage = storage
+
+        # Measures each phase of the ingest, counting the requests made to S3
+        self.__instrumentation = Instrumentation(
+            storage.s3_client if isinstance(storage, (S3Storage, AsyncS3Storage)) else None
+        )
+
+        # Record of the job's progress, persisted in the ingest bucket if the job is resumable.
+        # Shard journals are kept under the job's journal, so they are removed along with it
+        dataset_folder = os.path.join(self.__entry_dataset.dataset_id, "")
+        if shard_index is not None:
+            dataset_folder = os.path.join(dataset_folder, f"shard-{shard_index:05d}", "")
+        journal_prefix = os.path.join(ingest_folder, ".journal", dataset_folder)
+        self.__journal = (
+            IngestJournal(
+                storage=self.__storage,
+                bucket=self.__ingest_bucket,
+                prefix=journal_prefix,
+                fingerprint=Ingester.__fingerprint(manifest_df),
+            )
+            if resumable
+            else IngestJournal()
+        )
 
-        # Temp directory
-        self.__tmp_dir = tmp_dir
+        # Runs S3 Batch Operations jobs copying the dataset's files, their manifests & reports
+        # kept in the ingest bucket until the job completes
+        self.__copy_job_runner = copy_job_runner
+        self.__batch_copy_threshold = batch_copy_threshold
+        self.__batch_copy_prefix = os.path.join(ingest_folder, ".batch-copy", dataset_folder)
 
         # File successfully installed by this Ingester
         self.__installed_files: pd.DataFrame = None
@@ -118,254 +246,632 @@ class Ingester:  # pylint: disable=too-few-public-methods, too-many-instance-att
         location.
         """
         # Check that the file system path is in place
-        try:
-            response = self.__s3_client.head_bucket(Bucket=self.__destination_bucket)
-        except botocore.exceptions.ClientError as client_error:
-            raise IngesterException(client_error) from client_error
-
-        # Need a 200 status code to confirm the bucket is accessible, otherwise return exception
-        status_code = response["ResponseMetadata"]["HTTPStatusCode"]
-        if status_code != 200:
-            raise IngesterException(
-                f"S3 bucket {self.__destination_bucket} is not accessible. Received response :"
-                f"{response}"
-            )
+        self.__storage.check_bucket(self.__destination_bucket)
 
     def __validate_manifest(self) -> None:
         """
         Validate each entry in the manifest data frame, confirming that:
         (a) the listed file is present and accessible
         (b) the file is of the expected size
+        (c) the file has a valid extension
+        (d) the file is only listed once
 
         We validate the WHOLE manifest at this point, so we can deliver a comprehensive analysis
         back to the invoking process (presumably making its way back to a user).
-        """
 
-        # Iterate through the manifest entries, checking that files exists and are the correct size
-        def check_file(row):
-            record = {
-                "status": None,
-                "filename": None,
-            }
+        How files are looked up depends on the Ingester's ValidationMode. Files the journal records
+        as validated by an earlier run of this job are not checked again.
+        """
 
-            # Check that the file exists, has the correct size, and has a correct file extension
-            s3key = os.path.join(self.__ingest_folder, self.__entry_dataset.dataset_id, row.s3key)
-            try:
-                record["filename"] = s3key
-                response = self.__s3_client.head_object(Bucket=self.__ingest_bucket, Key=s3key)
-            except botocore.exceptions.ClientError:
-                # File wasn't found
-                record["status"] = FileStatus.NOT_FOUND.name
-                print(f"File s3://{self.__ingest_bucket}/{s3key} not found.")
-            else:
-                content_length = response["ContentLength"]
-                if row.filesize != content_length:
-                    # File was the wrong size
-                    record["status"] = FileStatus.WRONG_SIZE.name
-                    print(f"Manifest file s3://{self.__ingest_bucket}/{s3key} wrong size.")
-
-                # Get file extension from s3 key
-                filename_split = s3key.rsplit(".", 1)
-                extension = filename_split[-1].lower()
-
-                if not FileType.is_valid_file_type(extension):
-                    record["status"] = (
-                        record["status"] + ", " if record["status"] else ""
-                    ) + FileStatus.BAD_EXTENSION.name
-                    print(f"Manifest file s3://{self.__ingest_bucket}/{s3key} bad extension.")
-
-                if not record["status"]:
-                    record["status"] = FileStatus.VALID.name
-                    print(f"Manifest file s3://{self.__ingest_bucket}/{s3key} validated.")
-            # results of check
-            return record
-
-        # Check all the files in the manifest
-        results = self.__manifest_df.apply(check_file, axis=1, result_type="expand")
+        # Start from the files already validated. Duplicate entries are always checked, so they
+        # are reported
+        source_keys = self.__upload_prefix + self.__manifest_df["s3key"].astype(str)
+        duplicated = self.__manifest_df["s3key"].duplicated(keep=False)
+        results = pd.DataFrame({"status": FileStatus.VALID.name, "filename": source_keys})
+        pending = self.__manifest_df[~source_keys.isin(self.__journal.validated) | duplicated]
+
+        # Check the rest of the files in the manifest. Results are kept in manifest order
+        start = time.perf_counter()
+        progress = self.__progress("validate_manifest", len(pending))
+        if self.__validation_mode == ValidationMode.LIST:
+            checked = self.__check_files_by_listing(pending, duplicated, progress)
+        else:
+            checked = self.__check_files_by_head(pending, duplicated, progress)
+        progress.finish()
+        elapsed = time.perf_counter() - start
+        results.loc[checked.index, ["status", "filename"]] = checked
+
+        # Checkpoint the files found valid
+        self.__journal.checkpoint()
+
+        # Report the validation rate, so the worker pool can be sized appropriately
+        self.__result.files_validated_per_second = len(checked) / elapsed if elapsed > 0 else 0.0
+        print(
+            f"Validated {len(checked)} manifest entries in {elapsed:.2f}s "
+            f"({self.__result.files_validated_per_second:.1f} files/s, "
+            f"{self.__validation_mode.name} mode, {self.__validation_workers} workers). "
+            f"{len(results) - len(checked)} entries were validated previously."
+        )
 
         # If the count of records that are VALID is less than the total records,
         # we've got invalid entries and can't load. Throw an exception with error information
-        valid = results[results["status"] == FileStatus.VALID.name]
-        if valid["status"].count() < results["status"].count():
-            valid_count = valid["status"].count()
-            results_count = results["status"].count()
-
-            results_status_pretty = ""
-
-            for _, row in results.iterrows():
-                results_status_pretty += f"\n\tFile: {row['filename']} - Status: {row['status']}"
-
+        valid_count = int((results["status"] == FileStatus.VALID.name).sum())
+        if valid_count < len(results):
+            results_status_pretty = "".join(
+                "\n\tFile: " + results["filename"] + " - Status: " + results["status"]
+            )
             raise IngesterException(
                 "Error validating manifest entries. Only "
                 + str(valid_count)
                 + " records were valid out of "
-                + str(results_count)
+                + str(len(results))
                 + " files checked."
                 + results_status_pretty
             )
 
-    def __install_dataset(self):
+    def __check_files_by_head(
+        self, manifest_df: pd.DataFrame, duplicated: pd.Series, progress: ProgressReporter
+    ) -> pd.DataFrame:
         """
-        Time to register the data.
+        Look up each manifest entry with its own request (an S3 HEAD request, or a stat of the
+        file).
+
+        Entries are looked up concurrently by the storage, by default on a pool of at most
+        validation_workers threads, as each lookup is dominated by the round trip of its HEAD
+        request. The entries are checked
+        VALIDATION_BATCH_SIZE at a time, checkpointing the journal after each batch.
+        :param manifest_df: the manifest entries to check
+        :param duplicated: True for each entry of the whole manifest whose s3key is listed twice
+        :param progress: reporter for the entries checked
+        :return: dataframe of the status and filename of each manifest entry, indexed as
+                 manifest_df
         """
 
-        # Callback function to print transfer progress
-        def get_copy_callback(source_key, dest_key):
-            source_s3 = f"s3://{self.__ingest_bucket}/{source_key}"
-            dest_s3 = f"s3://{self.__destination_bucket}/{dest_key}"
+        # Only the network I/O is done per file. Files that can't be found have no size
+        checked = [pd.DataFrame(columns=["status", "filename"], dtype=object)]
+        for start in range(0, len(manifest_df), VALIDATION_BATCH_SIZE):
+            batch_df = manifest_df.iloc[start : start + VALIDATION_BATCH_SIZE]
+            filenames = self.__upload_prefix + batch_df["s3key"].astype(str)
+            sizes = self.__storage.get_sizes(
+                self.__ingest_bucket, list(filenames), self.__validation_workers
+            )
+            content_length = pd.Series(
+                [float("nan") if size is None else size for size in sizes],
+                index=batch_df.index,
+                dtype="float64",
+            )
+            statuses = self.__file_statuses(
+                filenames, batch_df["filesize"], content_length, duplicated, progress
+            )
+            self.__journal.maybe_checkpoint()
+            checked.append(statuses)
+        return pd.concat(checked)
 
-            def callback(transferred):
-                print(f"Copied {transferred} of {source_s3} to {dest_s3}")
+    def __check_files_by_listing(
+        self, manifest_df: pd.DataFrame, duplicated: pd.Series, progress: ProgressReporter
+    ) -> pd.DataFrame:
+        """
+        Check the manifest entries against a single listing of the job's upload prefix
+        (ingest_folder/dataset_id/), joining the two on S3 key instead of issuing a HEAD request
+        per file. Each ListObjectsV2 page covers up to 1000 objects.
+        :param manifest_df: the manifest entries to check
+        :param duplicated: True for each entry of the whole manifest whose s3key is listed twice
+        :param progress: reporter for the entries checked
+        :return: dataframe of the status and filename of each manifest entry, indexed as
+                 manifest_df
+        """
+        listing = self.__storage.list_objects(self.__ingest_bucket, self.__upload_prefix)
+
+        # Join the manifest against the listing. Manifest entries missing from the listing don't
+        # exist in the upload
+        filenames = self.__upload_prefix + manifest_df["s3key"].astype(str)
+        content_length = (
+            filenames.to_frame("filename")
+            .merge(listing, on="filename", how="left", validate="many_to_one")["content_length"]
+            .set_axis(manifest_df.index)
+        )
+        return self.__file_statuses(
+            filenames, manifest_df["filesize"], content_length, duplicated, progress
+        )
+
+    def __file_statuses(
+        self,
+        filenames: pd.Series,
+        filesize: pd.Series,
+        content_length: pd.Series,
+        duplicated: pd.Series,
+        progress: ProgressReporter,
+    ) -> pd.DataFrame:
+        # pylint: disable=too-many-arguments
+        """
+        Work out the status of manifest entries from the sizes of their files in the ingest bucket,
+        over all the entries at once. Files that are valid are recorded in the journal.
+        :param filenames: S3 key of each entry's file in the ingest bucket
+        :param filesize: size of each entry's file, per the manifest
+        :param content_length: size of each entry's file in the ingest bucket. NaN if not found
+        :param duplicated: True for each entry of the whole manifest whose s3key is listed twice
+        :param progress: reporter for the entries checked, given the detail of each failure
+        :return: dataframe of the status and filename of each entry, indexed as filenames
+        """
+        found = content_length.notna()
+        extensions = filenames.str.rsplit(".", n=1).str[-1].str.lower()
+
+        # Each failed check adds its name to an entry's status, in this order
+        failed_checks = pd.DataFrame(
+            {
+                FileStatus.NOT_FOUND.name: ~found,
+                FileStatus.WRONG_SIZE.name: found & (content_length != filesize),
+                FileStatus.BAD_EXTENSION.name: found & extensions.map(_FILE_TYPES).isna(),
+                FileStatus.DUPLICATE.name: duplicated.loc[filenames.index],
+            }
+        )
+        status = (
+            failed_checks.dot(failed_checks.columns + ", ")
+            .str.rstrip(", ")
+            .replace("", FileStatus.VALID.name)
+        )
+        valid = status == FileStatus.VALID.name
+        self.__journal.record_validated(filenames[valid])
+
+        # Only report on the files that failed
+        for filename, file_status in zip(filenames[~valid], status[~valid]):
+            progress.failure(f"s3://{self.__ingest_bucket}/{filename} {file_status}")
+        progress.update(count=int(valid.sum()))
+
+        return pd.DataFrame({"status": status.astype(object), "filename": filenames})
+
+    def __find_unchanged_files(self, copies: list[tuple[str, str, int]]) -> pd.Series:
+        """
+        Find the files to be copied that are already in the destination bucket, unchanged. Files
+        are compared by size and ETag, using one listing of the upload prefix and one of the
+        destination folder rather than a request per file.
+
+        A file copied in parts (at or above the multipart threshold) has a multipart ETag (ending
+        in -<number of parts>) in the destination bucket, which never equals the ETag of a source
+        uploaded in one part, nor of one uploaded in parts of another size. Such files can't be
+        found unchanged, so are copied again.
+        :param copies: source key, destination key and size of each file to copy
+        :return: boolean series, True for each copy whose destination is identical to its source
+        """
+        copies_df = pd.DataFrame(copies, columns=["source", "destination", "size"])
+        sources = self.__storage.list_objects(self.__ingest_bucket, self.__upload_prefix)
+        destinations = self.__storage.list_objects(
+            self.__destination_bucket, self.__destination_folder
+        )
+        compared = copies_df.merge(
+            sources.rename(columns={"filename": "source"}),
+            on="source",
+            how="left",
+            validate="many_to_one",
+        ).merge(
+            destinations.rename(columns={"filename": "destination"}),
+            on="destination",
+            how="left",
+            validate="many_to_one",
+            suffixes=("_source", "_destination"),
+        )
+        same_size = compared["content_length_source"] == compared["content_length_destination"]
+        unchanged = (
+            compared["etag_source"].notna()
+            & (compared["etag_source"] == compared["etag_destination"])
+            & same_size
+        )
+
+        # Report the files that may be unchanged, but whose ETags can't show it
+        multipart = (
+            same_size
+            & ~unchanged
+            & compared["etag_destination"].str.contains("-", regex=False, na=False)
+        )
+        if multipart.any():
+            print(
+                f"Copying {int(multipart.sum())} files of the same size as in the destination "
+                "bucket again, as their copies' multipart ETags can't be compared with the source."
+            )
+        return unchanged
 
-            return callback
+    def __install_dataset(self):
+        """
+        Time to register the data.
 
-        # Iterate over the manifest and move the files
+        Files are copied server side by the Ingester's CopyEngine, many at a time. Files the
+        journal records as copied by an earlier run of this job are not copied again, nor, when
+        skipping unchanged files, are files already in the destination bucket.
+        """
+
+        # Checkpoint each file as soon as it has been copied
+        def record_copy(source_key: str):
+            self.__journal.record_copied(source_key)
+            self.__journal.maybe_checkpoint()
+
+        # Work out where each file in the manifest is copied to
+        already_copied = self.__journal.copied
+        copies = list[tuple[str, str, int]]()
         installed_files = list[[str, str, int]]()
         for start_date, uploaded_file, size in self.__manifest_df.to_records(index=False):
             # copy the file over to the destination bucket in the correct sub folder
-            copy_source = {
-                "Bucket": self.__ingest_bucket,
-                "Key": os.path.join(
-                    self.__ingest_folder, self.__entry_dataset.dataset_id, uploaded_file
-                ),
-            }
+            source_key = os.path.join(
+                self.__ingest_folder, self.__entry_dataset.dataset_id, uploaded_file
+            )
 
             # format destination file name to all lowercase and normalize extension
-            filename_split = uploaded_file.rsplit(".", 1)
-            extension = filename_split[-1].lower()
-            destination_file = ".".join([filename_split[0], FileType(extension).value])
-            destination_key = self.__destination_folder + destination_file
-            self.__s3_client.copy(
-                CopySource=copy_source,
-                Bucket=self.__destination_bucket,
-                Key=destination_key,
-                Callback=get_copy_callback(copy_source["Key"], destination_key),
-            )
+            destination_key = get_destination_key(self.__destination_folder, uploaded_file)
+            if source_key not in already_copied:
+                copies.append((source_key, destination_key, size))
 
-            # Final file name in the destination bucket
-            target_file = f"s3://{self.__destination_bucket}/{destination_key}"
+            # Store a record for the registered file, by its final name in the destination bucket
+            installed_files.append(
+                [start_date, f"s3://{self.__destination_bucket}/{destination_key}", size]
+            )
 
-            # Store a record for the registered file
-            installed_files.append([start_date, target_file, size])
+        # Leave out files the destination bucket already has
+        if self.__skip_unchanged and copies:
+            unchanged = self.__find_unchanged_files(copies)
+            self.__result.bytes_skipped = sum(
+                int(size) for (_, _, size), same in zip(copies, unchanged) if same
+            )
+            print(f"Skipping {int(unchanged.sum())} files unchanged in the destination bucket.")
+            copies = [copy for copy, same in zip(copies, unchanged) if not same]
+        self.__result.bytes_copied = sum(int(size) for _, _, size in copies)
+
+        # Move the files
+        print(
+            f"Copying {len(copies)} files. {len(installed_files) - len(copies)} already in place."
+        )
+        progress = self.__progress("install", len(copies))
+        try:
+            if self.__copy_job_runner is not None and len(copies) >= self.__batch_copy_threshold:
+                self.__run_copy_job(copies, record_copy, progress)
+            else:
+                self.__storage.copy(
+                    source_bucket=self.__ingest_bucket,
+                    destination_bucket=self.__destination_bucket,
+                    files=copies,
+                    on_copied=record_copy,
+                    progress=progress,
+                )
+        finally:
+            progress.finish()
+            self.__journal.checkpoint()
 
         # Store a dataframe for the installed files
         self.__installed_files = pd.DataFrame(installed_files, columns=["startDate", "key", "size"])
 
-    def __install_index_files(self) -> None:
+    def __run_copy_job(
+        self,
+        copies: list[tuple[str, str, int]],
+        on_copied: Callable[[str], None],
+        progress: ProgressReporter,
+    ) -> None:
+        """
+        Copy files with an S3 Batch Operations job, rather than from the Ingester. The files the
+        job's completion report lists as copied are recorded as they would be had the Ingester
+        copied them, and the job's manifest & report removed once every file has been copied.
+        :param copies: source key, destination key and size in bytes of each file to copy
+        :param on_copied: called with the source key of each file copied
+        :param progress: reporter counting the files and bytes copied
+        :raises IngesterException: if the job failed, or any of the files were not copied
+        """
+        job = CopyJob(
+            source_bucket=self.__ingest_bucket,
+            source_prefix=self.__upload_prefix,
+            destination_bucket=self.__destination_bucket,
+            destination_folder=self.__destination_folder,
+            manifest_key=self.__batch_copy_prefix + "manifest.csv",
+            report_prefix=self.__batch_copy_prefix + "report",
+        )
+        self.__storage.put_object(
+            self.__ingest_bucket,
+            job.manifest_key,
+            write_copy_manifest(self.__ingest_bucket, [source_key for source_key, _, _ in copies]),
+        )
+        print(f"Copying {len(copies)} files with an S3 Batch Operations job.")
+        results = self.__copy_job_runner.run(job)
+
+        failures = list[str]()
+        for source_key, _, size in copies:
+            copied, message = results.get(source_key, (False, "Missing from the job's report"))
+            if copied:
+                on_copied(source_key)
+                progress.update(nbytes=int(size))
+            else:
+                progress.failure(f"{source_key} - Error: {message}")
+                failures.append(f"\n\tFile: {source_key} - Error: {message}")
+        if failures:
+            raise IngesterException(
+                f"Error copying files. {len(failures)} of {len(copies)} copies failed."
+                + "".join(failures)
+            )
+
+        listing = self.__storage.list_objects(self.__ingest_bucket, self.__batch_copy_prefix)
+        for failure in self.__storage.delete_objects(
+            self.__ingest_bucket, list(listing["filename"])
+        ):
+            print(f"Failed to delete copy job file {failure}")
+
+    def __install_index_files(self, years: Iterable[tuple[int, pd.DataFrame]] = None) -> None:
         """
         Generate one index file for each year of the data being ingested.
         - Index files are deposited in data set destination bucket location,
         per the entries.json provided.
-        - Naming convention is <id>_YYYY.csv
+        - Naming convention is <id>_YYYY.csv, or <id>_YYYY.parquet for datasets with Parquet
+        indexes
+
+        Each year's index is serialized in memory and uploaded directly, in a single pass over
+        the installed files grouped by year. An incremental ingest only rewrites the index files
+        for the years it adds files to, merging the new files into them.
+        :param years: iterable of each year and its installed files. Defaults to the files
+               installed by this Ingester
         """
-
-        # First we need to know the years of data involved
-        def get_year(start_date: datetime.datetime):
-            return start_date.year
-
-        self.__installed_files["year"] = self.__installed_files["startDate"].apply(get_year)
-        years = self.__installed_files["year"].unique()
-
-        # For each year, generate an index file stored in a temporary directory
-        index_files = list[str]()
-        for year in years:
-            # Generate a temp file first
-            index_file = (
-                self.__tmp_dir + "/" + self.__entry_dataset.dataset_id + "_" + str(year) + ".csv"
+        if years is None:
+            years = self.__installed_files.groupby(
+                self.__installed_files["startDate"].dt.year, sort=False
             )
-            tmp_index_file = index_file + ".tmp"
-            year_df = self.__installed_files[self.__installed_files["year"] == year]
-            year_df.to_csv(
-                tmp_index_file,
-                header=False,
-                index=False,
-                quoting=csv.QUOTE_ALL,
-                quotechar="'",
-                columns=["startDate", "key", "size"],
+        indextype = self.__entry_dataset.indextype
+        extension = get_index_file_extension(indextype)
+        for year, year_df in years:
+            key = f"{self.__destination_folder}{self.__entry_dataset.dataset_id}_{year}.{extension}"
+            if self.__incremental:
+                year_df = self.__merge_index_file(key, year_df)
+
+            # Upload the index file to the destination bucket and sub-folder
+            self.__storage.put_object(
+                bucket=self.__destination_bucket,
+                key=key,
+                body=write_index_file(year_df, indextype),
             )
+            print(f"Uploading index file to bucket: {self.__destination_bucket}, key: {key}.")
 
-            # We do this loop to prepend the header row without it being quoted, per the spec
-            with open(tmp_index_file, mode="r", encoding="UTF-8") as t_file:
-                with open(index_file, mode="x", encoding="UTF-8") as i_file:
-                    i_file.write("# startDate, key, size\n")
-                    for line in t_file:
-                        i_file.write(line)
-            os.remove(tmp_index_file)
-            index_files.append(index_file)
-
-        # Upload the index files to the destination bucket and sub-folder
-        for index_file in index_files:
-            key = self.__destination_folder + index_file[index_file.rindex("/") + 1 :]
-            with open(index_file, mode="rb") as data:
-                self.__s3_client.put_object(Bucket=self.__destination_bucket, Key=key, Body=data)
-                print(f"Uploading {index_file} to bucket: {self.__destination_bucket}, key: {key}.")
-            os.remove(index_file)
-
-    def __update_catalog(self):
+    def __merge_index_file(self, key: str, year_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merge installed files into the existing index file for their year, if there is one.
+        Entries in the index for files that were installed again are replaced.
+        :param key: S3 key of the year's index file in the destination bucket
+        :param year_df: the installed files for the year
+        :return: the merged index for the year, sorted by startDate
+        """
+        new_df = year_df[INDEX_COLUMNS].sort_values("startDate", kind="stable")
+        existing = self.__storage.get_object(self.__destination_bucket, key)
+        if existing is None:
+            print(f"No index file at key: {key}. Creating a new one.")
+            return new_df
+
+        existing_df = read_index_file(existing, self.__entry_dataset.indextype)
+        existing_df = existing_df[~existing_df["key"].isin(new_df["key"])]
+        print(
+            f"Merging {len(new_df)} files into {len(existing_df)} entries of index file at key: "
+            f"{key}."
+        )
+        return pd.concat([existing_df, new_df], ignore_index=True).sort_values(
+            "startDate", kind="stable"
+        )
+
+    def __update_catalog(self, summary: ManifestSummary = None):
         """
         Update the catalog database
+        :param summary: the extent of the whole manifest. Defaults to that of this Ingester's
+               manifest
         """
+        if summary is None:
+            summary = ManifestSummary.from_manifest(self.__manifest_df)
+
         # Now update the CatalogEntry that will be made
         # Start date & end date come from the min & max of the manifest
-        start_date = self.__manifest_df["time"].min()
+        start_date = summary.start
 
         # Note:  End date is the min "start time" of the data provided.  Not really the end date....
-        end_date = self.__manifest_df["time"].max()
-        self.__entry_dataset.start = start_date
-        self.__entry_dataset.stop = end_date
+        end_date = summary.stop
 
         # Get the file formats
-        def get_extension(filename: str):
-            return filename.split(".")[-1].lower()
-
-        extensions = self.__manifest_df["s3key"].apply(get_extension).unique()
-        self.__entry_dataset.filetype = [FileType(extension) for extension in extensions]
+        filetypes = [FileType(extension) for extension in summary.extensions]
+
+        # An incremental ingest widens the time range & file formats of the existing catalog entry
+        existing = (
+            self.__ds_repo.get_by_dataset_id(self.__entry_dataset.dataset_id)
+            if self.__incremental
+            else None
+        )
+        if existing is not None:
+            if existing.start is not None:
+                start_date = min(start_date, Ingester.__to_utc(existing.start))
+            if existing.stop is not None:
+                end_date = max(end_date, Ingester.__to_utc(existing.stop))
+            filetypes += [ft for ft in existing.filetype or [] if ft not in filetypes]
+        self.__entry_dataset.start = start_date
+        self.__entry_dataset.stop = end_date
+        self.__entry_dataset.filetype = filetypes
 
         # Save the DataSet and RegisteredFile lists to their repositories
         self.__ds_repo.save([self.__entry_dataset])
 
-    def __clean_up(self) -> None:
+    def __clean_up(self, manifest_chunks: Iterable[pd.DataFrame] = None, total: int = None) -> None:
         """
         Clean up the upload directory.
+
+        Data files are removed in batches of up to MAX_DELETE_BATCH_SIZE keys (one DeleteObjects
+        request in S3), several batches at a time. Keys that could not be deleted are reported in
+        the Result.
+        :param manifest_chunks: the manifest, in one or more chunks. Defaults to this Ingester's
+               manifest
+        :param total: number of files listed in the manifest
         """
+        if manifest_chunks is None:
+            manifest_chunks, total = [self.__manifest_df], len(self.__manifest_df)
+        progress = self.__progress("clean_up", total)
 
         # Delete data files
-        def delete_file(row):
-            key = os.path.join(self.__ingest_folder, self.__entry_dataset.dataset_id, row.s3key)
-            print(f"Deleting key {key}")
-            self.__s3_client.delete_object(Bucket=self.__ingest_bucket, Key=key)
-
-        self.__manifest_df.apply(delete_file, axis=1)
-
-        # clean up
-        self.__s3_client.close()
+        def delete_batch(batch: list[str]) -> list[str]:
+            failures = self.__storage.delete_objects(self.__ingest_bucket, batch)
+            for failure in failures:
+                progress.failure(failure)
+            progress.update(count=len(batch) - len(failures))
+            return failures
+
+        with ThreadPoolExecutor(max_workers=self.__max_connections) as executor:
+            for manifest_df in manifest_chunks:
+                keys = list(self.__upload_prefix + manifest_df["s3key"].astype(str))
+                batches = [
+                    keys[start : start + MAX_DELETE_BATCH_SIZE]
+                    for start in range(0, len(keys), MAX_DELETE_BATCH_SIZE)
+                ]
+                for failures in executor.map(delete_batch, batches):
+                    self.__result.cleanup_failures.extend(failures)
+        progress.finish()
+
+    def __progress(self, phase: str, total: int) -> ProgressReporter:
+        """
+        :return: a reporter for the progress of a phase over total files, reporting at the
+                 Ingester's configured interval & percentage
+        """
+        return ProgressReporter(
+            phase=phase,
+            total=total,
+            interval=self.__progress_interval,
+            percent_step=self.__progress_percent,
+        )
+
+    @staticmethod
+    def __to_utc(value: datetime.datetime) -> pd.Timestamp:
+        """
+        :return: the datetime as a UTC timestamp, assuming naive datetimes are in UTC
+        """
+        timestamp = pd.Timestamp(value)
+        return (
+            timestamp.tz_localize("UTC")
+            if timestamp.tzinfo is None
+            else timestamp.tz_convert("UTC")
+        )
+
+    @staticmethod
+    def __fingerprint(manifest_df: pd.DataFrame) -> str:
+        """
+        :return: a digest identifying the files (keys & sizes) listed in a manifest
+        """
+        hashes = pd.util.hash_pandas_object(manifest_df[["s3key", "filesize"]], index=False)
+        return hashlib.sha256(hashes.values.tobytes()).hexdigest()
 
-    def execute(self) -> Result:
+    def validate(self) -> None:
         """
-        Runs the Ingester instance, ingesting the data from the ingest s3 bucket
-        as described in the manifest file, placing said data into
-        :return:
+        Validates the destination and the files listed in the manifest, without installing them.
+        Used on its own to validate one chunk of a larger manifest.
         """
         # Check that the entry instructions are valid (namely that the destination S3 bucket exists)
-        self.__validate_destination()
+        with self.__instrumentation.phase("validate_destination"):
+            self.__validate_destination()
+
+        # Pick up from where any earlier, interrupted run of this job left off
+        self.__journal.load()
 
         # Validate that each file listed in the manifest is present in the upload path
-        self.__validate_manifest()
+        with self.__instrumentation.phase("validate_manifest"):
+            self.__validate_manifest()
+
+    def install(self, validate: bool = True) -> pd.DataFrame:
+        """
+        Validates the files listed in the manifest and copies them into the destination bucket,
+        without indexing or cataloging them. Used on its own to install one shard of a larger
+        manifest.
+        :param validate: if False, the manifest is taken to have been validated already (see
+               validate)
+        :return: dataframe of the startDate, key & size of each file installed
+        """
+        if validate:
+            self.validate()
+        else:
+            self.__journal.load()
 
         # Register this upload job as a data set (copying files, updating the registry, etc)
-        self.__install_dataset()
+        with self.__instrumentation.phase("install"):
+            self.__install_dataset()
+        return self.__installed_files
+
+    def publish(self, installed_files: pd.DataFrame) -> Result:
+        """
+        Indexes and catalogs the installed files of the whole manifest, then cleans up the upload
+        directory.
+        :param installed_files: the files installed, as returned by install. When the manifest was
+               installed in shards, the files installed by every shard
+        :return: the results of the ingest
+        """
+        return self.__publish(
+            years=installed_files.groupby(installed_files["startDate"].dt.year, sort=False),
+            summary=ManifestSummary.from_manifest(self.__manifest_df),
+            manifest_chunks=lambda: [self.__manifest_df],
+            files_contributed=int(installed_files["key"].count()),
+        )
+
+    def publish_chunks(
+        self,
+        index: IndexBuilder,
+        summary: ManifestSummary,
+        manifest_chunks: Callable[[], Iterable[pd.DataFrame]],
+    ) -> Result:
+        """
+        Indexes and catalogs the installed files of a manifest installed a chunk at a time, then
+        cleans up the upload directory, without ever holding the whole manifest in memory.
+        :param index: the files installed from every chunk
+        :param summary: the extent of the whole manifest
+        :param manifest_chunks: returns the chunks of the whole manifest, read again for clean up
+        :return: the results of the ingest
+        """
+        return self.__publish(
+            years=index.years(),
+            summary=summary,
+            manifest_chunks=manifest_chunks,
+            files_contributed=index.files,
+        )
+
+    def __publish(
+        self,
+        years: Iterable[tuple[int, pd.DataFrame]],
+        summary: ManifestSummary,
+        manifest_chunks: Callable[[], Iterable[pd.DataFrame]],
+        files_contributed: int,
+    ) -> Result:
+        """
+        Index, catalog & clean up after the files installed from the whole manifest.
+        """
+        self.__journal.load()
 
         # Generate & install the index files
-        self.__install_index_files()
+        if not self.__journal.is_complete(Phase.INDEXED.name):
+            with self.__instrumentation.phase("index"):
+                self.__install_index_files(years)
+            self.__journal.record_phase(Phase.INDEXED.name)
+            self.__journal.checkpoint()
 
         # Update the catalog DB
-        self.__update_catalog()
-
-        # Clean up the upload directory
-        self.__clean_up()
+        if not self.__journal.is_complete(Phase.CATALOGED.name):
+            with self.__instrumentation.phase("catalog"):
+                self.__update_catalog(summary)
+            self.__journal.record_phase(Phase.CATALOGED.name)
+            self.__journal.checkpoint()
+
+        # Clean up the upload directory, and the journal now the job is complete
+        with self.__instrumentation.phase("clean_up"):
+            self.__clean_up(manifest_chunks(), summary.files)
+            self.__journal.delete()
+        self.close()
 
         # Send back results
         self.__result.dataset_updated = self.__entry_dataset.dataset_id
-        self.__result.files_contributed = int(self.__installed_files["key"].count())
+        self.__result.files_contributed = files_contributed
+        self.__result.phases = self.__instrumentation.phases
 
         return self.__result
+
+    def close(self) -> None:
+        """
+        Release the Ingester's storage, if the Ingester created it. Called by publish.
+        """
+        self.__instrumentation.close()
+        if self.__owns_storage:
+            self.__storage.close()
+
+    def execute(self) -> Result:
+        """
+        Runs the Ingester instance, ingesting the data from the ingest s3 bucket
+        as described in the manifest file, placing said data into
+        :return:
+        """
+        return self.publish(self.install())
@@ -0,0 +1,123 @@
+"""
+Instrumentation of the phases of an ingest job, to show where an Ingester spends its time.
+"""
+import contextlib
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PhaseMetrics:
+    """
+    Measurements taken over one phase of an ingest job
+    """
+
+    # Name of the phase
+    phase: str = ""
+
+    # Wall time spent in the phase, in seconds
+    seconds: float = 0.0
+
+    # Number of S3 requests made during the phase, by operation (e.g. HeadObject)
+    s3_requests: dict[str, int] = field(default_factory=dict)
+
+    # Number of S3 requests retried during the phase
+    retries: int = 0
+
+    # Peak resident set size of the process by the end of the phase, in bytes
+    peak_rss: int = 0
+
+
+def get_peak_rss() -> int:
+    """
+    :return: the peak resident set size of this process so far, in bytes
+    """
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes, except on macOS
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+class Instrumentation:
+    """
+    Measures each phase of an ingest job. S3 requests are counted through the event hooks of the
+    boto3 S3 client provided, so requests made by every thread using that client are counted. The
+    hooks of an aiobotocore S3 client are the same, so the asyncio engine's requests are counted too.
+    """
+
+    def __init__(self, s3_client=None) -> None:
+        """
+        :param s3_client: boto3 or aiobotocore S3 client to count the requests of. None counts no
+               requests.
+        """
+        # S3 API calls made, by operation, and HTTP requests sent (including retries)
+        self.__lock = threading.Lock()
+        self.__calls = Counter()
+        self.__attempts = 0
+
+        # Measurements of each phase completed
+        self.__phases = list[PhaseMetrics]()
+
+        self.__s3_client = s3_client
+        if s3_client is not None:
+            # Emitted once per API call, and once per HTTP request sent for it
+            s3_client.meta.events.register("before-parameter-build.s3", self.__on_call)
+            s3_client.meta.events.register("before-send.s3", self.__on_send)
+
+    def close(self) -> None:
+        """
+        Stop counting the requests of the S3 client, which may outlive this Instrumentation
+        """
+        if self.__s3_client is not None:
+            self.__s3_client.meta.events.unregister("before-parameter-build.s3", self.__on_call)
+            self.__s3_client.meta.events.unregister("before-send.s3", self.__on_send)
+
+    @property
+    def phases(self) -> list[PhaseMetrics]:
+        """
+        Measurements of each phase completed, in order
+        """
+        return list(self.__phases)
+
+    def __on_call(self, model, **kwargs) -> None:
+        # pylint: disable=unused-argument
+        with self.__lock:
+            self.__calls[model.name] += 1
+
+    def __on_send(self, **kwargs) -> None:
+        # pylint: disable=unused-argument
+        with self.__lock:
+            self.__attempts += 1
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Measure a phase of the ingest job, for the duration of the with block.
+        :param name: name of the phase
+        """
+        with self.__lock:
+            calls, attempts = Counter(self.__calls), self.__attempts
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.__lock:
+                calls = self.__calls - calls
+                attempts = self.__attempts - attempts
+            metrics = PhaseMetrics(
+                phase=name,
+                seconds=seconds,
+                s3_requests=dict(calls),
+                retries=max(attempts - sum(calls.values()), 0),
+                peak_rss=get_peak_rss(),
+            )
+            self.__phases.append(metrics)
+            print(
+                f"Phase {name} took {seconds:.2f}s: {sum(calls.values())} S3 requests "
+                f"{dict(calls)}, {metrics.retries} retries, "
+                f"peak RSS {metrics.peak_rss / (1024 * 1024):.1f} MiB."
+            )
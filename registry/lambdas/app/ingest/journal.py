@@ -0,0 +1,196 @@
+"""
+Journal of an ingest job's progress, allowing an Ingester run that was interrupted (for example by
+the AWS Lambda timeout) to be resumed without repeating completed work.
+"""
+import gzip
+import json
+import threading
+import time
+from typing import Iterable
+
+from ..core.constants import DEFAULT_CHECKPOINT_INTERVAL
+from .storage import Storage
+
+
+class IngestJournal:  # pylint: disable=too-many-instance-attributes
+    """
+    Records the S3 keys an Ingester has validated and copied, and the phases of the ingest it has
+    completed.
+
+    A persistent journal is checkpointed to storage (e.g. S3) as a series of small, gzipped JSON
+    segments under a prefix, each holding only what was recorded since the previous checkpoint,
+    so checkpoint cost doesn't grow with the size of the job. Segments carry a fingerprint of the
+    manifest they were recorded for; segments written for a different manifest are ignored on load.
+
+    A journal created without storage is kept in memory only.
+    """
+
+    def __init__(
+        self,
+        storage: Storage = None,
+        bucket: str = None,
+        prefix: str = None,
+        fingerprint: str = "",
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+    ) -> None:
+        # pylint: disable=too-many-arguments
+        """
+        :param storage: storage to persist the journal in. None keeps it in memory.
+        :param bucket: name of the bucket to persist the journal in
+        :param prefix: prefix (ending in /) to write the journal's segments under
+        :param fingerprint: identifies the manifest being ingested
+        :param checkpoint_interval: minimum number of seconds between checkpoints made by
+               maybe_checkpoint
+        """
+        self.__storage = storage
+        self.__bucket = bucket
+        self.__prefix = prefix
+        self.__fingerprint = fingerprint
+        self.__checkpoint_interval = checkpoint_interval
+
+        # Everything recorded, and what has been recorded since the last checkpoint
+        self.__lock = threading.Lock()
+        self.__validated = set[str]()
+        self.__copied = set[str]()
+        self.__phases = set[str]()
+        self.__pending = IngestJournal.__new_segment()
+
+        # Sequence number of the next segment written & when the last one was written
+        self.__loaded = False
+        self.__next_segment = 0
+        self.__last_checkpoint = time.monotonic()
+
+    @property
+    def persistent(self) -> bool:
+        """
+        True if this journal is checkpointed to storage
+        """
+        return self.__storage is not None
+
+    @property
+    def validated(self) -> set[str]:
+        """
+        S3 keys of the uploaded files found to be valid
+        """
+        with self.__lock:
+            return set(self.__validated)
+
+    @property
+    def copied(self) -> set[str]:
+        """
+        S3 keys of the uploaded files copied into the destination bucket
+        """
+        with self.__lock:
+            return set(self.__copied)
+
+    def is_complete(self, phase: str) -> bool:
+        """
+        :param phase: name of an ingest phase
+        :return: True if the phase has been recorded as complete
+        """
+        with self.__lock:
+            return phase in self.__phases
+
+    def load(self) -> None:
+        """
+        Load any segments previously checkpointed for this journal. Only the first call has any
+        effect.
+        """
+        if not self.persistent or self.__loaded:
+            return
+        self.__loaded = True
+
+        # Segments are stored directly under the prefix
+        listing = self.__storage.list_objects(self.__bucket, self.__prefix, recursive=False)
+        keys = sorted(listing["filename"])
+        for key in keys:
+            body = self.__storage.get_object(self.__bucket, key)
+            if body is None:
+                continue
+            segment = json.loads(gzip.decompress(body.read()))
+            if segment["fingerprint"] != self.__fingerprint:
+                print(f"Ignoring journal segment {self.__bucket}/{key} for another manifest.")
+                continue
+            self.__validated.update(segment["validated"])
+            self.__copied.update(segment["copied"])
+            self.__phases.update(segment["phases"])
+        self.__next_segment = len(keys)
+
+        print(
+            f"Loaded ingest journal {self.__bucket}/{self.__prefix}: "
+            f"{len(self.__validated)} files validated, {len(self.__copied)} files copied, "
+            f"phases complete: {sorted(self.__phases)}."
+        )
+
+    def record_validated(self, keys: Iterable[str]) -> None:
+        """
+        :param keys: S3 keys of uploaded files found to be valid
+        """
+        with self.__lock:
+            new_keys = set(keys) - self.__validated
+            self.__validated.update(new_keys)
+            if self.persistent:
+                self.__pending["validated"].extend(new_keys)
+
+    def record_copied(self, key: str) -> None:
+        """
+        :param key: S3 key of an uploaded file copied to the destination bucket
+        """
+        with self.__lock:
+            if key not in self.__copied:
+                self.__copied.add(key)
+                if self.persistent:
+                    self.__pending["copied"].append(key)
+
+    def record_phase(self, phase: str) -> None:
+        """
+        :param phase: name of an ingest phase that has completed
+        """
+        with self.__lock:
+            if phase not in self.__phases:
+                self.__phases.add(phase)
+                if self.persistent:
+                    self.__pending["phases"].append(phase)
+
+    def maybe_checkpoint(self) -> None:
+        """
+        Checkpoint the journal if at least checkpoint_interval seconds have passed since the last
+        checkpoint.
+        """
+        if time.monotonic() - self.__last_checkpoint >= self.__checkpoint_interval:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """
+        Write everything recorded since the last checkpoint to storage as a new segment.
+        """
+        with self.__lock:
+            self.__last_checkpoint = time.monotonic()
+            segment = self.__pending
+            if not any(segment.values()):
+                return
+            self.__pending = IngestJournal.__new_segment()
+            key = f"{self.__prefix}{self.__next_segment:08d}.json.gz"
+            self.__next_segment += 1
+
+        segment["fingerprint"] = self.__fingerprint
+        self.__storage.put_object(
+            self.__bucket, key, gzip.compress(json.dumps(segment).encode("utf-8"))
+        )
+
+    def delete(self) -> None:
+        """
+        Remove the journal's segments from storage, once the ingest job it tracks has completed.
+        Any other journals stored under this journal's prefix are removed too.
+        """
+        if not self.persistent:
+            return
+
+        listing = self.__storage.list_objects(self.__bucket, self.__prefix)
+        failures = self.__storage.delete_objects(self.__bucket, list(listing["filename"]))
+        for failure in failures:
+            print(f"Failed to delete journal segment {failure}")
+
+    @staticmethod
+    def __new_segment() -> dict[str, list[str]]:
+        return {"validated": [], "copied": [], "phases": []}
@@ -1,27 +1,180 @@
 """
 Helper methods for creating a manifest dataframe.
 """
+import csv
+import gzip
+import io
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterator
 
 import pandas as pd
 
+from ..core.constants import DEFAULT_MANIFEST_CHUNK_SIZE, MANIFEST_EXTENSIONS
 from ..core.exceptions import IngesterException
+from ..core.imports import lazy_import
+
+# Columns a manifest must have, in the order they are returned, and the type of each column
+MANIFEST_COLUMNS = ["time", "s3key", "filesize"]
+MANIFEST_DTYPES = {"time": "datetime64[ns, UTC]", "s3key": "string", "filesize": "int64"}
+
+
+def is_manifest_file(filename: str) -> bool:
+    """
+    :return: True if the file's extension is that of a supported manifest format
+    """
+    return filename.endswith(MANIFEST_EXTENSIONS)
+
+
+@dataclass
+class ManifestSummary:
+    """
+    The extent of a manifest - what the catalog records about the files it lists - accumulated a
+    chunk of the manifest at a time
+    """
+
+    # Number of files listed
+    files: int = 0
+
+    # Earliest & latest start time of the files listed
+    start: pd.Timestamp = None
+    stop: pd.Timestamp = None
+
+    # Extensions (lowercase) of the files listed, in the order first seen
+    extensions: dict[str, None] = field(default_factory=dict)
+
+    def add(self, manifest_df: pd.DataFrame) -> None:
+        """
+        Widen the summary with a chunk of the manifest
+        """
+        if manifest_df.empty:
+            return
+        self.files += len(manifest_df)
+        start, stop = manifest_df["time"].min(), manifest_df["time"].max()
+        self.start = start if self.start is None else min(self.start, start)
+        self.stop = stop if self.stop is None else max(self.stop, stop)
+        extensions = manifest_df["s3key"].astype(str).str.rsplit(".", n=1).str[-1].str.lower()
+        self.extensions.update(dict.fromkeys(extensions.unique()))
+
+    @classmethod
+    def from_manifest(cls, manifest_df: pd.DataFrame) -> "ManifestSummary":
+        """
+        :return: the summary of a whole manifest
+        """
+        summary = cls()
+        summary.add(manifest_df)
+        return summary
 
 
 def get_manifest_from_fs(manifest_file: str) -> pd.DataFrame:
     """
     Constructs a manifest instance from a file on the local filesystem
     """
-    if not manifest_file.endswith(".csv"):
-        raise IngesterException(f"Expecting .csv extension for manifest file: {manifest_file}.")
+    if not is_manifest_file(manifest_file):
+        raise IngesterException(
+            f"Expecting one of the extensions {MANIFEST_EXTENSIONS} for manifest file: "
+            f"{manifest_file}."
+        )
+
+    with open(manifest_file, "rb") as manifest:
+        return read_manifest(manifest, manifest_file)
+
+
+def read_manifest(
+    data: BinaryIO, filename: str = "manifest.csv", chunksize: int = DEFAULT_MANIFEST_CHUNK_SIZE
+) -> pd.DataFrame:
+    """
+    Parse a manifest as it is read, chunksize rows at a time, so only the typed manifest and a
+    single chunk of rows are ever held in memory. Compressed manifests are decompressed as they
+    are read.
+    :param data: binary file-like object to read the manifest from, e.g. the body of an S3 object
+    :param filename: name of the manifest file, whose extension gives its format (see
+           MANIFEST_EXTENSIONS)
+    :param chunksize: number of rows parsed at a time
+    :return: the manifest's time (UTC), s3key & filesize columns
+    """
+    return _concat(list(iter_manifest(data, filename, chunksize)))
+
+
+def iter_manifest(
+    data: BinaryIO, filename: str = "manifest.csv", chunksize: int = DEFAULT_MANIFEST_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Parse a manifest as it is read, yielding it chunksize rows at a time, so a manifest of any
+    length can be processed without ever holding more than one chunk of it in memory.
+    :param data: binary file-like object to read the manifest from, e.g. the body of an S3 object
+    :param filename: name of the manifest file, whose extension gives its format (see
+           MANIFEST_EXTENSIONS)
+    :param chunksize: number of rows in each chunk
+    :return: iterator over the chunks of the manifest's time (UTC), s3key & filesize columns, each
+             indexed by the position of its rows in the whole manifest
+    """
+    if filename.endswith(".parquet"):
+        return _read_parquet(data, chunksize)
+    if filename.endswith(".gz"):
+        data = gzip.GzipFile(fileobj=data, mode="rb")
+    elif filename.endswith(".zst"):
+        zstandard = lazy_import("zstandard", "to read zstd compressed manifest files")
+        data = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(data))
+    return _read_csv(data, chunksize)
 
-    # Read the manifest in line by line
-    manifest_lines = []
-    with open(manifest_file, encoding="UTF-8") as manifest:
-        for line in manifest:
-            manifest_lines.append(line.strip().split(","))
 
-    # Hand it off to build the manifest Dataframe
-    return build_manifest_df(manifest_lines)
+def _read_csv(data: BinaryIO, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    CSV manifests are parsed by pandas chunksize rows at a time, typed as they are parsed.
+    """
+    # The header's column names may be prefixed with # and padded with spaces
+    header = data.readline().decode("UTF-8")
+    columns = [column.replace("#", "").strip() for column in next(csv.reader([header]), [])]
+    _check_columns(columns)
+
+    try:
+        reader = pd.read_csv(
+            data,
+            header=None,
+            names=columns,
+            usecols=MANIFEST_COLUMNS,
+            dtype={"time": "string", "s3key": "string", "filesize": "int64"},
+            chunksize=chunksize,
+            encoding="UTF-8",
+        )
+        for chunk in reader:
+            yield chunk.assign(time=pd.to_datetime(chunk["time"], utc=True))[MANIFEST_COLUMNS]
+    except pd.errors.EmptyDataError:
+        return
+    except (ValueError, OSError, pd.errors.ParserError) as ex:
+        raise IngesterException(str(ex)) from ex
+
+
+def _read_parquet(data: BinaryIO, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Parquet manifests are read chunksize rows at a time. The (compressed) file is read into memory
+    first, as Parquet readers need to seek.
+    """
+    parquet = lazy_import("pyarrow.parquet", "to read Parquet manifest files")
+    try:
+        manifest = parquet.ParquetFile(io.BytesIO(data.read()))
+        _check_columns(manifest.schema_arrow.names)
+        start = 0
+        for batch in manifest.iter_batches(batch_size=chunksize, columns=MANIFEST_COLUMNS):
+            chunk = (
+                batch.to_pandas()
+                .astype({"s3key": "string", "filesize": "int64"})
+                .assign(time=lambda chunk: pd.to_datetime(chunk["time"], utc=True))
+                .set_axis(pd.RangeIndex(start, start + batch.num_rows))
+            )
+            start += batch.num_rows
+            yield chunk[MANIFEST_COLUMNS]
+    except (ValueError, TypeError, OSError) as ex:
+        raise IngesterException(str(ex)) from ex
+
+
+def _concat(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    :return: the chunks of a manifest as a single dataframe
+    """
+    if not chunks:
+        return pd.DataFrame(columns=MANIFEST_COLUMNS).astype(MANIFEST_DTYPES)
+    return pd.concat(chunks, ignore_index=True)
 
 
 def build_manifest_df(manifest: list[list[str]]) -> pd.DataFrame:
@@ -33,19 +186,22 @@ def build_manifest_df(manifest: list[list[str]]) -> pd.DataFrame:
     manifest_df = pd.DataFrame(columns=columns, data=manifest[1:])
 
     # Validate the manifest structure
-    required_headers = ["time", "s3key", "filesize"]
-    # First, confirm all required headers are present
-    if not all(header in manifest_df.columns for header in required_headers):
-        raise IngesterException(
-            "Manifest file is missing one of the required headers: " + str(required_headers) + "."
-        )
+    _check_columns(columns)
 
     # Check data types of manifest and cast appropriately
     try:
-        manifest_df = manifest_df.astype(
-            dtype={"time": "datetime64[ns, UTC]", "s3key": "string", "filesize": "int64"}
-        )
+        manifest_df = manifest_df.astype(dtype=MANIFEST_DTYPES)
     except ValueError as ex:
         raise IngesterException(str(ex)) from ex
 
     return manifest_df
+
+
+def _check_columns(columns: list[str]) -> None:
+    """
+    Confirm all the required headers are present in a manifest's header.
+    """
+    if not all(header in columns for header in MANIFEST_COLUMNS):
+        raise IngesterException(
+            "Manifest file is missing one of the required headers: " + str(MANIFEST_COLUMNS) + "."
+        )
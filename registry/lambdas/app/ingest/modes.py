@@ -0,0 +1,33 @@
+"""
+How an ingest runs: the validation modes and engines of Ingesters, apart from the Ingester so that
+the Ingester lambda can choose an engine without importing pandas.
+"""
+from enum import Enum
+
+
+class ValidationMode(Enum):
+    """
+    How an Ingester checks the files listed in a manifest are present in the ingest bucket.
+    """
+
+    # One S3 HEAD request per manifest entry
+    HEAD = "HEAD"
+
+    # One paginated listing of the job's upload prefix, joined against the manifest
+    LIST = "LIST"
+
+
+class Engine(Enum):
+    """
+    How an Ingester issues its requests to S3.
+    """
+
+    # From pools of threads, one request per thread at a time
+    THREADS = "THREADS"
+
+    # From a single asyncio event loop, through an aiobotocore client
+    ASYNCIO = "ASYNCIO"
+
+    # From pools of threads, by a ColumnarIngester (see ingest.columnar) for the jobs it can run,
+    # which are never resumable
+    COLUMNAR = "COLUMNAR"
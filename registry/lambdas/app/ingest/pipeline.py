@@ -0,0 +1,127 @@
+"""
+Runs an ingest job a chunk of its manifest at a time, so that a manifest of any length can be
+ingested without holding all of its rows in memory. Memory still grows with the manifest's length,
+by a 64-bit hash per key, and with the files of its largest year when the dataset is indexed.
+"""
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..core.exceptions import IngesterException
+from .index_file import IndexBuilder
+from .ingester import Ingester, Result
+from .manifest import MANIFEST_COLUMNS, MANIFEST_DTYPES, ManifestSummary
+
+
+class ChunkedIngester:  # pylint: disable=too-few-public-methods
+    """
+    Coordinates a chunked ingest job. The manifest is read a chunk at a time, each chunk validated
+    then installed by its own Ingester, with only one chunk's rows held in memory at a time:
+    - every chunk is validated before any is installed, so an invalid manifest installs nothing.
+      Keys listed in more than one chunk are found from a 64-bit hash of each key, all of which
+      are held in memory: 8 bytes per key, so 80 MB for a manifest of 10 million files
+    - the files installed from each chunk are added to an IndexBuilder, which spills them to
+      disk, and to a ManifestSummary for the catalog. Each year's index is read back in full
+      when it is written
+    - the dataset is then indexed, cataloged & cleaned up by an Ingester for the first chunk,
+      reading the manifest again to clean up
+
+    Each chunk's Ingester is given the chunk's index as its shard_index, so a resumable job keeps
+    a journal per chunk.
+    """
+
+    def __init__(
+        self,
+        create_ingester: Callable[[pd.DataFrame, Optional[int]], Ingester],
+        manifest_chunks: Callable[[], Iterable[pd.DataFrame]],
+        spill_dir: str = None,
+    ) -> None:
+        """
+        :param create_ingester: returns an Ingester for a chunk of the manifest and the chunk's
+               index, or for indexing & cataloging the whole dataset when the index is None
+        :param manifest_chunks: returns the chunks of the manifest, reading it from the start
+        :param spill_dir: directory the installed files are spilled to until the dataset is
+               indexed. Defaults to the system's temporary directory
+        """
+        self.__create_ingester = create_ingester
+        self.__manifest_chunks = manifest_chunks
+        self.__spill_dir = spill_dir
+
+    def __validate(self) -> None:
+        """
+        Validate every chunk of the manifest, raising a single error for all the chunks found
+        invalid.
+        """
+        failures, hashes, chunks = [], [], 0
+        for index, chunk_df in enumerate(self.__manifest_chunks()):
+            chunks += 1
+            hashes.append(np.unique(pd.util.hash_pandas_object(chunk_df["s3key"], index=False)))
+            ingester = self.__create_ingester(chunk_df, index)
+            try:
+                ingester.validate()
+            except IngesterException as ex:
+                failures.append(
+                    f"\n\tChunk: {index} (rows {chunk_df.index[0]}-{chunk_df.index[-1] + 1}) - "
+                    f"Error: {ex.message}"
+                )
+            finally:
+                ingester.close()
+
+        # Keys listed twice in the same chunk are reported by that chunk's Ingester
+        hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype="uint64")
+        values, counts = np.unique(hashes, return_counts=True)
+        failures += self.__find_duplicates(set(values[counts > 1]))
+        if failures:
+            raise IngesterException(
+                f"Error validating manifest entries in {chunks} chunks." + "".join(failures)
+            )
+
+    def __find_duplicates(self, duplicated_hashes: set) -> list[str]:
+        """
+        :param duplicated_hashes: hashes of the keys found in more than one chunk
+        :return: a failure for each key listed in more than one chunk. Only read the manifest
+                 again if there are any, to look up the keys hashed
+        """
+        if not duplicated_hashes:
+            return []
+        chunks_listing = Counter()
+        for chunk_df in self.__manifest_chunks():
+            hashes = pd.util.hash_pandas_object(chunk_df["s3key"], index=False)
+            chunks_listing.update(set(chunk_df["s3key"][hashes.isin(duplicated_hashes)]))
+        return [
+            f"\n\tFile: {key} - Status: DUPLICATE"
+            for key, count in chunks_listing.items()
+            if count > 1
+        ]
+
+    def execute(self) -> Result:
+        """
+        Validate & install every chunk, then index & catalog all the files installed.
+        :return: the results of the ingest
+        """
+        self.__validate()
+
+        index = IndexBuilder(spill_dir=self.__spill_dir)
+        summary = ManifestSummary()
+        first_chunk = None
+        try:
+            for chunk_index, chunk_df in enumerate(self.__manifest_chunks()):
+                print(f"Installing chunk {chunk_index} of {len(chunk_df)} files.")
+                if first_chunk is None:
+                    first_chunk = chunk_df
+                ingester = self.__create_ingester(chunk_df, chunk_index)
+                try:
+                    index.add(ingester.install(validate=False))
+                finally:
+                    ingester.close()
+                summary.add(chunk_df)
+
+            if first_chunk is None:
+                first_chunk = pd.DataFrame(columns=MANIFEST_COLUMNS).astype(MANIFEST_DTYPES)
+            return self.__create_ingester(first_chunk, None).publish_chunks(
+                index, summary, self.__manifest_chunks
+            )
+        finally:
+            index.close()
@@ -0,0 +1,135 @@
+"""
+Progress reporting for the long-running phases of an ingest job.
+"""
+import json
+import threading
+import time
+
+from ..core.constants import DEFAULT_PROGRESS_INTERVAL, DEFAULT_PROGRESS_PERCENT
+
+
+class ProgressReporter:  # pylint: disable=too-many-instance-attributes
+    """
+    Counts the files processed by a phase of an ingest job in memory, and periodically prints a
+    structured (JSON) summary line: at most once every interval seconds or every percent_step
+    percent of the phase's files, whichever comes first, and once more when the phase finishes.
+
+    Only failures are reported file by file. Safe to use from multiple threads.
+    """
+
+    def __init__(
+        self,
+        phase: str,
+        total: int,
+        interval: float = DEFAULT_PROGRESS_INTERVAL,
+        percent_step: float = DEFAULT_PROGRESS_PERCENT,
+    ) -> None:
+        """
+        :param phase: name of the phase of the ingest job being reported on
+        :param total: number of files the phase will process
+        :param interval: seconds between summaries. 0 disables time based summaries
+        :param percent_step: percentage of the total files between summaries. 0 disables
+               percentage based summaries
+        """
+        self.__phase = phase
+        self.__total = total
+        self.__interval = interval
+        self.__percent_step = percent_step
+
+        # Counters for the phase
+        self.__lock = threading.Lock()
+        self.__done = 0
+        self.__failed = 0
+        self.__bytes = 0
+
+        # When the phase started, and the point at which the last summary was reported
+        self.__start = time.monotonic()
+        self.__last_time = self.__start
+        self.__last_percent = 0.0
+
+    @property
+    def done(self) -> int:
+        """
+        Number of files processed so far, including failures
+        """
+        with self.__lock:
+            return self.__done
+
+    @property
+    def failed(self) -> int:
+        """
+        Number of files that failed so far
+        """
+        with self.__lock:
+            return self.__failed
+
+    def update(self, count: int = 1, nbytes: int = 0) -> None:
+        """
+        Record files processed successfully.
+        :param count: number of files processed
+        :param nbytes: number of bytes processed for them
+        """
+        with self.__lock:
+            self.__done += count
+            self.__bytes += nbytes
+            summary = self.__summary() if self.__due() else None
+        if summary is not None:
+            print(summary)
+
+    def failure(self, detail: str, count: int = 1) -> None:
+        """
+        Record, and report, files that failed.
+        :param detail: description of the failure, naming the file(s)
+        :param count: number of files that failed
+        """
+        print(
+            json.dumps({"event": "failure", "phase": self.__phase, "detail": detail}, default=str)
+        )
+        with self.__lock:
+            self.__done += count
+            self.__failed += count
+            summary = self.__summary() if self.__due() else None
+        if summary is not None:
+            print(summary)
+
+    def finish(self) -> None:
+        """
+        Report the final summary of the phase.
+        """
+        with self.__lock:
+            summary = self.__summary(final=True)
+        print(summary)
+
+    def __due(self) -> bool:
+        """
+        :return: True if a summary should be reported now. Must be called holding the lock
+        """
+        now = time.monotonic()
+        percent = 100.0 * self.__done / self.__total if self.__total else 100.0
+        due = (self.__interval > 0 and now - self.__last_time >= self.__interval) or (
+            self.__percent_step > 0 and percent - self.__last_percent >= self.__percent_step
+        )
+        if due:
+            self.__last_time = now
+            self.__last_percent = percent
+        return due
+
+    def __summary(self, final: bool = False) -> str:
+        """
+        :return: a summary of the progress so far, as a line of JSON. Must be called holding the
+                 lock
+        """
+        elapsed = time.monotonic() - self.__start
+        return json.dumps(
+            {
+                "event": "complete" if final else "progress",
+                "phase": self.__phase,
+                "done": self.__done,
+                "total": self.__total,
+                "failed": self.__failed,
+                "bytes": self.__bytes,
+                "percent": round(100.0 * self.__done / self.__total, 1) if self.__total else 100.0,
+                "elapsed_seconds": round(elapsed, 2),
+                "files_per_second": round(self.__done / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+        )
@@ -0,0 +1,48 @@
+"""
+What an ingest reports: the status of each file validated, and the results of the run. Shared by
+the Ingester and the pandas-free ingest core.
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+
+from .instrumentation import PhaseMetrics
+
+
+class FileStatus(Enum):
+    """
+    Help describe the status of a file during validation of the manifest.
+    """
+
+    NOT_FOUND = "NOT_FOUND"
+    WRONG_SIZE = "WRONG_SIZE"
+    BAD_EXTENSION = "BAD_EXTENSION"
+    DUPLICATE = "DUPLICATE"
+    VALID = "VALID"
+
+
+@dataclass
+class Result:
+    """
+    Stores the results of a Ingester run
+    """
+
+    # Name the dataset in the catalog that was updated with this ingest job
+    dataset_updated: str = ""
+
+    # Number of files - new or updated - contributed to the dataset
+    files_contributed: int = ""
+
+    # Rate at which manifest entries were validated, in files per second
+    files_validated_per_second: float = 0.0
+
+    # Uploaded files that could not be removed from the ingest bucket once the job completed, each
+    # with the reason why
+    cleanup_failures: list[str] = field(default_factory=list)
+
+    # Bytes copied into the destination bucket, and bytes not copied as identical files were
+    # already there
+    bytes_copied: int = 0
+    bytes_skipped: int = 0
+
+    # Measurements of each phase of the ingest run by this Ingester
+    phases: list[PhaseMetrics] = field(default_factory=list)
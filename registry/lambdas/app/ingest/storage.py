@@ -0,0 +1,477 @@
+"""
+Storage backends an Ingester reads uploaded files from and installs datasets into: AWS S3, or a
+POSIX filesystem.
+
+Only listings are returned as dataframes, so pandas is imported when objects are first listed: the
+pandas-free ingest core (see columnar.py) never lists objects.
+"""
+from __future__ import annotations
+
+import errno
+import functools
+import io
+import os
+import shutil
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, BinaryIO, Callable, Optional
+
+import botocore.exceptions
+from boto3.s3.transfer import TransferConfig
+
+from ..core.constants import DEFAULT_COPY_CONCURRENCY, MAX_DELETE_BATCH_SIZE
+from ..core.exceptions import IngesterException
+from ..core.imports import lazy_import
+from .copy_engine import CopyEngine
+from .progress import ProgressReporter
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Columns of an object listing
+LISTING_COLUMNS = ["filename", "content_length", "etag"]
+
+
+class Storage(ABC):
+    """
+    A store of objects, addressed by bucket and key. A bucket is an S3 bucket, or a top level
+    directory of a filesystem, matching the bucket name of s3:// and file:// paths respectively
+    (see aws_utils.s3.get_bucket_name).
+    """
+
+    @abstractmethod
+    def check_bucket(self, bucket: str) -> None:
+        """
+        :param bucket: name of a bucket
+        :raises IngesterException: if the bucket is not accessible
+        """
+
+    @abstractmethod
+    def get_size(self, bucket: str, key: str) -> Optional[int]:
+        """
+        :return: the size of an object in bytes, or None if it can't be found
+        """
+
+    def get_sizes(self, bucket: str, keys: list[str], max_workers: int) -> list[Optional[int]]:
+        """
+        Look up the sizes of many objects at once, by default with get_size on a pool of threads.
+        :param bucket: name of the bucket
+        :param keys: keys of the objects
+        :param max_workers: maximum number of objects looked up concurrently
+        :return: the size of each object in bytes, or None if it can't be found
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(functools.partial(self.get_size, bucket), keys))
+
+    @abstractmethod
+    def list_objects(self, bucket: str, prefix: str, recursive: bool = True) -> pd.DataFrame:
+        """
+        List the objects under a prefix of a bucket.
+        :param bucket: name of the bucket to list
+        :param prefix: prefix in the bucket to list
+        :param recursive: if False, objects further down the key hierarchy than the last / of the
+               prefix are not listed
+        :return: dataframe of the filename (key), content_length and etag of each object. Objects
+                 with the same etag and content_length have the same contents
+        """
+
+    @abstractmethod
+    def copy(
+        self,
+        source_bucket: str,
+        destination_bucket: str,
+        files: list[tuple[str, str, int]],
+        on_copied: Callable[[str], None] = None,
+        progress: ProgressReporter = None,
+    ) -> None:
+        # pylint: disable=too-many-arguments
+        """
+        Copy files between buckets, blocking until all the copies have finished.
+        :param source_bucket: name of the bucket to copy from
+        :param destination_bucket: name of the bucket to copy to
+        :param files: source key, destination key and size in bytes of each file to copy
+        :param on_copied: optional function called with the source key of each successful copy
+        :param progress: optional reporter counting the files and bytes copied
+        :raises IngesterException: if any of the copies failed
+        """
+
+    @abstractmethod
+    def put_object(self, bucket: str, key: str, body: bytes) -> None:
+        """
+        Write an object, replacing any object already at the key.
+        """
+
+    @abstractmethod
+    def get_object(self, bucket: str, key: str) -> Optional[BinaryIO]:
+        """
+        :return: the contents of an object, or None if there is no object at the key
+        :raises IngesterException: if the object exists but can't be read
+        """
+
+    @abstractmethod
+    def delete_objects(self, bucket: str, keys: list[str]) -> list[str]:
+        """
+        Delete objects. Keys that don't exist are not an error.
+        :return: each key that could not be deleted, with the reason why
+        """
+
+    def close(self) -> None:
+        """
+        Release any resources held by the storage.
+        """
+
+
+def check_head_bucket_response(bucket: str, response: dict) -> None:
+    """
+    :param bucket: name of an S3 bucket
+    :param response: response to a HeadBucket request for the bucket
+    :raises IngesterException: if the response shows the bucket is not accessible
+    """
+    # Need a 200 status code to confirm the bucket is accessible, otherwise return exception
+    status_code = response["ResponseMetadata"]["HTTPStatusCode"]
+    if status_code != 200:
+        raise IngesterException(
+            f"S3 bucket {bucket} is not accessible. Received response :{response}"
+        )
+
+
+class S3Storage(Storage):
+    """
+    Storage in AWS S3. Files are copied between buckets server side by a CopyEngine.
+    """
+
+    def __init__(self, s3_client, transfer_config: TransferConfig = None) -> None:
+        """
+        :param s3_client: boto3 S3 client to use. Its max_pool_connections should be at least the
+               number of threads using the storage at once
+        :param transfer_config: concurrency and multipart settings for copies
+        """
+        self.__s3_client = s3_client
+        self.__copy_engine = CopyEngine(s3_client, transfer_config=transfer_config)
+
+    @property
+    def s3_client(self):
+        """
+        The boto3 S3 client used
+        """
+        return self.__s3_client
+
+    def check_bucket(self, bucket: str) -> None:
+        try:
+            response = self.__s3_client.head_bucket(Bucket=bucket)
+        except botocore.exceptions.ClientError as client_error:
+            raise IngesterException(client_error) from client_error
+        check_head_bucket_response(bucket, response)
+
+    def get_size(self, bucket: str, key: str) -> Optional[int]:
+        try:
+            response = self.__s3_client.head_object(Bucket=bucket, Key=key)
+        except botocore.exceptions.ClientError:
+            return None
+        return response["ContentLength"]
+
+    def list_objects(self, bucket: str, prefix: str, recursive: bool = True) -> pd.DataFrame:
+        keys, sizes, etags = list[str](), list[int](), list[str]()
+        params = {"Bucket": bucket, "Prefix": prefix}
+        if not recursive:
+            params["Delimiter"] = "/"
+        for page in self.__s3_client.get_paginator("list_objects_v2").paginate(**params):
+            for content in page.get("Contents", []):
+                keys.append(content["Key"])
+                sizes.append(content.get("Size"))
+                etags.append(content.get("ETag"))
+        return lazy_import("pandas").DataFrame(
+            {"filename": keys, "content_length": sizes, "etag": etags}
+        )
+
+    def copy(
+        self,
+        source_bucket: str,
+        destination_bucket: str,
+        files: list[tuple[str, str, int]],
+        on_copied: Callable[[str], None] = None,
+        progress: ProgressReporter = None,
+    ) -> None:
+        # pylint: disable=too-many-arguments
+        self.__copy_engine.copy(
+            source_bucket=source_bucket,
+            destination_bucket=destination_bucket,
+            files=files,
+            on_copied=on_copied,
+            progress=progress,
+        )
+
+    def put_object(self, bucket: str, key: str, body: bytes) -> None:
+        self.__s3_client.put_object(Bucket=bucket, Key=key, Body=body)
+
+    def get_object(self, bucket: str, key: str) -> Optional[BinaryIO]:
+        try:
+            response = self.__s3_client.get_object(Bucket=bucket, Key=key)
+        except botocore.exceptions.ClientError as client_error:
+            if client_error.response.get("Error", {}).get("Code") != "NoSuchKey":
+                raise IngesterException(client_error) from client_error
+            return None
+        return response["Body"]
+
+    def delete_objects(self, bucket: str, keys: list[str]) -> list[str]:
+        failures = list[str]()
+        for start in range(0, len(keys), MAX_DELETE_BATCH_SIZE):
+            batch = keys[start : start + MAX_DELETE_BATCH_SIZE]
+            # Only the keys that failed are returned in quiet mode
+            try:
+                response = self.__s3_client.delete_objects(
+                    Bucket=bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+            except botocore.exceptions.ClientError as client_error:
+                failures.extend(f"{key} - Error: {client_error}" for key in batch)
+                continue
+            failures.extend(
+                f"{error['Key']} - Error: {error.get('Code')} {error.get('Message')}"
+                for error in response.get("Errors", [])
+            )
+        return failures
+
+    def close(self) -> None:
+        self.__s3_client.close()
+
+
+class FileSystemStorage(Storage):
+    """
+    Storage on a POSIX filesystem, with each bucket a directory under a root directory.
+
+    Installing a file doesn't copy its data when it can be avoided. In order of preference a file
+    is installed as:
+    - a hardlink to the uploaded file (unless disabled), sharing its inode
+    - a reflink (copy on write clone) of the uploaded file, on filesystems that support them
+    - a copy made within the kernel with copy_file_range
+    - a plain copy
+    The first three only touch the filesystem's metadata when the source and destination are on
+    the same filesystem. Objects are written atomically, by renaming a temporary file into place.
+    """
+
+    def __init__(
+        self,
+        root: str = "/",
+        hardlink: bool = True,
+        max_workers: int = DEFAULT_COPY_CONCURRENCY,
+    ) -> None:
+        """
+        :param root: directory holding the buckets. With the default, file://data/MMS is the
+               directory /data/MMS
+        :param hardlink: if False, installed files never share an inode with the uploaded file,
+               so changing one can't change the other
+        :param max_workers: maximum number of files installed concurrently
+        """
+        self.__root = root
+        self.__hardlink = hardlink
+        self.__max_workers = max_workers
+
+    def __path(self, bucket: str, key: str = "") -> str:
+        return os.path.join(self.__root, bucket, key)
+
+    def check_bucket(self, bucket: str) -> None:
+        path = self.__path(bucket)
+        if not os.path.isdir(path) or not os.access(path, os.R_OK | os.W_OK | os.X_OK):
+            raise IngesterException(f"Directory {path} is not accessible.")
+
+    def get_size(self, bucket: str, key: str) -> Optional[int]:
+        try:
+            return os.stat(self.__path(bucket, key)).st_size
+        except FileNotFoundError:
+            return None
+
+    def list_objects(self, bucket: str, prefix: str, recursive: bool = True) -> pd.DataFrame:
+        bucket_path = self.__path(bucket)
+        directory = os.path.dirname(self.__path(bucket, prefix))
+        rows = list[tuple[str, int, str]]()
+        for dirpath, dirnames, filenames in os.walk(directory):
+            if not recursive:
+                dirnames.clear()
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                key = os.path.relpath(path, bucket_path)
+                if key.startswith(prefix):
+                    stat = os.stat(path)
+                    rows.append((key, stat.st_size, FileSystemStorage.__etag(stat)))
+        return (
+            lazy_import("pandas")
+            .DataFrame(rows, columns=LISTING_COLUMNS)
+            .sort_values("filename", kind="stable")
+        )
+
+    @staticmethod
+    def __etag(stat: os.stat_result) -> str:
+        """
+        :return: an identifier for the contents of a file, from its size & modification time. Files
+                 are installed with the modification time of the file they were installed from.
+        """
+        return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def copy(
+        self,
+        source_bucket: str,
+        destination_bucket: str,
+        files: list[tuple[str, str, int]],
+        on_copied: Callable[[str], None] = None,
+        progress: ProgressReporter = None,
+    ) -> None:
+        # pylint: disable=too-many-arguments
+        lock = threading.Lock()
+        methods = Counter()
+
+        def install(file: tuple[str, str, int]) -> Optional[str]:
+            source_key, destination_key, size = file
+            try:
+                method = self.__install_file(
+                    self.__path(source_bucket, source_key),
+                    self.__path(destination_bucket, destination_key),
+                )
+            except OSError as error:
+                if progress is not None:
+                    progress.failure(f"{source_key} - Error: {error}")
+                return f"\n\tFile: {source_key} - Error: {error}"
+            with lock:
+                methods[method] += 1
+            if progress is not None:
+                progress.update(nbytes=int(size))
+            if on_copied is not None:
+                on_copied(source_key)
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            failures = [failure for failure in executor.map(install, files) if failure]
+        print(f"Installed {sum(methods.values())} files: {dict(methods)}.")
+
+        if failures:
+            raise IngesterException(
+                f"Error copying files. {len(failures)} of {len(files)} copies failed."
+                + "".join(failures)
+            )
+
+    def __install_file(self, source: str, destination: str) -> str:
+        """
+        Install a file with the cheapest method available.
+        :return: the method used: hardlink, reflink, copy_file_range or copy
+        """
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temporary = f"{destination}.{threading.get_ident()}.tmp"
+        try:
+            if self.__hardlink:
+                try:
+                    os.link(source, temporary)
+                    os.replace(temporary, destination)
+                    return "hardlink"
+                except OSError as error:
+                    if not _is_unsupported(error):
+                        raise
+            method = _copy_data(source, temporary)
+            shutil.copystat(source, temporary)
+            os.replace(temporary, destination)
+            return method
+        finally:
+            if os.path.lexists(temporary):
+                os.remove(temporary)
+
+    def put_object(self, bucket: str, key: str, body: bytes) -> None:
+        path = self.__path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(body)
+        os.replace(temporary, path)
+
+    def get_object(self, bucket: str, key: str) -> Optional[BinaryIO]:
+        try:
+            with open(self.__path(bucket, key), "rb") as file:
+                return io.BytesIO(file.read())
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            raise IngesterException(error) from error
+
+    def delete_objects(self, bucket: str, keys: list[str]) -> list[str]:
+        failures = list[str]()
+        directories = set[str]()
+        for key in keys:
+            path = self.__path(bucket, key)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as error:
+                failures.append(f"{key} - Error: {error}")
+                continue
+            directories.add(os.path.dirname(path))
+
+        # Remove the directories left empty, as S3 "folders" disappear with their last object
+        bucket_path = os.path.normpath(self.__path(bucket))
+        for directory in sorted(directories, key=len, reverse=True):
+            while os.path.normpath(directory) != bucket_path:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+        return failures
+
+
+# Errors raised when a filesystem, or the kernel, doesn't support a way of installing a file
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EMLINK,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+}
+
+# ioctl request cloning one file into another on Linux (FICLONE)
+_FICLONE = 0x40049409
+
+
+def _is_unsupported(error: OSError) -> bool:
+    return error.errno in _UNSUPPORTED_ERRNOS
+
+
+def _copy_data(source: str, destination: str) -> str:
+    """
+    Copy the data of a file into a new file, without reading it into this process if possible.
+    :return: the method used: reflink, copy_file_range or copy
+    """
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        if sys.platform.startswith("linux"):
+            try:
+                import fcntl  # pylint: disable=import-outside-toplevel
+
+                fcntl.ioctl(destination_file.fileno(), _FICLONE, source_file.fileno())
+                return "reflink"
+            except OSError as error:
+                if not _is_unsupported(error):
+                    raise
+
+        if hasattr(os, "copy_file_range"):
+            try:
+                remaining = os.fstat(source_file.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(
+                        source_file.fileno(), destination_file.fileno(), remaining
+                    )
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return "copy_file_range"
+            except OSError as error:
+                if not _is_unsupported(error):
+                    raise
+                # Start over with a plain copy
+                source_file.seek(0)
+                destination_file.seek(0)
+                destination_file.truncate()
+
+        shutil.copyfileobj(source_file, destination_file)
+        return "copy"
@@ -0,0 +1,132 @@
+"""
+Runs an ingest job outside of AWS Lambda, on a batch worker (an AWS Batch job, or any EC2 or
+Fargate container) with the cores, memory and disk to ingest jobs too large for the Ingester
+lambda's 15 minute, memory & /tmp limits.
+
+The job is ingested as the Ingester lambda would, configured by the same environment variables
+(CATALOG_DB_SECRET, ingest_bucket, INGEST_*). Manifests with more entries than INGEST_SHARD_SIZE
+are sharded across invocations of the Ingester lambda named by INGEST_SHARD_FUNCTION (both set by
+the lambda when it submits the job), the worker waiting on the shards for as long as they take.
+Run from the registry/lambdas folder:
+
+    python -m app.ingest_batch <job_folder> [--incremental] [--skip-unchanged]
+
+With --storage-root, the ingest & dataset buckets are folders of a POSIX filesystem (such as a
+shared EFS or FSx volume mounted on the worker) rather than S3 buckets, each bucket a folder of the
+root.
+"""
+import argparse
+import json
+import os
+import sys
+
+from .aws_utils.lambdas import get_dataset_repository, get_session
+from .ingest.ingester import Result
+from .ingest.manifest import MANIFEST_EXTENSIONS, get_manifest_from_fs
+from .ingest.storage import FileSystemStorage
+from .ingest_lambda import JOB_OPTIONS, create_ingester, get_entries, get_update, ingest_job
+from .local_utils.entry import get_entries_from_fs
+from .model.dataset import DataSet
+
+
+def ingest_local_job(
+    storage_root: str, ingest_bucket: str, ingest_folder: str, options: dict[str, bool]
+) -> dict:
+    """
+    Ingest each dataset in an ingest job from a folder of the filesystem, into dataset buckets
+    that are folders of the same filesystem, one dataset at a time.
+    :param storage_root: folder containing a folder for each bucket
+    :param ingest_bucket: name of the ingest bucket's folder
+    :param ingest_folder: folder in the ingest bucket containing the ingest job
+    :param options: the job's Ingester options (see app.ingest_lambda.get_job_options)
+    :return: the updates to the job's datasets, as app.ingest_lambda.ingest_job returns them
+    """
+    session = get_session()
+    ds_repo = get_dataset_repository(session=session)
+    storage = FileSystemStorage(root=storage_root)
+    job_path = os.path.join(storage_root, ingest_bucket, ingest_folder)
+
+    def ingest(entry_ds: DataSet) -> Result:
+        dataset_path = os.path.join(job_path, entry_ds.index.rsplit("/", 1)[1])
+        manifest_file = next(
+            (
+                os.path.join(dataset_path, "manifest" + extension)
+                for extension in MANIFEST_EXTENSIONS
+                if os.path.exists(os.path.join(dataset_path, "manifest" + extension))
+            ),
+            os.path.join(dataset_path, "manifest.csv"),
+        )
+        result = create_ingester(
+            session,
+            ingest_bucket,
+            ingest_folder,
+            entry_ds,
+            get_manifest_from_fs(manifest_file),
+            ds_repo=ds_repo,
+            storage=storage,
+            **options,
+        ).execute()
+        os.remove(manifest_file)
+        return result
+
+    entries_file = os.path.join(job_path, "entries.json")
+    entry_ds_list = get_entries_from_fs(entries_file)
+    updates = [get_update(ingest, entry_ds) for entry_ds in entry_ds_list]
+    os.remove(entries_file)
+    return {"num_datasets_updated": len(updates), "updates": updates}
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Run an ingest job, printing the updates to its datasets as the Ingester lambda returns them.
+    :param argv: command line arguments. Defaults to sys.argv
+    :return: the exit status: 1 if any dataset failed to be ingested, otherwise 0
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m app.ingest_batch",
+        description="Runs a HelioCloud ingest job in this process, rather than in the Ingester "
+        "lambda.",
+    )
+    parser.add_argument(
+        "job_folder", type=str, help="Name of the folder in the ingest bucket to ingest."
+    )
+    parser.add_argument(
+        "--ingest-bucket",
+        type=str,
+        default=os.environ.get("ingest_bucket"),
+        help="Name of the ingest bucket. Defaults to the ingest_bucket environment variable.",
+    )
+    parser.add_argument(
+        "--storage-root",
+        type=str,
+        help="Folder of a POSIX filesystem whose folders are the ingest & dataset buckets, to "
+        "ingest from and into rather than S3.",
+    )
+    for option in JOB_OPTIONS:
+        parser.add_argument(
+            f"--{option.replace('_', '-')}",
+            action="store_true",
+            help=f"Set the ingest job's {option} option (see app.ingest_lambda.handler).",
+        )
+    args = parser.parse_args(argv)
+    if args.ingest_bucket is None:
+        parser.error("--ingest-bucket or the ingest_bucket environment variable is required")
+
+    options = {option: getattr(args, option) for option in JOB_OPTIONS}
+    if args.storage_root is not None:
+        response = ingest_local_job(args.storage_root, args.ingest_bucket, args.job_folder, options)
+    else:
+        session = get_session()
+        response = ingest_job(
+            session,
+            args.ingest_bucket,
+            args.job_folder,
+            get_entries(session, args.ingest_bucket, args.job_folder),
+            options,
+        )
+    print(json.dumps(response, indent=2, default=str))
+    return 1 if any(update["error"] is not None for update in response["updates"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
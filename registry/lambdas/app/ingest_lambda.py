@@ -1,88 +1,758 @@
 """
 AWS Lambda implementation for running the Ingester service.
+
+The pandas-backed modules of the ingest package are imported on first use, so that datasets
+ingested by a ColumnarIngester (see is_columnar_job) never load pandas.
 """
+from __future__ import annotations
+
+import functools
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from types import ModuleType
+from typing import TYPE_CHECKING, Callable, Optional
 
-import boto3
+from boto3.s3.transfer import TransferConfig
+from boto3.session import Session
+from botocore.exceptions import ClientError
 
-from .aws_utils.lambdas import get_dataset_repository
+from .aws_utils.lambdas import get_client, get_dataset_repository, get_session
+from .catalog.dataset_repository import DataSetRepository
 from .aws_utils.s3 import get_dataset_entries_from_s3
-from .aws_utils.s3 import get_manifest_from_s3
-from .ingest.ingester import Ingester
+from .aws_utils.s3 import find_manifest_key, get_manifest_from_s3, iter_manifest_from_s3
+from .core.constants import (
+    DEFAULT_BATCH_COPY_POLL_INTERVAL,
+    DEFAULT_BATCH_COPY_THRESHOLD,
+    DEFAULT_COPY_CONCURRENCY,
+    DEFAULT_DATASET_PARALLELISM,
+    DEFAULT_LAMBDA_MAX_BYTES,
+    DEFAULT_LAMBDA_MAX_ROWS,
+    DEFAULT_MULTIPART_CHUNKSIZE,
+    DEFAULT_MULTIPART_THRESHOLD,
+    DEFAULT_PROGRESS_INTERVAL,
+    DEFAULT_PROGRESS_PERCENT,
+    DEFAULT_SHARD_CONCURRENCY,
+    DEFAULT_VALIDATION_WORKERS,
+)
+from .core.exceptions import IngesterException
+from .core.imports import lazy_import
+from .ingest.batch_copy import CopyJobRunner, S3BatchCopyJobRunner, run_copy_tasks
+from .ingest.columnar import ColumnarIngester, read_manifest_columns
+from .ingest.dispatch import Backend, BatchSubmitter, choose_backend
+from .ingest.modes import Engine, ValidationMode
+from .ingest.result import Result
+from .ingest.storage import S3Storage, Storage
+from .model.dataset import DataSet, IndexType
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-# Ingester does not require context parameter, but AWS Lambda service still requires
-# context as a parameter so the handler has the right method signature.
-# pylint: disable=unused-argument
-def handler(event, context) -> dict:
+    from .ingest.coordinator import Shard
+    from .ingest.ingester import Ingester
+
+
+def _import_ingest(module: str) -> ModuleType:
     """
-    AWS Lambda handler for the Ingest service of HelioCloud.
+    :param module: name of a pandas-backed module of the ingest package (ex. ingester)
+    :return: the module, imported on first use
+    """
+    return lazy_import(f".ingest.{module}", package=__package__)
 
-    :param event: must contain the parameter 'job_folder' with its value (the folder in the ingest
-        bucket to check for the ingest job
-    :param context: n/a (required for method signature)
-    :return: a dictionary containing two keys
-             dataset_updated:  the name of the dataset in this HelioCloud's catalog that was
-             updated by the job
-             files_contributed:  the number of files contributed to that dataset
+
+def get_transfer_config() -> TransferConfig:
     """
+    :return: the copy settings for Ingesters run by this lambda, overridable through the
+             INGEST_COPY_CONCURRENCY, INGEST_MULTIPART_THRESHOLD & INGEST_MULTIPART_CHUNKSIZE
+             environment variables
+    """
+    return TransferConfig(
+        max_concurrency=int(os.environ.get("INGEST_COPY_CONCURRENCY", DEFAULT_COPY_CONCURRENCY)),
+        multipart_threshold=int(
+            os.environ.get("INGEST_MULTIPART_THRESHOLD", DEFAULT_MULTIPART_THRESHOLD)
+        ),
+        multipart_chunksize=int(
+            os.environ.get("INGEST_MULTIPART_CHUNKSIZE", DEFAULT_MULTIPART_CHUNKSIZE)
+        ),
+    )
 
-    session = boto3.session.Session()
 
-    # Get the Ingest bucket name & folder
-    ingest_bucket = os.environ["ingest_bucket"]
-    ingest_folder = str(event["job_folder"])
+# Options of an ingest job that may be set to true in the lambda's event, passed on to its Ingesters
+JOB_OPTIONS = ("incremental", "skip_unchanged")
 
-    # Get the entries dataset
-    entry_key = os.path.join(ingest_folder, "entries.json")
-    entry_ds_list = get_dataset_entries_from_s3(
-        session=session, bucket_name=ingest_bucket, entry_key=entry_key
+
+def get_job_options(event: dict) -> dict[str, bool]:
+    """
+    :return: the Ingester options set in an event
+    """
+    return {option: bool(event.get(option, False)) for option in JOB_OPTIONS}
+
+
+def get_metrics(result: Result) -> dict:
+    """
+    :return: the instrumentation of an Ingester run, as reported in this lambda's response
+    """
+    return {
+        "files_validated_per_second": result.files_validated_per_second,
+        "bytes_copied": result.bytes_copied,
+        "bytes_skipped": result.bytes_skipped,
+        "phases": [asdict(phase) for phase in result.phases],
+    }
+
+
+def get_validation_workers() -> int:
+    """
+    :return: the size of the worker pool Ingesters run by this lambda validate manifests with,
+             overridable through the INGEST_VALIDATION_WORKERS environment variable
+    """
+    return int(os.environ.get("INGEST_VALIDATION_WORKERS", DEFAULT_VALIDATION_WORKERS))
+
+
+def get_dataset_parallelism() -> int:
+    """
+    :return: the number of an ingest job's datasets ingested at once, overridable through the
+             INGEST_DATASET_PARALLELISM environment variable
+    """
+    return int(os.environ.get("INGEST_DATASET_PARALLELISM", DEFAULT_DATASET_PARALLELISM))
+
+
+def get_engine() -> Engine:
+    """
+    :return: how Ingesters run by this lambda issue their requests to S3, overridable through the
+             INGEST_ENGINE environment variable
+    """
+    return Engine(os.environ.get("INGEST_ENGINE", Engine.THREADS.value))
+
+
+def is_resumable() -> bool:
+    """
+    :return: whether Ingesters run by this lambda journal their progress, so a re-run of a timed
+             out job resumes where it left off. True unless the INGEST_RESUMABLE environment
+             variable is false
+    """
+    return os.environ.get("INGEST_RESUMABLE", "true").lower() != "false"
+
+
+def get_s3_client(slot: int = 0):
+    """
+    :param slot: which of the S3 clients of the datasets ingested at once to get
+    :return: an S3 client for one Ingester at a time, shared by warm invocations, its connection
+             pool large enough for the Ingester's workers. Each dataset ingested at once has a
+             client of its own, so its Ingester's instrumentation counts only its own requests
+    """
+    workers = max(
+        get_validation_workers(),
+        int(os.environ.get("INGEST_COPY_CONCURRENCY", DEFAULT_COPY_CONCURRENCY)),
     )
+    return get_client("s3", max_pool_connections=workers, slot=slot)
 
-    # For each entry in the entries file, get the manifest and run an Ingester instance
-    updates = []
-    s3_client = session.client("s3")
-    for entry_ds in entry_ds_list:
-        # join ingest folder (ex. my_job/), index split (ex. MMS/), and manifest.csv
-        manifest_key = os.path.join(ingest_folder, entry_ds.index.rsplit("/", 1)[1], "manifest.csv")
 
-        # Get the manifest file
-        manifest_df = get_manifest_from_s3(
-            session=session, bucket_name=ingest_bucket, manifest_key=manifest_key
+def get_function_name(variable: str) -> str:
+    """
+    :param variable: environment variable naming the Ingester lambda, for callers outside of it
+    :return: the name of the Ingester lambda: this lambda, or that named by the variable
+    :raises IngesterException: if run outside of the lambda without the variable set
+    """
+    function_name = os.environ.get(variable, os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+    if function_name is None:
+        raise IngesterException(f"{variable} must name the Ingester lambda outside of the lambda.")
+    return function_name
+
+
+def runs_copy_jobs() -> bool:
+    """
+    :return: whether Ingesters copy large datasets with S3 Batch Operations jobs: when the
+             INGEST_BATCH_COPY_ROLE_ARN environment variable is set, on the batch worker only.
+             Ingesters wait for their copy jobs to complete, which can take far longer than this
+             lambda's timeout
+    """
+    return (
+        "INGEST_BATCH_COPY_ROLE_ARN" in os.environ and "AWS_LAMBDA_FUNCTION_NAME" not in os.environ
+    )
+
+
+def get_batch_copy_threshold() -> int:
+    """
+    :return: the smallest number of files Ingesters copy with an S3 Batch Operations job,
+             overridable through the INGEST_BATCH_COPY_THRESHOLD environment variable
+    """
+    return int(os.environ.get("INGEST_BATCH_COPY_THRESHOLD", DEFAULT_BATCH_COPY_THRESHOLD))
+
+
+def get_copy_job_runner(session: Session) -> Optional[CopyJobRunner]:
+    """
+    :return: the runner of the S3 Batch Operations jobs Ingesters copy large datasets with, when
+             the INGEST_BATCH_COPY_ROLE_ARN environment variable names the role jobs run as, on
+             the batch worker only. Each task of a job invokes the INGEST_BATCH_COPY_FUNCTION
+             lambda
+    :raises IngesterException: if run outside of the lambda without INGEST_BATCH_COPY_FUNCTION
+    """
+    if not runs_copy_jobs():
+        return None
+
+    role_arn = os.environ["INGEST_BATCH_COPY_ROLE_ARN"]
+    function_name = get_function_name("INGEST_BATCH_COPY_FUNCTION")
+    account_id = role_arn.split(":")[4]
+    return S3BatchCopyJobRunner(
+        s3control_client=get_client("s3control"),
+        s3_client=get_client("s3"),
+        role_arn=role_arn,
+        function_arn=f"arn:aws:lambda:{session.region_name}:{account_id}:function:{function_name}",
+        poll_interval=float(
+            os.environ.get("INGEST_BATCH_COPY_POLL_INTERVAL", DEFAULT_BATCH_COPY_POLL_INTERVAL)
+        ),
+    )
+
+
+def get_manifest_key(
+    session: Session, ingest_bucket: str, ingest_folder: str, entry_ds: DataSet, s3_client=None
+) -> str:
+    """
+    :return: S3 key of the manifest for a dataset in the ingest job, in whichever format it was
+             uploaded (ex. manifest.csv or manifest.csv.gz)
+    """
+    # join ingest folder (ex. my_job/) and index split (ex. MMS/)
+    folder = os.path.join(ingest_folder, entry_ds.index.rsplit("/", 1)[1], "")
+    return find_manifest_key(session, ingest_bucket, folder, s3_client=s3_client)
+
+
+def create_ingester(
+    session: Session,
+    ingest_bucket: str,
+    ingest_folder: str,
+    entry_ds: DataSet,
+    manifest_df: pd.DataFrame,
+    ds_repo: DataSetRepository = None,
+    s3_client=None,
+    storage: Storage = None,
+    **kwargs,
+) -> Ingester:
+    # pylint: disable=too-many-arguments
+    """
+    :param ds_repo: catalog to save the dataset to. Defaults to a new connection to the catalog
+    :param s3_client: S3 client shared with the Ingester, unless it runs on the asyncio engine.
+           Defaults to a client of the Ingester's own
+    :param storage: where the ingest & destination buckets are, rather than S3 through s3_client
+    :return: an Ingester for a dataset in the ingest job, configured from this lambda's environment
+    """
+    engine = get_engine()
+    transfer_config = get_transfer_config()
+    return _import_ingest("ingester").Ingester(
+        session=session,
+        ingest_bucket=ingest_bucket,
+        ingest_folder=ingest_folder,
+        entry_dataset=entry_ds,
+        manifest_df=manifest_df,
+        ds_repo=get_dataset_repository() if ds_repo is None else ds_repo,
+        # Size of the worker pool used to validate the manifest
+        validation_workers=get_validation_workers(),
+        validation_mode=ValidationMode(
+            os.environ.get("INGEST_VALIDATION_MODE", ValidationMode.HEAD.value)
+        ),
+        transfer_config=transfer_config,
+        # Issue S3 requests from pools of threads, or from a single asyncio event loop
+        engine=engine,
+        storage=(
+            S3Storage(s3_client, transfer_config=transfer_config)
+            if storage is None and s3_client is not None and engine != Engine.ASYNCIO
+            else storage
+        ),
+        # How often progress summaries are logged while files are validated, copied & cleaned up
+        progress_interval=float(
+            os.environ.get("INGEST_PROGRESS_INTERVAL", DEFAULT_PROGRESS_INTERVAL)
+        ),
+        progress_percent=float(os.environ.get("INGEST_PROGRESS_PERCENT", DEFAULT_PROGRESS_PERCENT)),
+        # Journal progress, so a re-run of a timed out job resumes where it left off
+        resumable=is_resumable(),
+        # Copy datasets of many files with S3 Batch Operations jobs, when configured
+        copy_job_runner=get_copy_job_runner(session),
+        batch_copy_threshold=get_batch_copy_threshold(),
+        **kwargs,
+    )
+
+
+def is_columnar_job(
+    entry_ds: DataSet, manifest_key: str, options: dict[str, bool], shard_size: int = None
+) -> bool:
+    """
+    :param shard_size: number of manifest entries in each shard, 0 to never shard. Defaults to the
+           INGEST_SHARD_SIZE environment variable
+    :return: whether a dataset in the ingest job is ingested by a ColumnarIngester, which it is
+             when INGEST_ENGINE is COLUMNAR, for CSV manifests & index files validated with HEAD
+             requests, unless its manifest is streamed in chunks or sharded, unchanged files are
+             skipped, large datasets are copied by S3 Batch Operations jobs, or the job is
+             resumable
+    """
+    if get_engine() != Engine.COLUMNAR:
+        return False
+
+    # A ColumnarIngester keeps no journal, so a re-run of a timed out job would start over
+    if is_resumable():
+        print(
+            f"Ingesting {entry_ds.dataset_id} with the Ingester rather than a ColumnarIngester, "
+            "which can't resume a timed out job. Set INGEST_RESUMABLE to false to use it."
         )
+        return False
+    if shard_size is None:
+        shard_size = int(os.environ.get("INGEST_SHARD_SIZE", 0))
+    return (
+        manifest_key.endswith((".csv", ".csv.gz", ".csv.zst"))
+        and entry_ds.indextype != IndexType.PARQUET
+        and os.environ.get("INGEST_VALIDATION_MODE", ValidationMode.HEAD.value)
+        == ValidationMode.HEAD.value
+        and not options.get("skip_unchanged", False)
+        and int(os.environ.get("INGEST_CHUNK_SIZE", 0)) == 0
+        and shard_size == 0
+        and not runs_copy_jobs()
+    )
 
-        # Run the Ingester, catching any exceptions that arise
-        update = {"dataset": entry_ds.dataset_id, "num_files_updated": 0, "error": None}
-        # pylint: disable=broad-exception-caught
-        try:
-            result = Ingester(
+
+def run_columnar_ingester(
+    ingest_bucket: str,
+    ingest_folder: str,
+    entry_ds: DataSet,
+    manifest_key: str,
+    options: dict[str, bool],
+    ds_repo: DataSetRepository = None,
+    s3_client=None,
+) -> Result:
+    # pylint: disable=too-many-arguments
+    """
+    Ingest a dataset in the ingest job without pandas, its manifest parsed into typed columns as
+    it is streamed from the ingest bucket.
+    :param options: the job's Ingester options (see get_job_options)
+    :param ds_repo: catalog to save the dataset to. Defaults to a new connection to the catalog
+    :param s3_client: S3 client shared with the ColumnarIngester. Defaults to this lambda's client
+    :return: the results of the ingest
+    """
+    if s3_client is None:
+        s3_client = get_client("s3")
+    manifest = read_manifest_columns(
+        s3_client.get_object(Bucket=ingest_bucket, Key=manifest_key)["Body"],
+        filename=os.path.basename(manifest_key),
+    )
+    transfer_config = get_transfer_config()
+    return ColumnarIngester(
+        ingest_bucket=ingest_bucket,
+        ingest_folder=ingest_folder,
+        manifest=manifest,
+        entry_dataset=entry_ds,
+        ds_repo=get_dataset_repository() if ds_repo is None else ds_repo,
+        validation_workers=get_validation_workers(),
+        transfer_config=transfer_config,
+        incremental=options.get("incremental", False),
+        progress_interval=float(
+            os.environ.get("INGEST_PROGRESS_INTERVAL", DEFAULT_PROGRESS_INTERVAL)
+        ),
+        progress_percent=float(os.environ.get("INGEST_PROGRESS_PERCENT", DEFAULT_PROGRESS_PERCENT)),
+        storage=S3Storage(s3_client, transfer_config=transfer_config),
+    ).execute()
+
+
+def run_ingester(
+    session: Session,
+    ingest_bucket: str,
+    ingest_folder: str,
+    entry_ds: DataSet,
+    manifest_df: pd.DataFrame,
+    options: dict[str, bool],
+    shard_size: int = None,
+    **resources,
+) -> Result:
+    # pylint: disable=too-many-arguments
+    """
+    Ingest a dataset in the ingest job. Manifests with more entries than the shard size are split
+    into shards, each installed by an invocation of the Ingester lambda named by the
+    INGEST_SHARD_FUNCTION environment variable. Only the batch worker shards manifests, as it waits
+    on the shards for as long as they take.
+    :param options: the job's Ingester options (see get_job_options)
+    :param shard_size: number of manifest entries in each shard, 0 to never shard. Defaults to the
+           INGEST_SHARD_SIZE environment variable
+    :param resources: the catalog & S3 client of the Ingester (see create_ingester)
+    :return: the results of the ingest
+    """
+    ingester = create_ingester(
+        session, ingest_bucket, ingest_folder, entry_ds, manifest_df, **options, **resources
+    )
+    if shard_size is None:
+        shard_size = int(os.environ.get("INGEST_SHARD_SIZE", 0))
+    if not 0 < shard_size < len(manifest_df):
+        return ingester.execute()
+
+    max_concurrency = int(os.environ.get("INGEST_SHARD_CONCURRENCY", DEFAULT_SHARD_CONCURRENCY))
+    coordinator = _import_ingest("coordinator")
+    return coordinator.ShardedIngester(
+        ingester=ingester,
+        ingest_folder=ingest_folder,
+        dataset_id=entry_ds.dataset_id,
+        manifest_df=manifest_df,
+        executor=coordinator.LambdaShardExecutor(
+            # Invocations run for up to the 15 minute lambda timeout, and are not retried by the
+            # client as a failed shard is resumed by re-running the whole job
+            lambda_client=get_client(
+                "lambda",
+                max_pool_connections=max_concurrency,
+                read_timeout=15 * 60,
+                retries={"max_attempts": 0},
+            ),
+            s3_client=get_client("s3"),
+            function_name=get_function_name("INGEST_SHARD_FUNCTION"),
+            ingest_bucket=ingest_bucket,
+            max_concurrency=max_concurrency,
+            options=options,
+        ),
+        shard_size=shard_size,
+    ).execute()
+
+
+def run_chunked_ingester(
+    session: Session,
+    ingest_bucket: str,
+    ingest_folder: str,
+    entry_ds: DataSet,
+    manifest_key: str,
+    options: dict[str, bool],
+    **resources,
+) -> Result:
+    # pylint: disable=too-many-arguments
+    """
+    Ingest a dataset in the ingest job a chunk of its manifest at a time, streaming the manifest
+    from the ingest bucket INGEST_CHUNK_SIZE entries at a time rather than reading all of it.
+    :param options: the job's Ingester options (see get_job_options)
+    :param resources: the catalog & S3 client of the Ingesters (see create_ingester)
+    :return: the results of the ingest
+    """
+    chunk_size = int(os.environ["INGEST_CHUNK_SIZE"])
+
+    def create_chunk_ingester(chunk_df: pd.DataFrame, chunk_index: int) -> Ingester:
+        return create_ingester(
+            session,
+            ingest_bucket,
+            ingest_folder,
+            entry_ds,
+            chunk_df,
+            shard_index=chunk_index,
+            **options,
+            **resources,
+        )
+
+    return (
+        _import_ingest("pipeline")
+        .ChunkedIngester(
+            create_ingester=create_chunk_ingester,
+            manifest_chunks=lambda: iter_manifest_from_s3(
                 session=session,
-                ingest_bucket=ingest_bucket,
-                ingest_folder=ingest_folder,
-                entry_dataset=entry_ds,
-                manifest_df=manifest_df,
-                ds_repo=get_dataset_repository(),
-            ).execute()
-            update["num_files_updated"] = result.files_contributed
-            s3_client.delete_object(Bucket=ingest_bucket, Key=manifest_key)
+                bucket_name=ingest_bucket,
+                manifest_key=manifest_key,
+                chunksize=chunk_size,
+                s3_client=resources.get("s3_client"),
+            ),
+        )
+        .execute()
+    )
+
+
+def get_entries(session: Session, ingest_bucket: str, ingest_folder: str) -> list[DataSet]:
+    """
+    :return: the datasets listed in the ingest job's entries file
+    """
+    return get_dataset_entries_from_s3(
+        session=session,
+        bucket_name=ingest_bucket,
+        entry_key=os.path.join(ingest_folder, "entries.json"),
+    )
+
+
+def install_shard(
+    session: Session, ingest_bucket: str, shard: Shard, options: dict[str, bool]
+) -> dict:
+    """
+    Install one shard of a dataset's manifest, on behalf of the batch worker coordinating a
+    sharded ingest job. Only the shard's rows of the manifest, saved by the coordinator, are read.
+    :param session: boto3.Session instance to use
+    :param ingest_bucket: name of the ingest bucket
+    :param shard: the shard to install
+    :param options: the job's Ingester options (see get_job_options)
+    :return: a dictionary containing the S3 key the shard's installed files were saved to
+    """
+    coordinator = _import_ingest("coordinator")
+    entry_ds = next(
+        entry_ds
+        for entry_ds in get_entries(session, ingest_bucket, shard.ingest_folder)
+        if entry_ds.dataset_id == shard.dataset_id
+    )
+    manifest_df = coordinator.load_shard_manifest(get_client("s3"), ingest_bucket, shard)
+
+    ingester = create_ingester(
+        session,
+        ingest_bucket,
+        shard.ingest_folder,
+        entry_ds,
+        manifest_df,
+        shard_index=shard.index,
+        **options,
+    )
+    # The coordinator validated the whole manifest before installing any shard
+    installed_files = ingester.install(validate=False)
+    ingester.close()
+
+    coordinator.save_shard_records(get_client("s3"), ingest_bucket, shard, installed_files)
+    return {"records_key": shard.records_key}
+
+
+def dispatch_job(
+    session: Session,
+    ingest_bucket: str,
+    ingest_folder: str,
+    entry_ds_list: list[DataSet],
+    options: dict[str, bool],
+    backend: str = None,
+) -> Optional[dict[str, str]]:
+    # pylint: disable=too-many-arguments
+    """
+    Submit the ingest job to AWS Batch if it is too large for this lambda. Jobs are only submitted
+    when the INGEST_BATCH_JOB_QUEUE & INGEST_BATCH_JOB_DEFINITION environment variables are set,
+    if their manifests list more than INGEST_LAMBDA_MAX_ROWS entries or INGEST_LAMBDA_MAX_BYTES
+    bytes of files. When INGEST_SHARD_SIZE is set, jobs listing more entries than the shard size
+    are submitted too, for the batch worker to shard across invocations of this lambda, as are
+    jobs listing at least INGEST_BATCH_COPY_THRESHOLD entries when copy jobs are configured.
+    :param entry_ds_list: the datasets in the ingest job
+    :param options: the job's Ingester options (see get_job_options)
+    :param backend: LAMBDA or BATCH to run the job on, rather than choosing from its size
+    :return: the id & name of the batch job submitted, or None if this lambda runs the job
+    """
+    job_queue = os.environ.get("INGEST_BATCH_JOB_QUEUE")
+    shard_size = int(os.environ.get("INGEST_SHARD_SIZE", 0))
+    if backend is None and job_queue is not None:
+        s3_client = get_client("s3")
+
+        # A missing manifest is reported when its dataset is ingested, rather than here
+        def manifests():
+            for entry_ds in entry_ds_list:
+                manifest_key = get_manifest_key(
+                    session, ingest_bucket, ingest_folder, entry_ds, s3_client
+                )
+                try:
+                    yield iter_manifest_from_s3(
+                        session=session,
+                        bucket_name=ingest_bucket,
+                        manifest_key=manifest_key,
+                        s3_client=s3_client,
+                    )
+                except ClientError as ex:
+                    print(f"Not sizing manifest {manifest_key}: {ex}")
+
+        # Manifests are only sharded, and datasets only copied by copy jobs, by the batch worker.
+        # Their limits are compared to the rows of the whole job, not of each manifest, so a job
+        # of many smaller datasets may be run, without either, by the batch worker too
+        max_rows = int(os.environ.get("INGEST_LAMBDA_MAX_ROWS", DEFAULT_LAMBDA_MAX_ROWS))
+        if shard_size > 0:
+            max_rows = min(max_rows, shard_size)
+        if "INGEST_BATCH_COPY_ROLE_ARN" in os.environ:
+            max_rows = min(max_rows, get_batch_copy_threshold() - 1)
+        backend, size = choose_backend(
+            manifests(),
+            max_rows=max_rows,
+            max_bytes=int(os.environ.get("INGEST_LAMBDA_MAX_BYTES", DEFAULT_LAMBDA_MAX_BYTES)),
+        )
+        print(
+            f"Running the ingest job (at least {size.rows} files, {size.bytes} bytes) on "
+            f"{backend.value}"
+        )
+
+    if backend is None or Backend(backend) == Backend.LAMBDA:
+        return None
+    if job_queue is None:
+        raise IngesterException("No AWS Batch job queue is configured to run the ingest job on.")
+
+    # The batch worker shards manifests across invocations of this lambda, and copies large
+    # datasets with copy jobs whose tasks invoke this lambda, as configured for this lambda
+    environment = {}
+    if shard_size > 0:
+        environment["INGEST_SHARD_SIZE"] = str(shard_size)
+        environment["INGEST_SHARD_FUNCTION"] = os.environ["AWS_LAMBDA_FUNCTION_NAME"]
+    if "INGEST_BATCH_COPY_ROLE_ARN" in os.environ:
+        for variable in ["INGEST_BATCH_COPY_ROLE_ARN", "INGEST_BATCH_COPY_THRESHOLD"]:
+            if variable in os.environ:
+                environment[variable] = os.environ[variable]
+        environment["INGEST_BATCH_COPY_FUNCTION"] = os.environ["AWS_LAMBDA_FUNCTION_NAME"]
+    return BatchSubmitter(
+        batch_client=get_client("batch"),
+        job_queue=job_queue,
+        job_definition=os.environ["INGEST_BATCH_JOB_DEFINITION"],
+    ).submit(ingest_folder, options, environment)
 
-        # Ingester failed, so record the dataset impacted and the exception that occurred.
-        # so it can be reported back
-        except Exception as ex:
-            update["error"] = str(ex)
-        # pylint: enable=broad-exception-caught
 
-        # Store a record of the update
-        updates.append(update)
+def get_update(ingest: Callable[[DataSet], Result], entry_ds: DataSet) -> dict:
+    """
+    Ingest a dataset of the ingest job, failing independently of the job's other datasets.
+    :param ingest: ingests a dataset
+    :param entry_ds: the dataset to ingest
+    :return: the dataset's update, as reported in this lambda's response: its name, the number of
+             files contributed to it, any error, and the metrics measured while ingesting it
+    """
+    update = {"dataset": entry_ds.dataset_id, "num_files_updated": 0, "error": None}
+    # pylint: disable=broad-exception-caught
+    try:
+        result = ingest(entry_ds)
+        update["num_files_updated"] = result.files_contributed
+        update["cleanup_failures"] = result.cleanup_failures
+        update["metrics"] = get_metrics(result)
+
+    # Ingester failed, so record the dataset impacted and the exception that occurred.
+    # so it can be reported back
+    except Exception as ex:
+        update["error"] = str(ex)
+    # pylint: enable=broad-exception-caught
+    return update
+
+
+def ingest_job(
+    session: Session,
+    ingest_bucket: str,
+    ingest_folder: str,
+    entry_ds_list: list[DataSet],
+    options: dict[str, bool],
+    shard_size: int = None,
+) -> dict:
+    # pylint: disable=too-many-arguments
+    """
+    Ingest each dataset in an ingest job, as this lambda or a batch worker (see app.ingest_batch)
+    does. Datasets are ingested INGEST_DATASET_PARALLELISM at a time, sharing one connection to
+    the catalog, each with an S3 client of its own, each failing independently of the others.
+    :param entry_ds_list: the datasets in the ingest job
+    :param options: the job's Ingester options (see get_job_options)
+    :param shard_size: number of manifest entries in each shard of a sharded ingest, 0 to never
+           shard (see run_ingester)
+    :return: a dictionary containing two keys
+             num_datasets_updated: the number of datasets in the ingest job
+             updates: for each dataset, its name, the number of files contributed to it, any
+             error, and the metrics measured while ingesting it
+    """
+    # One connection to the catalog, shared by every dataset ingested, and an S3 client for each
+    # dataset ingested at once, taken from the pool by the dataset for the duration of its ingest
+    parallelism = get_dataset_parallelism()
+    ds_repo = get_dataset_repository(session=session)
+    s3_clients = queue.SimpleQueue()
+    for slot in range(parallelism):
+        s3_clients.put(get_s3_client(slot))
+
+    # Get the manifest for an entry in the entries file and run an Ingester instance
+    def ingest(entry_ds: DataSet) -> Result:
+        s3_client = s3_clients.get()
+        resources = {"ds_repo": ds_repo, "s3_client": s3_client}
+        try:
+            manifest_key = get_manifest_key(
+                session, ingest_bucket, ingest_folder, entry_ds, s3_client
+            )
+
+            # Datasets are ingested without pandas when INGEST_ENGINE is COLUMNAR, if they can be
+            if is_columnar_job(entry_ds, manifest_key, options, shard_size):
+                result = run_columnar_ingester(
+                    ingest_bucket, ingest_folder, entry_ds, manifest_key, options, **resources
+                )
+
+            # Manifests are streamed a chunk at a time when INGEST_CHUNK_SIZE is set
+            elif int(os.environ.get("INGEST_CHUNK_SIZE", 0)) > 0:
+                result = run_chunked_ingester(
+                    session,
+                    ingest_bucket,
+                    ingest_folder,
+                    entry_ds,
+                    manifest_key,
+                    options,
+                    **resources,
+                )
+            else:
+                manifest_df = get_manifest_from_s3(
+                    session=session,
+                    bucket_name=ingest_bucket,
+                    manifest_key=manifest_key,
+                    s3_client=s3_client,
+                )
+                result = run_ingester(
+                    session,
+                    ingest_bucket,
+                    ingest_folder,
+                    entry_ds,
+                    manifest_df,
+                    options,
+                    shard_size=shard_size,
+                    **resources,
+                )
+            s3_client.delete_object(Bucket=ingest_bucket, Key=manifest_key)
+            return result
+        finally:
+            s3_clients.put(s3_client)
+
+    # Store a record of each update, in the order of the entries file
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        updates = list(executor.map(functools.partial(get_update, ingest), entry_ds_list))
 
     # If all entries process successfully, remove the entries file
     if len(updates) == len(entry_ds_list):
-        s3_client.delete_object(Bucket=ingest_bucket, Key=entry_key)
-
-    s3_client.close()
+        get_s3_client().delete_object(
+            Bucket=ingest_bucket, Key=os.path.join(ingest_folder, "entries.json")
+        )
 
     # Return a dictionary of the results
     return {"num_datasets_updated": len(updates), "updates": updates}
 
 
+# Ingester does not require context parameter, but AWS Lambda service still requires
+# context as a parameter so the handler has the right method signature.
+# pylint: disable=unused-argument
+def handler(event, context) -> dict:
+    """
+    AWS Lambda handler for the Ingest service of HelioCloud.
+
+    :param event: must contain the parameter 'job_folder' with its value (the folder in the ingest
+        bucket to check for the ingest job. May contain 'incremental' set to true to add the job's
+        files to existing datasets, rather than replacing their index files, 'skip_unchanged'
+        set to true to skip copying files already in the destination bucket, and 'backend' set to
+        LAMBDA or BATCH to run the job in this lambda or on AWS Batch regardless of its size.
+        Contains a 'shard' too when invoked to install one shard of a sharded ingest job. Events
+        from S3 Batch Operations copy files for an Ingester's copy job instead (see
+        ingest.batch_copy.run_copy_tasks)
+    :param context: n/a (required for method signature)
+    :return: a dictionary containing two keys
+             num_datasets_updated: the number of datasets in the ingest job
+             updates: for each dataset, its name, the number of files contributed to it, any
+             error, and the metrics measured while ingesting it
+             and a third, batch_job, with the id & name of the AWS Batch job submitted to run an
+             ingest job too large for this lambda, in which case no datasets are updated
+    """
+
+    # Invoked by S3 Batch Operations to copy files for a copy job (see get_copy_job_runner)
+    if "invocationSchemaVersion" in event:
+        return run_copy_tasks(get_client("s3"), event)
+
+    # The session, and the clients & catalog connection below, are reused by warm invocations
+    session = get_session()
+
+    # Get the Ingest bucket name & folder
+    ingest_bucket = os.environ["ingest_bucket"]
+    ingest_folder = str(event["job_folder"])
+    options = get_job_options(event)
+
+    # Invoked by another invocation of this lambda to install one shard of its manifest
+    if "shard" in event:
+        shard = _import_ingest("coordinator").Shard(**event["shard"])
+        return install_shard(session, ingest_bucket, shard, options)
+
+    # Get the entries dataset
+    entry_ds_list = get_entries(session, ingest_bucket, ingest_folder)
+
+    # Jobs too large for this lambda are run by a batch worker instead, when one is configured
+    batch_job = dispatch_job(
+        session, ingest_bucket, ingest_folder, entry_ds_list, options, event.get("backend")
+    )
+    if batch_job is not None:
+        return {"num_datasets_updated": 0, "updates": [], "batch_job": batch_job}
+
+    # Manifests are only sharded by the batch worker, which isn't bound by this lambda's timeout
+    return ingest_job(session, ingest_bucket, ingest_folder, entry_ds_list, options, shard_size=0)
+
+
 # pylink: enable=unused-argument
@@ -45,6 +45,14 @@ class FileType(enum.Enum):
         except ValueError:
             return False
 
+    @classmethod
+    def by_extension(cls) -> dict[str, "FileType"]:
+        """
+        Returns every extension a FileType can be made out of, mapped to that FileType.
+        Used to look up many extensions at once (ex: with pandas.Series.map).
+        """
+        return dict(cls._value2member_map_)
+
 
 class IndexType(enum.Enum):
     """
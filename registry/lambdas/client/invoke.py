@@ -91,16 +91,21 @@ class IngestResponse(BaseResponse):
     # Updates
     updates: [list[dict[str, int, str]]] = field(default_factory=list)
 
+    # Id & name of the AWS Batch job submitted to run an ingest job too large for the lambda
+    batch_job: dict[str, str] = None
+
     def __init__(self, invoke_response: dict):
         super().__init__(invoke_response)
 
         # Have to init to ensure the field exists, because we implemented init()
         self.updates = []
+        self.batch_job = None
 
         if self.success:
             payload = json.loads(invoke_response["Payload"].read())
             self.num_datasets_updated = payload["num_datasets_updated"]
             self.updates = payload["updates"]
+            self.batch_job = payload.get("batch_job")
 
 
 def get_function_name(
@@ -7,6 +7,7 @@ import aws_cdk as cdk
 from aws_cdk import (
     aws_docdb as docdb,
     aws_ec2 as ec2,
+    aws_iam as iam,
     aws_s3 as s3,
     aws_lambda as lambda_,
     custom_resources as resources,
@@ -248,6 +249,76 @@ class RegistryStack(Stack):  # pylint: disable=too-many-instance-attributes
         # Ingester needs read/write on ingest bucket
         self.__ingest_bucket.grant_read_write(ingester_lambda)
 
+        ingester_config = self.__registry_config.get("ingester") or {}
+
+        # Manifests of large ingest jobs can be streamed a chunk at a time, so the Ingester never
+        # holds a whole manifest in memory (only a hash of each of its keys)
+        chunk_size = ingester_config.get("chunkSize")
+        if chunk_size:
+            ingester_lambda.add_environment("INGEST_CHUNK_SIZE", str(chunk_size))
+
+        # The datasets of an ingest job are ingested concurrently, this many at a time
+        dataset_parallelism = ingester_config.get("datasetParallelism")
+        if dataset_parallelism:
+            ingester_lambda.add_environment("INGEST_DATASET_PARALLELISM", str(dataset_parallelism))
+
+        # Large ingest jobs can be sharded across invocations of the Ingester, by the batch worker
+        # the jobs are submitted to (see below). The batch job definition's role must be allowed to
+        # invoke the Ingester, as it is not managed by this stack
+        shard_size = ingester_config.get("shardSize")
+        if shard_size:
+            ingester_lambda.add_environment("INGEST_SHARD_SIZE", str(shard_size))
+
+        # Ingest jobs too large for the Ingester are submitted to an AWS Batch job queue, to be run
+        # by a container of the batch worker image (see registry/lambdas/Dockerfile)
+        job_queue = ingester_config.get("batchJobQueue")
+        if job_queue:
+            job_definition = ingester_config["batchJobDefinition"]
+            ingester_lambda.add_environment("INGEST_BATCH_JOB_QUEUE", job_queue)
+            ingester_lambda.add_environment("INGEST_BATCH_JOB_DEFINITION", job_definition)
+            for setting, variable in [
+                ("lambdaMaxRows", "INGEST_LAMBDA_MAX_ROWS"),
+                ("lambdaMaxBytes", "INGEST_LAMBDA_MAX_BYTES"),
+            ]:
+                if ingester_config.get(setting):
+                    ingester_lambda.add_environment(variable, str(ingester_config[setting]))
+            ingester_lambda.add_to_role_policy(
+                iam.PolicyStatement(
+                    actions=["batch:SubmitJob"],
+                    resources=[
+                        self.format_arn(
+                            service="batch", resource="job-queue", resource_name=job_queue
+                        ),
+                        self.format_arn(
+                            service="batch",
+                            resource="job-definition",
+                            resource_name=f"{job_definition}*",
+                        ),
+                    ],
+                )
+            )
+
+        # Datasets of many files can be copied by S3 Batch Operations jobs, each task invoking the
+        # Ingester to copy one file, run as a role that can read the ingest bucket's job manifests
+        # and write the jobs' completion reports
+        batch_copy_threshold = ingester_config.get("batchCopyThreshold")
+        if batch_copy_threshold:
+            batch_copy_role = iam.Role(
+                self,
+                id="IngesterBatchCopyRole",
+                assumed_by=iam.ServicePrincipal("batchoperations.s3.amazonaws.com"),
+            )
+            self.__ingest_bucket.grant_read_write(batch_copy_role)
+            ingester_lambda.grant_invoke(batch_copy_role)
+            batch_copy_role.grant_pass_role(ingester_lambda.role)
+            ingester_lambda.add_environment("INGEST_BATCH_COPY_ROLE_ARN", batch_copy_role.role_arn)
+            ingester_lambda.add_environment(
+                "INGEST_BATCH_COPY_THRESHOLD", str(batch_copy_threshold)
+            )
+            ingester_lambda.add_to_role_policy(
+                iam.PolicyStatement(actions=["s3:CreateJob", "s3:DescribeJob"], resources=["*"])
+            )
+
     def __build_cataloger_lambda(self) -> None:
         """
         Builds the Cataloger lambda for the registry
@@ -0,0 +1,368 @@
+import asyncio
+import contextlib
+import importlib.util
+import socket
+import unittest
+from unittest.mock import MagicMock, patch
+
+import boto3
+import botocore.exceptions
+from boto3.s3.transfer import TransferConfig
+
+from registry.lambdas.app.core.exceptions import IngesterException
+from registry.lambdas.app.ingest.async_storage import AsyncS3Storage
+from registry.lambdas.app.ingest.ingester import Engine, Ingester
+from registry.lambdas.app.ingest.instrumentation import Instrumentation
+from registry.lambdas.app.ingest.manifest import get_manifest_from_fs
+from registry.lambdas.app.local_utils.entry import get_entries_from_fs
+
+
+class FakeAsyncS3Client:
+    """
+    Just enough of an in-memory asyncio S3 client to run an Ingester. Records the most requests
+    it had in flight at once.
+    """
+
+    def __init__(self):
+        self.objects = dict()
+        self.calls = list()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Event hooks the Ingester's Instrumentation registers on, never emitted
+        self.meta = MagicMock()
+
+    @staticmethod
+    def error(code: str) -> botocore.exceptions.ClientError:
+        return botocore.exceptions.ClientError({"Error": {"Code": code, "Message": code}}, code)
+
+    async def __request(self, operation: str) -> None:
+        self.calls.append(operation)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+
+    async def head_bucket(self, Bucket):
+        await self.__request("head_bucket")
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    async def head_object(self, Bucket, Key):
+        await self.__request("head_object")
+        if (Bucket, Key) not in self.objects:
+            raise self.error("404")
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    async def copy_object(self, CopySource, Bucket, Key):
+        await self.__request("copy_object")
+        self.objects[(Bucket, Key)] = self.objects[(CopySource["Bucket"], CopySource["Key"])]
+
+    async def create_multipart_upload(self, Bucket, Key):
+        await self.__request("create_multipart_upload")
+        return {"UploadId": Key}
+
+    async def upload_part_copy(self, CopySource, CopySourceRange, **kwargs):
+        await self.__request("upload_part_copy")
+        start, stop = CopySourceRange.split("=")[1].split("-")
+        data = self.objects[(CopySource["Bucket"], CopySource["Key"])][int(start) : int(stop) + 1]
+        self.objects[("parts", f"{kwargs['UploadId']}/{kwargs['PartNumber']}")] = data
+        return {"CopyPartResult": {"ETag": str(kwargs["PartNumber"])}}
+
+    async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        await self.__request("complete_multipart_upload")
+        self.objects[(Bucket, Key)] = b"".join(
+            self.objects.pop(("parts", f"{UploadId}/{part['PartNumber']}"))
+            for part in MultipartUpload["Parts"]
+        )
+
+    async def put_object(self, Bucket, Key, Body):
+        await self.__request("put_object")
+        self.objects[(Bucket, Key)] = Body
+
+    async def get_object(self, Bucket, Key):
+        await self.__request("get_object")
+        if (Bucket, Key) not in self.objects:
+            raise self.error("NoSuchKey")
+        body = MagicMock()
+        body.__aenter__.return_value.read.return_value = self.objects[(Bucket, Key)]
+        return {"Body": body}
+
+    async def delete_objects(self, Bucket, Delete):
+        await self.__request("delete_objects")
+        for obj in Delete["Objects"]:
+            self.objects.pop((Bucket, obj["Key"]), None)
+        return {}
+
+    def get_paginator(self, operation):
+        async def paginate(Bucket, Prefix, Delimiter=None):
+            yield {
+                "Contents": [
+                    {"Key": key, "Size": len(data), "ETag": str(hash(data))}
+                    for (bucket, key), data in sorted(self.objects.items())
+                    if bucket == Bucket and key.startswith(Prefix)
+                ]
+            }
+
+        return MagicMock(paginate=paginate)
+
+
+class TestAsyncS3Storage(unittest.TestCase):
+    """
+    Unit tests for the AsyncS3Storage, and the Ingester's asyncio engine
+    """
+
+    resource_path = "test/unit/resources/test_registry/ingest/"
+
+    def setUp(self) -> None:
+        self.client = FakeAsyncS3Client()
+        self.storage = self.create_storage(
+            TransferConfig(multipart_threshold=8, multipart_chunksize=4)
+        )
+
+    def create_storage(self, transfer_config: TransferConfig = None) -> AsyncS3Storage:
+        @contextlib.asynccontextmanager
+        async def client_factory():
+            yield self.client
+
+        return AsyncS3Storage(
+            client_factory=client_factory, max_concurrency=4, transfer_config=transfer_config
+        )
+
+    def tearDown(self) -> None:
+        self.storage.close()
+
+    def test_objects(self) -> None:
+        """
+        Objects can be written, read, sized, listed and deleted
+        """
+        self.storage.check_bucket("ingest")
+        self.storage.put_object("ingest", "job/MMS/a.cdf", b"abc")
+        self.assertEqual(self.storage.get_object("ingest", "job/MMS/a.cdf").read(), b"abc")
+        self.assertIsNone(self.storage.get_object("ingest", "job/MMS/b.cdf"))
+        self.assertEqual(
+            self.storage.get_sizes("ingest", ["job/MMS/a.cdf", "job/MMS/b.cdf"], 1), [3, None]
+        )
+        self.assertEqual(list(self.storage.list_objects("ingest", "job/")["content_length"]), [3])
+        self.assertEqual(self.storage.delete_objects("ingest", ["job/MMS/a.cdf"]), [])
+        self.assertIsNone(self.storage.get_size("ingest", "job/MMS/a.cdf"))
+
+    def test_concurrency(self) -> None:
+        """
+        Requests are issued concurrently from the event loop, up to max_concurrency
+        """
+        keys = [f"job/MMS/{index}.cdf" for index in range(100)]
+        self.assertEqual(self.storage.get_sizes("ingest", keys, 1), [None] * 100)
+        self.assertEqual(self.client.max_in_flight, 4)
+
+    def test_copy(self) -> None:
+        """
+        Files at or above the multipart threshold are copied in parts, and each copy reported
+        """
+        self.storage.put_object("ingest", "job/MMS/small.cdf", b"abc")
+        self.storage.put_object("ingest", "job/MMS/large.cdf", b"0123456789")
+        copied = MagicMock()
+
+        self.storage.copy(
+            "ingest",
+            "registry",
+            [("job/MMS/small.cdf", "MMS/small.cdf", 3), ("job/MMS/large.cdf", "MMS/large.cdf", 10)],
+            copied,
+        )
+
+        self.assertEqual(self.storage.get_object("registry", "MMS/small.cdf").read(), b"abc")
+        self.assertEqual(self.storage.get_object("registry", "MMS/large.cdf").read(), b"0123456789")
+        self.assertEqual(self.client.calls.count("upload_part_copy"), 3)
+        self.assertEqual(copied.call_count, 2)
+
+    def test_copy_workers(self) -> None:
+        """
+        Files are copied by max_concurrency workers, rather than a coroutine pending for each file
+        """
+        copying = MagicMock(current=0, most=0)
+
+        async def copy_file(source_bucket, destination_bucket, file):
+            copying.current += 1
+            copying.most = max(copying.most, copying.current)
+            await asyncio.sleep(0)
+            copying.current -= 1
+
+        files = [(f"job/MMS/{index}.cdf", f"MMS/{index}.cdf", 3) for index in range(100)]
+        copied = MagicMock()
+        with patch.object(self.storage, "_AsyncS3Storage__copy_file", copy_file):
+            self.storage.copy("ingest", "registry", files, copied)
+
+        self.assertEqual(copying.most, 4)
+        self.assertEqual(copied.call_count, 100)
+
+    def test_copy_missing(self) -> None:
+        """
+        Every copy that failed is reported
+        """
+        self.client.copy_object = MagicMock(side_effect=FakeAsyncS3Client.error("NoSuchKey"))
+        with self.assertRaises(IngesterException) as raised:
+            self.storage.copy("ingest", "registry", [("job/MMS/a.cdf", "MMS/a.cdf", 3)])
+        self.assertIn("1 of 1 copies failed", raised.exception.message)
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    def test_ingest(self, ds_repo) -> None:
+        """
+        An Ingester on the asyncio engine installs the same files & index as on the threads engine
+        """
+        manifest_df = get_manifest_from_fs(self.resource_path + "manifest/valid.csv")
+        entry_ds = get_entries_from_fs(self.resource_path + "entry/valid.json")[0]
+        for row in manifest_df.itertuples():
+            self.client.objects[("ingest", f"job/MMS/{row.s3key}")] = b"\0" * row.filesize
+
+        def ingest(storage=None, session=MagicMock()) -> Ingester:
+            return Ingester(
+                ingest_bucket="ingest",
+                ingest_folder="job/",
+                manifest_df=manifest_df,
+                entry_dataset=entry_ds,
+                ds_repo=ds_repo,
+                session=session,
+                storage=storage,
+            ).execute()
+
+        # The threads engine, through a mocked boto3 S3 client
+        session = MagicMock()
+        session.client().head_bucket.return_value = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+        session.client().head_object.side_effect = lambda Bucket, Key: {
+            "ContentLength": len(self.client.objects[(Bucket, Key)])
+        }
+        expected = ingest(session=session)
+        _, expected_index = session.client().put_object.call_args
+
+        storage = self.create_storage()
+        result = ingest(storage=storage)
+        storage.close()
+
+        self.assertEqual(result.files_contributed, expected.files_contributed)
+        self.assertEqual(
+            sorted(key for bucket, key in self.client.objects if bucket == "test"),
+            sorted(
+                "base_data/resources/ingest/dataset_bucket/" + key
+                for key in list(manifest_df["s3key"]) + ["MMS_2015.csv"]
+            ),
+        )
+        self.assertEqual(
+            self.client.objects[("test", "base_data/resources/ingest/dataset_bucket/MMS_2015.csv")],
+            expected_index["Body"],
+        )
+        self.assertFalse(any(bucket == "ingest" for bucket, _ in self.client.objects))
+
+    @patch.dict("sys.modules", {"aiobotocore": None})
+    def test_engine_requires_aiobotocore(self) -> None:
+        """
+        The asyncio engine reports its missing optional dependency
+        """
+        with self.assertRaises(IngesterException) as raised:
+            Ingester(
+                ingest_bucket="ingest",
+                ingest_folder="job/",
+                manifest_df=get_manifest_from_fs(self.resource_path + "manifest/valid.csv"),
+                entry_dataset=get_entries_from_fs(self.resource_path + "entry/valid.json")[0],
+                ds_repo=MagicMock(),
+                session=MagicMock(),
+                engine=Engine.ASYNCIO,
+            )
+        self.assertIn("aiobotocore", raised.exception.message)
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("aiobotocore") and importlib.util.find_spec("moto"),
+    "aiobotocore & moto[server] are required to test against a real asyncio S3 client",
+)
+class TestAsyncS3StorageMotoServer(unittest.TestCase):
+    """
+    Unit tests for the AsyncS3Storage through a real aiobotocore client, its paginators & streamed
+    bodies included, against a moto server
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # pylint: disable=import-outside-toplevel
+        from moto.server import ThreadedMotoServer
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        cls.server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+        cls.server.start()
+        cls.endpoint_url = f"http://127.0.0.1:{port}"
+        cls.credentials = {
+            "region_name": "us-east-1",
+            "aws_access_key_id": "testing",
+            "aws_secret_access_key": "testing",
+        }
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.stop()
+
+    def setUp(self) -> None:
+        s3_client = boto3.client("s3", endpoint_url=self.endpoint_url, **self.credentials)
+        for bucket in ["ingest", "registry"]:
+            s3_client.create_bucket(Bucket=bucket)
+
+        def client_factory():
+            # pylint: disable=import-outside-toplevel
+            import aiobotocore.session
+
+            return aiobotocore.session.get_session().create_client(
+                "s3", endpoint_url=self.endpoint_url, **self.credentials
+            )
+
+        self.storage = AsyncS3Storage(
+            client_factory=client_factory,
+            max_concurrency=4,
+            transfer_config=TransferConfig(
+                multipart_threshold=5 * 1024 * 1024, multipart_chunksize=5 * 1024 * 1024
+            ),
+        )
+
+    def tearDown(self) -> None:
+        self.storage.close()
+
+    def test_objects(self) -> None:
+        """
+        Objects are written, read through their streamed bodies, listed a page at a time, copied
+        (in parts when large) and deleted
+        """
+        self.storage.check_bucket("ingest")
+        keys = [f"job/MMS/{index:04d}.cdf" for index in range(1001)]
+        for key in keys:
+            self.storage.put_object("ingest", key, b"abc")
+        large = b"0123456789" * (1024 * 1024 + 1)
+        self.storage.put_object("ingest", "job/MMS/large.cdf", large)
+
+        self.assertEqual(self.storage.get_object("ingest", keys[0]).read(), b"abc")
+        self.assertIsNone(self.storage.get_object("ingest", "job/MMS/missing.cdf"))
+        self.assertEqual(
+            self.storage.get_sizes("ingest", keys[:2] + ["job/missing"], 2), [3, 3, None]
+        )
+
+        # More keys than fit in one page of a listing
+        self.assertEqual(len(self.storage.list_objects("ingest", "job/")), len(keys) + 1)
+
+        self.storage.copy(
+            "ingest",
+            "registry",
+            [(keys[0], "MMS/small.cdf", 3), ("job/MMS/large.cdf", "MMS/large.cdf", len(large))],
+        )
+        self.assertEqual(self.storage.get_object("registry", "MMS/small.cdf").read(), b"abc")
+        self.assertEqual(self.storage.get_object("registry", "MMS/large.cdf").read(), large)
+
+        self.assertEqual(self.storage.delete_objects("ingest", keys + ["job/MMS/large.cdf"]), [])
+        self.assertTrue(self.storage.list_objects("ingest", "job/").empty)
+
+    def test_instrumentation(self) -> None:
+        """
+        The requests of the aiobotocore client are counted, as those of a boto3 client are
+        """
+        instrumentation = Instrumentation(self.storage.s3_client)
+        with instrumentation.phase("validate"):
+            self.storage.check_bucket("ingest")
+            self.storage.get_sizes("ingest", ["job/MMS/a.cdf", "job/MMS/b.cdf"], 2)
+        instrumentation.close()
+
+        self.assertEqual(instrumentation.phases[0].s3_requests, {"HeadBucket": 1, "HeadObject": 2})
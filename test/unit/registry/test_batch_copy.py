@@ -0,0 +1,219 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from registry.lambdas.app.core.exceptions import IngesterException
+from registry.lambdas.app.ingest.batch_copy import (
+    CopyJob,
+    LocalCopyJobRunner,
+    S3BatchCopyJobRunner,
+    run_copy_tasks,
+    write_copy_manifest,
+)
+from registry.lambdas.app.ingest.ingester import Ingester
+from registry.lambdas.app.ingest.manifest import get_manifest_from_fs
+from registry.lambdas.app.ingest.storage import FileSystemStorage
+from registry.lambdas.app.local_utils.entry import get_entries_from_fs
+
+
+class TestBatchCopy(unittest.TestCase):
+    """
+    Unit tests for installing datasets with S3 Batch Operations copy jobs
+    """
+
+    resource_path = "test/unit/resources/test_registry/ingest/"
+    dataset_folder = "base_data/resources/ingest/dataset_bucket/"
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.storage = FileSystemStorage(root=self.temp_dir.name)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def upload(self, manifest_file: str, missing: int = None):
+        """
+        Upload the files listed in a manifest to an ingest job.
+        :param missing: position of a manifest entry to leave out
+        :return: the manifest
+        """
+        manifest_df = get_manifest_from_fs(manifest_file)
+        for row in manifest_df.itertuples():
+            if row.Index == missing:
+                continue
+            path = os.path.join(self.temp_dir.name, "ingest", "job", "MMS", row.s3key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.truncate(row.filesize)
+        os.makedirs(os.path.join(self.temp_dir.name, "test", self.dataset_folder), exist_ok=True)
+        return manifest_df
+
+    def create_ingester(self, manifest_df, copy_job_runner) -> Ingester:
+        """
+        :return: an Ingester copying every file with the copy job runner
+        """
+        return Ingester(
+            ingest_bucket="ingest",
+            ingest_folder="job/",
+            manifest_df=manifest_df,
+            entry_dataset=get_entries_from_fs(self.resource_path + "entry/valid.json")[0],
+            ds_repo=MagicMock(),
+            session=MagicMock(),
+            storage=self.storage,
+            copy_job_runner=copy_job_runner,
+            batch_copy_threshold=1,
+        )
+
+    def test_install(self) -> None:
+        """
+        A dataset is installed from a copy job's completion report, as if the Ingester had copied
+        its files, and the job's manifest & report are removed
+        """
+        manifest_df = self.upload(self.resource_path + "manifest/valid.csv")
+        runner = LocalCopyJobRunner(self.storage)
+        installed_files = self.create_ingester(manifest_df, runner).install(validate=False)
+
+        self.assertEqual(
+            list(installed_files["key"]),
+            [f"s3://test/{self.dataset_folder}{key}" for key in manifest_df["s3key"]],
+        )
+        for key in manifest_df["s3key"]:
+            self.assertIsNotNone(self.storage.get_size("test", self.dataset_folder + key))
+        self.assertTrue(self.storage.list_objects("ingest", "job/.batch-copy/").empty)
+
+    def test_install_failed_copies(self) -> None:
+        """
+        Files the completion report lists as failed fail the install
+        """
+        manifest_df = self.upload(self.resource_path + "manifest/valid.csv", missing=1)
+        runner = LocalCopyJobRunner(self.storage)
+        with self.assertRaises(IngesterException) as raised:
+            self.create_ingester(manifest_df, runner).install(validate=False)
+        self.assertIn("1 of 4 copies failed", raised.exception.message)
+        self.assertIn(manifest_df["s3key"][1], raised.exception.message)
+
+    def test_run_copy_tasks(self) -> None:
+        """
+        Each task copies its file to where the Ingester installs it, reporting failures
+        """
+        s3_client = MagicMock()
+        s3_client.copy.side_effect = [None, Exception("Access Denied")]
+        event = {
+            "invocationSchemaVersion": "2.0",
+            "invocationId": "invocation",
+            "job": {
+                "id": "job",
+                "userArguments": {
+                    "sourcePrefix": "job/MMS/",
+                    "destinationBucket": "test",
+                    "destinationFolder": "mms/",
+                },
+            },
+            "tasks": [
+                {"taskId": "1", "s3Bucket": "ingest", "s3Key": "job/MMS/2015/file.FTS"},
+                {"taskId": "2", "s3Bucket": "ingest", "s3Key": "job/MMS/2015/file.cdf"},
+            ],
+        }
+
+        response = run_copy_tasks(s3_client, event)
+
+        s3_client.copy.assert_any_call(
+            {"Bucket": "ingest", "Key": "job/MMS/2015/file.FTS"}, "test", "mms/2015/file.fits"
+        )
+        self.assertEqual(response["invocationId"], "invocation")
+        self.assertEqual(
+            [(result["taskId"], result["resultCode"]) for result in response["results"]],
+            [("1", "Succeeded"), ("2", "PermanentFailure")],
+        )
+
+    def test_run_copy_tasks_encoded_keys(self) -> None:
+        """
+        Tasks' keys are URL encoded, as in the job's manifest, and decoded before copying
+        """
+        key = "job/MMS/2015/a file+100%.cdf"
+        _, encoded_key = write_copy_manifest("ingest", [key]).decode("utf-8").strip().split(",")
+        self.assertEqual(encoded_key, "job/MMS/2015/a%20file%2B100%25.cdf")
+        s3_client = MagicMock()
+        event = {
+            "invocationSchemaVersion": "2.0",
+            "invocationId": "invocation",
+            "job": {
+                "id": "job",
+                "userArguments": {
+                    "sourcePrefix": "job/MMS/",
+                    "destinationBucket": "test",
+                    "destinationFolder": "mms/",
+                },
+            },
+            "tasks": [{"taskId": "1", "s3Bucket": "ingest", "s3Key": encoded_key}],
+        }
+
+        response = run_copy_tasks(s3_client, event)
+
+        s3_client.copy.assert_called_once_with(
+            {"Bucket": "ingest", "Key": key}, "test", "mms/2015/a file+100%.cdf"
+        )
+        self.assertEqual(response["results"][0]["resultCode"], "Succeeded")
+
+    def test_s3_batch_copy_job_runner(self) -> None:
+        """
+        Jobs are submitted with the manifest, polled until complete, and their report read
+        """
+        s3control_client, s3_client, sleep = MagicMock(), MagicMock(), MagicMock()
+        s3_client.head_object.return_value = {"ETag": '"etag"'}
+        s3control_client.create_job.return_value = {"JobId": "id"}
+        s3control_client.describe_job.side_effect = [
+            {"Job": {"Status": "Active"}},
+            {"Job": {"Status": "Complete"}},
+        ]
+        objects = {
+            "job/report/job-id/manifest.json": b'{"Results": [{"Bucket": "ingest", "Key": "r.csv"}]}',
+            "r.csv": b"ingest,job/MMS/a%20b.cdf,,succeeded,200,200,Successful\n"
+            b"ingest,job/MMS/c.cdf,,failed,PermanentFailure,500,Access Denied\n",
+        }
+        s3_client.get_object.side_effect = lambda Bucket, Key: {"Body": io.BytesIO(objects[Key])}
+        job = CopyJob(
+            source_bucket="ingest",
+            source_prefix="job/MMS/",
+            destination_bucket="test",
+            destination_folder="mms/",
+            manifest_key="job/manifest.csv",
+            report_prefix="job/report",
+        )
+        runner = S3BatchCopyJobRunner(
+            s3control_client,
+            s3_client,
+            role_arn="arn:aws:iam::123456789012:role/batch",
+            function_arn="arn:aws:lambda:us-east-1:123456789012:function:ingester",
+            sleep=sleep,
+        )
+
+        results = runner.run(job)
+
+        self.assertEqual(
+            results,
+            {"job/MMS/a b.cdf": (True, "Successful"), "job/MMS/c.cdf": (False, "Access Denied")},
+        )
+        _, kwargs = s3control_client.create_job.call_args
+        self.assertEqual(kwargs["AccountId"], "123456789012")
+        self.assertEqual(kwargs["Manifest"]["Location"]["ETag"], '"etag"')
+        self.assertEqual(kwargs["Operation"]["LambdaInvoke"]["UserArguments"], job.user_arguments)
+        sleep.assert_called_once()
+
+        # A failed job fails the install
+        s3control_client.describe_job.side_effect = [
+            {"Job": {"Status": "Failed", "FailureReasons": ["Manifest not found"]}}
+        ]
+        with self.assertRaises(IngesterException):
+            runner.run(job)
+
+    def test_write_copy_manifest(self) -> None:
+        """
+        Keys are URL encoded in a copy job's manifest
+        """
+        self.assertEqual(
+            write_copy_manifest("ingest", ["job/MMS/a b+c.cdf"]),
+            b"ingest,job/MMS/a%20b%2Bc.cdf\n",
+        )
@@ -2,7 +2,7 @@ import json
 import unittest
 from unittest.mock import patch, MagicMock
 from registry.lambdas.app.catalog.cataloger import Cataloger
-from registry.lambdas.app.model.dataset import DataSet
+from registry.lambdas.app.model.dataset import DataSet, IndexType
 
 
 class TestCataloger(unittest.TestCase):
@@ -22,6 +22,7 @@ class TestCataloger(unittest.TestCase):
         a_dataset = DataSet(dataset_id="Set_a", index="s3://bucket1/set_a", title="Dataset a")
         b_dataset = DataSet(dataset_id="Set_b", index="s3://bucket2/set_b", title="Dataset b")
         c_dataset = DataSet(dataset_id="Set_c", index="s3://bucket2/set_c", title="Dataset c")
+        c_dataset.indextype = IndexType.PARQUET
         ds_repo.get_all.return_value = [a_dataset, b_dataset, c_dataset]
 
         # setup boto3 session & client
@@ -69,3 +70,65 @@ class TestCataloger(unittest.TestCase):
         set_c = set_c[0]
         self.assertEqual(c_dataset.title, "Dataset c")
         self.assertEqual(c_dataset.index, "s3://bucket2/set_c")
+
+        # Dataset c's Parquet index files are advertised
+        self.assertEqual(set_c["indextype"], "parquet")
+
+    @patch("boto3.Session")
+    def test_incremental(self, session) -> None:
+        """
+        An incremental Cataloger only regenerates the catalog.json of buckets whose datasets
+        changed, and a run with no changes reads nothing but the revisions & watermarks
+        """
+        datasets = {
+            "Set_a": DataSet(dataset_id="Set_a", index="s3://bucket1/set_a", title="Dataset a"),
+            "Set_b": DataSet(dataset_id="Set_b", index="s3://bucket2/set_b", title="Dataset b"),
+            "Set_c": DataSet(dataset_id="Set_c", index="s3://bucket2/set_c", title="Dataset c"),
+        }
+        revisions = {"Set_a": "1", "Set_b": "1", "Set_c": None}
+        watermarks = {}
+
+        # A catalog tracking the revision of each dataset & the watermark of each bucket
+        ds_repo = MagicMock()
+        ds_repo.get_revisions.side_effect = lambda: [
+            (dataset_id, datasets[dataset_id].index, revision)
+            for dataset_id, revision in revisions.items()
+        ]
+        ds_repo.get_watermarks.side_effect = lambda: dict(watermarks)
+        ds_repo.save_watermark.side_effect = watermarks.__setitem__
+        ds_repo.get_by_dataset_ids.side_effect = lambda ids: [datasets[id] for id in ids]
+        client = session.client.return_value
+        client.get_bucket_location.return_value = {"LocationConstraint": None}
+
+        def run() -> list[str]:
+            client.put_object.reset_mock()
+            ds_repo.get_by_dataset_ids.reset_mock()
+            cataloger = Cataloger(
+                dataset_repository=ds_repo,
+                session=session,
+                name="tester",
+                contact="tester@domain.org",
+                incremental=True,
+            )
+            results = cataloger.execute()
+            self.assertEqual(
+                [call.kwargs["Bucket"] for call in client.put_object.call_args_list],
+                [result.endpoint.replace("s3://", "") for result in results],
+            )
+            return [result.endpoint for result in results]
+
+        # Every bucket is cataloged the first time, and nothing when nothing changed
+        self.assertEqual(run(), ["s3://bucket1", "s3://bucket2"])
+        self.assertEqual(run(), [])
+        ds_repo.get_by_dataset_ids.assert_not_called()
+
+        # Only the bucket of a dataset saved again is cataloged, with all its datasets
+        revisions["Set_c"] = "2"
+        self.assertEqual(run(), ["s3://bucket2"])
+        ds_repo.get_by_dataset_ids.assert_called_once_with(["Set_b", "Set_c"])
+        body = json.loads(client.put_object.call_args.kwargs["Body"].decode())
+        self.assertEqual(len(body["catalog"]), 2)
+
+        # A dataset removed from a bucket changes its catalog too
+        del revisions["Set_b"]
+        self.assertEqual(run(), ["s3://bucket2"])
@@ -0,0 +1,199 @@
+import copy
+import datetime
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from registry.lambdas.app.core.exceptions import IngesterException
+from registry.lambdas.app.ingest.columnar import (
+    ColumnarIngester,
+    format_time,
+    parse_time,
+    read_manifest_columns,
+)
+from registry.lambdas.app.ingest.ingester import Ingester
+from registry.lambdas.app.ingest.manifest import get_manifest_from_fs
+from registry.lambdas.app.ingest.storage import FileSystemStorage
+from registry.lambdas.app.local_utils.entry import get_entries_from_fs
+from registry.lambdas.app.model.dataset import DataSet
+
+
+class TestColumnarIngester(unittest.TestCase):
+    """
+    Unit tests for the pandas-free ingest core, checked against the Ingester
+    """
+
+    resource_path = "test/unit/resources/test_registry/ingest/"
+    dataset_folder = "base_data/resources/ingest/dataset_bucket/"
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.entry_ds = get_entries_from_fs(self.resource_path + "entry/valid.json")[0]
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_times(self) -> None:
+        """
+        Timestamps are parsed & formatted as pandas does
+        """
+        for text in [
+            "2015-09-01T12:11:14Z",
+            "2015-09-01 01:02:03.5",
+            "2015-09-01T00:00:00.123456789+02:00",
+            "1969-12-31T23:59:59.000001Z",
+            "2015-09-01T12:11:14.5z",
+            "2015-09-01",
+        ]:
+            with self.subTest(text=text):
+                timestamp = pd.Timestamp(pd.to_datetime(text, utc=True))
+                self.assertEqual(parse_time(text), timestamp.value)
+                self.assertEqual(format_time(parse_time(text)), str(timestamp))
+
+    def test_utc_designator(self) -> None:
+        """
+        A trailing Z or z is read as UTC, on Pythons whose datetime.fromisoformat reads neither
+        (before 3.11) or only Z
+        """
+        for text, expected in [
+            ("2015-09-01T12:11:14Z", "2015-09-01T12:11:14+00:00"),
+            ("2015-09-01T12:11:14.25Z", "2015-09-01T12:11:14.25+00:00"),
+            ("2015-09-01T12:11:14.25z", "2015-09-01T12:11:14.25+00:00"),
+        ]:
+            with self.subTest(text=text):
+                self.assertEqual(parse_time(text), parse_time(expected))
+
+    def test_read_manifest_columns(self) -> None:
+        """
+        Manifests are read into the same columns as read_manifest's, compressed or not
+        """
+        manifest_file = self.resource_path + "manifest/valid_multiple_years.csv"
+        manifest_df = get_manifest_from_fs(manifest_file)
+        with open(manifest_file, "rb") as manifest:
+            data = manifest.read()
+
+        for filename, body in [("manifest.csv", data), ("manifest.csv.gz", gzip.compress(data))]:
+            with self.subTest(filename=filename):
+                manifest = read_manifest_columns(io.BytesIO(body), filename)
+                self.assertEqual(list(manifest.times), list(manifest_df["time"].astype("int64")))
+                self.assertEqual(manifest.keys, list(manifest_df["s3key"]))
+                self.assertEqual(list(manifest.sizes), list(manifest_df["filesize"]))
+
+        with self.assertRaises(IngesterException):
+            read_manifest_columns(io.BytesIO(b""), "manifest.parquet")
+        with open(self.resource_path + "manifest/missing_header.csv", "rb") as manifest:
+            with self.assertRaises(IngesterException):
+                read_manifest_columns(manifest)
+
+    def ingest(
+        self, engine: str, manifest_file: str, incremental: bool = False, wrong_size: int = None
+    ) -> tuple:
+        """
+        Ingest a manifest into a filesystem with the Ingester or the ColumnarIngester.
+        :param wrong_size: position of a manifest entry to upload a file of the wrong size for
+        :return: the storage ingested into, and the dataset saved to the catalog
+        """
+        root = os.path.join(self.temp_dir.name, engine)
+        storage = FileSystemStorage(root=root)
+        manifest_df = get_manifest_from_fs(manifest_file)
+        for row in manifest_df.itertuples():
+            path = os.path.join(root, "ingest", "job", "MMS", row.s3key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.truncate(row.filesize + (row.Index == wrong_size))
+        os.makedirs(os.path.join(root, "test", self.dataset_folder), exist_ok=True)
+
+        # An incremental ingest adds to an index file & catalog entry from an earlier ingest
+        ds_repo = MagicMock()
+        ds_repo.get_by_dataset_id.return_value = DataSet(
+            dataset_id="MMS",
+            index=self.entry_ds.index,
+            title="MMS data",
+            start=pd.Timestamp("2015-01-01").to_pydatetime(),
+            stop=pd.Timestamp("2015-02-01").to_pydatetime(),
+        )
+        storage.put_object(
+            "test",
+            f"{self.dataset_folder}MMS_2015.csv",
+            b"# startDate, key, size\n'2015-01-01 00:00:00+00:00','s3://test/earlier.cdf','10'\n",
+        )
+
+        options = dict(
+            ingest_bucket="ingest",
+            ingest_folder="job/",
+            entry_dataset=copy.deepcopy(self.entry_ds),
+            ds_repo=ds_repo,
+            session=MagicMock(),
+            incremental=incremental,
+            storage=storage,
+        )
+        if engine == "pandas":
+            result = Ingester(manifest_df=manifest_df, **options).execute()
+        else:
+            with open(manifest_file, "rb") as manifest:
+                manifest = read_manifest_columns(manifest)
+            result = ColumnarIngester(manifest=manifest, **options).execute()
+        self.assertEqual(result.files_contributed, len(manifest_df))
+        (saved,), _ = ds_repo.save.call_args
+        return storage, saved[0]
+
+    def test_execute(self) -> None:
+        """
+        The same files, index files & catalog entry are installed as by the Ingester
+        """
+        for manifest, incremental in [
+            ("valid.csv", False),
+            ("valid_multiple_years.csv", False),
+            ("valid_multiple_years.csv", True),
+        ]:
+            with self.subTest(manifest=manifest, incremental=incremental):
+                manifest_file = self.resource_path + "manifest/" + manifest
+                expected_storage, expected_ds = self.ingest("pandas", manifest_file, incremental)
+                storage, dataset = self.ingest("columnar", manifest_file, incremental)
+
+                listing = storage.list_objects("test", "")
+                self.assertEqual(
+                    list(listing["filename"]),
+                    list(expected_storage.list_objects("test", "")["filename"]),
+                )
+                for key in listing["filename"]:
+                    if key.endswith(".csv"):
+                        self.assertEqual(
+                            storage.get_object("test", key).read(),
+                            expected_storage.get_object("test", key).read(),
+                        )
+                self.assertEqual(dataset.to_serializable_dict(), expected_ds.to_serializable_dict())
+                self.assertTrue(storage.list_objects("ingest", "").empty)
+                self.temp_dir.cleanup()
+                self.temp_dir = tempfile.TemporaryDirectory()
+
+    def test_execute_empty_incremental(self) -> None:
+        """
+        An incremental ingest of an empty manifest keeps the time range of the catalog entry
+        """
+        manifest_file = os.path.join(self.temp_dir.name, "manifest.csv")
+        with open(manifest_file, "w", encoding="UTF-8") as manifest:
+            manifest.write("time,s3key,filesize\n")
+
+        _, dataset = self.ingest("columnar", manifest_file, incremental=True)
+
+        self.assertEqual(dataset.start, datetime.datetime(2015, 1, 1, tzinfo=datetime.timezone.utc))
+        self.assertEqual(dataset.stop, datetime.datetime(2015, 2, 1, tzinfo=datetime.timezone.utc))
+
+    def test_execute_invalid(self) -> None:
+        """
+        Invalid manifest entries are reported as the Ingester reports them
+        """
+        manifest_file = self.resource_path + "manifest/valid.csv"
+        messages = []
+        for engine in ["pandas", "columnar"]:
+            with self.assertRaises(IngesterException) as raised:
+                self.ingest(engine, manifest_file, wrong_size=1)
+            messages.append(raised.exception.message)
+        self.assertIn("Status: WRONG_SIZE", messages[0])
+        self.assertEqual(messages[1], messages[0])
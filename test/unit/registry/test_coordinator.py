@@ -0,0 +1,233 @@
+import io
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+from botocore.exceptions import ClientError
+
+from registry.lambdas.app.core.exceptions import IngesterException
+from registry.lambdas.app.ingest.coordinator import (
+    LocalShardExecutor,
+    Shard,
+    ShardedIngester,
+    load_shard_manifest,
+    load_shard_records,
+    save_shard_manifest,
+    save_shard_records,
+)
+from registry.lambdas.app.ingest.ingester import Ingester
+from registry.lambdas.app.ingest.manifest import get_manifest_from_fs
+from registry.lambdas.app.local_utils.entry import get_entries_from_fs
+
+
+class TestShardedIngester(unittest.TestCase):
+    """
+    Unit tests for sharded ingest jobs
+    """
+
+    entries_local_file = "test/unit/resources/test_registry/ingest/entry/valid.json"
+    manifest_file = "test/unit/resources/test_registry/ingest/manifest/valid.csv"
+    ingest_bucket = "s3://my_bucket_name"
+    ingest_folder = "ingest_folder/"
+
+    def setUp(self) -> None:
+        self.manifest_df = get_manifest_from_fs(manifest_file=self.manifest_file)
+        self.entry_ds = get_entries_from_fs(self.entries_local_file)[0]
+
+    def create_ingester(self, session, ds_repo, manifest_df, **kwargs) -> Ingester:
+        return Ingester(
+            ingest_bucket=self.ingest_bucket,
+            ingest_folder=self.ingest_folder,
+            entry_dataset=self.entry_ds,
+            manifest_df=manifest_df,
+            ds_repo=ds_repo,
+            session=session,
+            **kwargs,
+        )
+
+    def create_sharded_ingester(self, session, ds_repo, worker) -> ShardedIngester:
+        return ShardedIngester(
+            ingester=self.create_ingester(session, ds_repo, self.manifest_df),
+            ingest_folder=self.ingest_folder,
+            dataset_id=self.entry_ds.dataset_id,
+            manifest_df=self.manifest_df,
+            executor=LocalShardExecutor(worker, max_workers=2),
+            shard_size=3,
+        )
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_shards(self, session, ds_repo) -> None:
+        """
+        The manifest is split into contiguous shards of at most shard_size entries
+        """
+        sharded_ingester = self.create_sharded_ingester(session, ds_repo, worker=None)
+        self.assertEqual(
+            [(shard.index, shard.start, shard.stop) for shard in sharded_ingester.shards],
+            [(0, 0, 3), (1, 3, 4)],
+        )
+        self.assertEqual(
+            sharded_ingester.shards[1].records_key, "ingest_folder/.shards/MMS/00001.csv"
+        )
+
+        with self.assertRaises(IngesterException):
+            ShardedIngester(
+                ingester=None,
+                ingest_folder=self.ingest_folder,
+                dataset_id="MMS",
+                manifest_df=self.manifest_df,
+                executor=None,
+                shard_size=0,
+            )
+
+    def mock_ingest_bucket(self, session) -> None:
+        sizes = {
+            os.path.join(self.ingest_folder, "MMS", row.s3key): row.filesize
+            for row in self.manifest_df.itertuples()
+        }
+        session.client().head_bucket = MagicMock(
+            return_value={"ResponseMetadata": {"HTTPStatusCode": 200}}
+        )
+        session.client().head_object = MagicMock(
+            side_effect=lambda Bucket, Key: {"ContentLength": sizes[Key]}
+        )
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_execute(self, session, ds_repo) -> None:
+        """
+        The manifest is validated, each shard installs its slice of the manifest, then the dataset
+        is indexed & cataloged once
+        """
+        self.mock_ingest_bucket(session)
+
+        def worker(shard: Shard, manifest_df):
+            self.assertTrue(manifest_df.equals(self.manifest_df.iloc[shard.start : shard.stop]))
+            return self.create_ingester(
+                session, ds_repo, manifest_df, shard_index=shard.index
+            ).install(validate=False)
+
+        result = self.create_sharded_ingester(session, ds_repo, worker).execute()
+
+        # Every file was validated once, by the coordinator, and copied once, by one of the shards
+        self.assertEqual(session.client().head_object.call_count, 4)
+        self.assertEqual(session.client().copy_object.call_count, 4)
+
+        # A single index file & catalog update covering the whole manifest
+        self.assertEqual(session.client().put_object.call_count, 1)
+        self.assertEqual(ds_repo.save.call_count, 1)
+        self.assertEqual(session.client().delete_objects.call_count, 1)
+        self.assertEqual(result.dataset_updated, "MMS")
+        self.assertEqual(result.files_contributed, 4)
+
+        # The coordinator measures the phases it ran itself
+        self.assertEqual(
+            [phase.phase for phase in result.phases],
+            ["validate_destination", "validate_manifest", "index", "catalog", "clean_up"],
+        )
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_execute_shard_failed(self, session, ds_repo) -> None:
+        """
+        Nothing is indexed or cataloged if any shard failed
+        """
+
+        self.mock_ingest_bucket(session)
+
+        def worker(shard: Shard, _):
+            if shard.index == 1:
+                raise IngesterException("oops")
+            return self.manifest_df
+
+        with self.assertRaises(IngesterException) as context:
+            self.create_sharded_ingester(session, ds_repo, worker).execute()
+
+        self.assertEqual(
+            context.exception.message,
+            "Error installing shards. 1 of 2 shards failed.\n\tShard: 1 (rows 3-4) - Error: oops",
+        )
+        session.client().put_object.assert_not_called()
+        ds_repo.save.assert_not_called()
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_execute_duplicates(self, session, ds_repo) -> None:
+        """
+        Keys listed in more than one shard fail the ingest before any shard is installed
+        """
+        self.mock_ingest_bucket(session)
+        self.manifest_df.loc[3, "s3key"] = self.manifest_df.loc[0, "s3key"]
+        worker = MagicMock()
+
+        with self.assertRaises(IngesterException) as context:
+            self.create_sharded_ingester(session, ds_repo, worker).execute()
+
+        self.assertIn(
+            "Only 2 records were valid out of 4 files checked.", context.exception.message
+        )
+        self.assertEqual(context.exception.message.count("DUPLICATE"), 2)
+        worker.assert_not_called()
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_execute_invalid(self, session, ds_repo) -> None:
+        """
+        A missing file in the last shard fails the ingest before any shard is installed
+        """
+        self.mock_ingest_bucket(session)
+        missing_key = os.path.join(self.ingest_folder, "MMS", self.manifest_df.loc[3, "s3key"])
+        head_object = session.client().head_object.side_effect
+
+        def head_missing(Bucket, Key):
+            if Key == missing_key:
+                raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+            return head_object(Bucket=Bucket, Key=Key)
+
+        session.client().head_object = MagicMock(side_effect=head_missing)
+        worker = MagicMock()
+
+        with self.assertRaises(IngesterException) as context:
+            self.create_sharded_ingester(session, ds_repo, worker).execute()
+
+        self.assertIn(f"File: {missing_key} - Status: NOT_FOUND", context.exception.message)
+        worker.assert_not_called()
+        session.client().copy_object.assert_not_called()
+
+    def test_shard_manifest(self) -> None:
+        """
+        A shard's rows of the manifest survive the round trip through the ingest bucket
+        """
+        shard = Shard(ingest_folder=self.ingest_folder, dataset_id="MMS", index=1, start=2, stop=4)
+        manifest_df = self.manifest_df.iloc[shard.start : shard.stop]
+        s3_client = MagicMock()
+        save_shard_manifest(s3_client, self.ingest_bucket, shard, manifest_df)
+        _, kwargs = s3_client.put_object.call_args
+        self.assertEqual(kwargs["Key"], "ingest_folder/.shards/MMS/00001.manifest.csv")
+
+        s3_client.get_object = MagicMock(return_value={"Body": io.BytesIO(kwargs["Body"])})
+        self.assertTrue(
+            load_shard_manifest(s3_client, self.ingest_bucket, shard).equals(manifest_df)
+        )
+
+    def test_shard_records(self) -> None:
+        """
+        The files installed by a shard survive the round trip through the ingest bucket
+        """
+        shard = Shard(ingest_folder=self.ingest_folder, dataset_id="MMS", index=2, start=0, stop=4)
+        installed_files = self.manifest_df.rename(
+            columns={"time": "startDate", "s3key": "key", "filesize": "size"}
+        )
+        s3_client = MagicMock()
+        save_shard_records(s3_client, self.ingest_bucket, shard, installed_files)
+        _, kwargs = s3_client.put_object.call_args
+        self.assertEqual(kwargs["Key"], "ingest_folder/.shards/MMS/00002.csv")
+
+        s3_client.get_object = MagicMock(return_value={"Body": io.BytesIO(kwargs["Body"])})
+        loaded = load_shard_records(s3_client, self.ingest_bucket, shard)
+        self.assertTrue(loaded["startDate"].equals(installed_files["startDate"]))
+        self.assertEqual(list(loaded["key"]), list(installed_files["key"]))
+        self.assertEqual(list(loaded["size"]), list(installed_files["size"]))
+        s3_client.delete_object.assert_called_once_with(
+            Bucket=self.ingest_bucket, Key="ingest_folder/.shards/MMS/00002.csv"
+        )
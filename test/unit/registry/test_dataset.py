@@ -87,3 +87,10 @@ class TestDataSet(unittest.TestCase):
             FileType(bad_extension)
 
         self.assertFalse(FileType.is_valid_file_type(bad_extension))
+
+    def test_filetype_by_extension(self):
+        by_extension = FileType.by_extension()
+        for exts in self.ext_list:
+            for ext in exts:
+                self.assertEqual(by_extension[ext], FileType(ext))
+        self.assertNotIn("badextension", by_extension)
@@ -0,0 +1,94 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+import pyarrow.parquet
+
+from registry.lambdas.app.ingest.index_file import (
+    IndexBuilder,
+    get_index_file_extension,
+    read_index_file,
+    write_index_file,
+)
+from registry.lambdas.app.model.dataset import IndexType
+
+
+class TestIndexFile(unittest.TestCase):
+    """
+    Unit tests for reading & writing index files
+    """
+
+    index_df = pd.DataFrame(
+        {
+            "startDate": pd.to_datetime(
+                ["2015-09-01 12:20:54", "2015-09-01 12:11:14", "2015-01-01 00:00:00"], utc=True
+            ),
+            "key": ["s3://bucket/b.cdf", "s3://bucket/a.cdf", "s3://bucket/old.cdf"],
+            "size": [20, 10, 30],
+        }
+    )
+
+    def test_extension(self) -> None:
+        self.assertEqual(get_index_file_extension(IndexType.CSV), "csv")
+        self.assertEqual(get_index_file_extension(IndexType.PARQUET), "parquet")
+
+    def test_csv(self) -> None:
+        """
+        CSV indexes keep the order of the files provided, and read back with the same values
+        """
+        data = write_index_file(self.index_df, IndexType.CSV)
+        self.assertEqual(
+            data.decode("UTF-8").splitlines()[:2],
+            [
+                "# startDate, key, size",
+                "'2015-09-01 12:20:54+00:00','s3://bucket/b.cdf','20'",
+            ],
+        )
+
+        index_df = read_index_file(io.BytesIO(data), IndexType.CSV)
+        pd.testing.assert_frame_equal(index_df, self.index_df.astype({"key": "string"}))
+
+    @patch("registry.lambdas.app.ingest.index_file.DEFAULT_INDEX_ROW_GROUP_SIZE", 2)
+    def test_parquet(self) -> None:
+        """
+        Parquet indexes are typed, sorted by startDate and split into row groups
+        """
+        data = write_index_file(self.index_df, IndexType.PARQUET)
+
+        parquet_file = pyarrow.parquet.ParquetFile(io.BytesIO(data))
+        self.assertEqual(
+            [str(field.type) for field in parquet_file.schema_arrow],
+            ["timestamp[us, tz=UTC]", "string", "int64"],
+        )
+        self.assertEqual(parquet_file.num_row_groups, 2)
+        statistics = parquet_file.metadata.row_group(1).column(0).statistics
+        self.assertEqual(statistics.min, pd.Timestamp("2015-09-01 12:20:54", tz="UTC"))
+
+        index_df = read_index_file(io.BytesIO(data), IndexType.PARQUET)
+        self.assertEqual(list(index_df["size"]), [30, 10, 20])
+        pd.testing.assert_frame_equal(
+            index_df,
+            self.index_df.sort_values("startDate").reset_index(drop=True).astype({"key": "string"}),
+        )
+
+    def test_index_builder(self) -> None:
+        """
+        Files added a chunk at a time are spilled to disk, and merged back by year in the order
+        they were added
+        """
+        with tempfile.TemporaryDirectory() as spill_dir:
+            index = IndexBuilder(spill_dir=spill_dir)
+            index.add(self.index_df.iloc[:1])
+            index.add(self.index_df.iloc[1:])
+            self.assertEqual(index.files, 3)
+            self.assertEqual(len(os.listdir(os.path.join(spill_dir, os.listdir(spill_dir)[0]))), 2)
+
+            years = dict(index.years())
+            self.assertEqual(list(years), [2015])
+            pd.testing.assert_frame_equal(years[2015], self.index_df)
+
+            index.close()
+            self.assertEqual(os.listdir(spill_dir), [])
@@ -0,0 +1,364 @@
+import dataclasses
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from registry.lambdas.app import ingest_batch, ingest_lambda
+from registry.lambdas.app.aws_utils.lambdas import RESOURCE_CACHE
+from registry.lambdas.app.core.exceptions import IngesterException
+from registry.lambdas.app.ingest.ingester import Result
+from registry.lambdas.app.ingest.manifest import get_manifest_from_fs
+from registry.lambdas.app.local_utils.entry import get_entries_from_fs
+
+
+class TestIngestLambda(unittest.TestCase):
+    """
+    Unit tests for the Ingester lambda's handler
+    """
+
+    entries_local_file = "test/unit/resources/test_registry/ingest/entry/valid.json"
+
+    def setUp(self) -> None:
+        RESOURCE_CACHE.clear()
+
+    def tearDown(self) -> None:
+        RESOURCE_CACHE.clear()
+
+    @patch.dict(os.environ, {"ingest_bucket": "ingest", "INGEST_DATASET_PARALLELISM": "2"})
+    @patch("registry.lambdas.app.ingest_lambda.run_ingester")
+    @patch("registry.lambdas.app.ingest_lambda.get_manifest_from_s3")
+    @patch("registry.lambdas.app.ingest_lambda.find_manifest_key")
+    @patch("registry.lambdas.app.ingest_lambda.get_dataset_entries_from_s3")
+    @patch("registry.lambdas.app.ingest_lambda.get_dataset_repository")
+    @patch("boto3.session.Session")
+    def test_handler(
+        self, session, get_dataset_repository, get_entries, find_manifest_key, _, run_ingester
+    ) -> None:
+        """
+        Datasets are ingested concurrently, sharing one catalog connection, each with an S3 client
+        no other dataset uses at the same time, and a dataset that fails to ingest doesn't fail
+        the others
+        """
+        entry_ds = get_entries_from_fs(self.entries_local_file)[0]
+        get_entries.return_value = [
+            dataclasses.replace(entry_ds, dataset_id=str(index)) for index in range(3)
+        ]
+        find_manifest_key.side_effect = lambda *args, **kwargs: f"{args[2]}manifest.csv"
+        session.return_value.client.side_effect = lambda *args, **kwargs: MagicMock()
+        lock, clients_in_use = threading.Lock(), set()
+
+        def run(session, bucket, folder, entry_ds, manifest_df, options, **resources):
+            with lock:
+                self.assertNotIn(resources["s3_client"], clients_in_use)
+                clients_in_use.add(resources["s3_client"])
+            time.sleep(0.01)
+            with lock:
+                clients_in_use.remove(resources["s3_client"])
+            if entry_ds.dataset_id == "1":
+                raise IngesterException("Invalid manifest")
+            return Result(dataset_updated=entry_ds.dataset_id, files_contributed=2)
+
+        run_ingester.side_effect = run
+
+        result = ingest_lambda.handler({"job_folder": "job/"}, None)
+
+        # Every dataset is reported in the order of the entries file, only the failure with an error
+        self.assertEqual(
+            [(update["dataset"], update["error"]) for update in result["updates"]],
+            [("0", None), ("1", "Invalid manifest"), ("2", None)],
+        )
+        self.assertEqual(result["updates"][2]["num_files_updated"], 2)
+
+        # The catalog was shared by every dataset, and an S3 client by the datasets not ingested
+        # at the same time
+        get_dataset_repository.assert_called_once()
+        for _, kwargs in run_ingester.call_args_list:
+            self.assertIs(kwargs["ds_repo"], get_dataset_repository.return_value)
+        self.assertEqual(len({kwargs["s3_client"] for _, kwargs in run_ingester.call_args_list}), 2)
+        self.assertEqual(session.return_value.client.call_count, 2)
+
+    @patch.dict(os.environ, {"ingest_bucket": "ingest", "INGEST_ENGINE": "COLUMNAR"})
+    @patch("registry.lambdas.app.ingest_lambda.run_ingester")
+    @patch("registry.lambdas.app.ingest_lambda.run_columnar_ingester")
+    @patch("registry.lambdas.app.ingest_lambda.get_manifest_from_s3")
+    @patch("registry.lambdas.app.ingest_lambda.find_manifest_key")
+    @patch("registry.lambdas.app.ingest_lambda.get_dataset_entries_from_s3")
+    @patch("registry.lambdas.app.ingest_lambda.get_dataset_repository")
+    @patch("boto3.session.Session")
+    def test_handler_columnar(
+        self, _, __, get_entries, find_manifest_key, ___, run_columnar_ingester, run_ingester
+    ) -> None:
+        """
+        The columnar engine ingests the datasets it can without pandas, and the Ingester the rest
+        """
+        entry_ds = get_entries_from_fs(self.entries_local_file)[0]
+        get_entries.return_value = [entry_ds]
+        run_columnar_ingester.return_value = run_ingester.return_value = Result()
+
+        for manifest_key, event, resumable, columnar in [
+            ("job/MMS/manifest.csv", {}, "false", True),
+            ("job/MMS/manifest.csv.gz", {"incremental": True}, "false", True),
+            ("job/MMS/manifest.parquet", {}, "false", False),
+            ("job/MMS/manifest.csv", {"skip_unchanged": True}, "false", False),
+            # A ColumnarIngester can't resume a job, so only runs those that aren't resumable
+            ("job/MMS/manifest.csv", {}, "true", False),
+        ]:
+            with self.subTest(manifest_key=manifest_key, event=event, resumable=resumable):
+                RESOURCE_CACHE.clear()
+                run_columnar_ingester.reset_mock()
+                run_ingester.reset_mock()
+                find_manifest_key.return_value = manifest_key
+
+                with patch.dict(os.environ, {"INGEST_RESUMABLE": resumable}):
+                    ingest_lambda.handler({"job_folder": "job/", **event}, None)
+
+                self.assertEqual(run_columnar_ingester.called, columnar)
+                self.assertEqual(run_ingester.called, not columnar)
+
+    @patch.dict(
+        os.environ,
+        {
+            "ingest_bucket": "ingest",
+            "INGEST_BATCH_JOB_QUEUE": "queue",
+            "INGEST_BATCH_JOB_DEFINITION": "ingester",
+            "INGEST_LAMBDA_MAX_ROWS": "3",
+        },
+    )
+    @patch("registry.lambdas.app.ingest_lambda.ingest_job")
+    @patch("registry.lambdas.app.ingest_lambda.iter_manifest_from_s3")
+    @patch("registry.lambdas.app.ingest_lambda.find_manifest_key")
+    @patch("registry.lambdas.app.ingest_lambda.get_dataset_entries_from_s3")
+    @patch("boto3.session.Session")
+    def test_handler_dispatch(
+        self, session, get_entries, find_manifest_key, iter_manifest, ingest_job
+    ) -> None:
+        """
+        Ingest jobs with more manifest entries than the lambda's limit are submitted to AWS Batch
+        """
+        entry_ds = get_entries_from_fs(self.entries_local_file)[0]
+        get_entries.return_value = [entry_ds, entry_ds]
+        find_manifest_key.return_value = "job/MMS/manifest.csv"
+        batch_client = session.return_value.client.return_value
+        batch_client.submit_job.return_value = {"jobId": "id", "jobName": "ingest-job"}
+
+        for rows, backend, submitted in [
+            (1, None, False),
+            (2, None, True),
+            (2, "LAMBDA", False),
+            (1, "BATCH", True),
+        ]:
+            with self.subTest(rows=rows, backend=backend):
+                RESOURCE_CACHE.clear()
+                batch_client.reset_mock()
+                ingest_job.reset_mock()
+                iter_manifest.side_effect = lambda **kwargs: iter(
+                    [pd.DataFrame({"filesize": [10] * rows})]  # pylint: disable=cell-var-from-loop
+                )
+                event = {"job_folder": "job/", "incremental": True, "backend": backend}
+
+                result = ingest_lambda.handler(event, None)
+
+                if submitted:
+                    self.assertEqual(
+                        result["batch_job"], {"job_id": "id", "job_name": "ingest-job"}
+                    )
+                    ingest_job.assert_not_called()
+                    _, kwargs = batch_client.submit_job.call_args
+                    self.assertEqual(
+                        kwargs["containerOverrides"]["command"],
+                        ["python", "-m", "app.ingest_batch", "job/", "--incremental"],
+                    )
+                    self.assertNotIn("environment", kwargs["containerOverrides"])
+                else:
+                    self.assertIs(result, ingest_job.return_value)
+                    batch_client.submit_job.assert_not_called()
+
+                    # The lambda never shards a manifest itself
+                    _, kwargs = ingest_job.call_args
+                    self.assertEqual(kwargs["shard_size"], 0)
+
+    @patch.dict(
+        os.environ,
+        {
+            "ingest_bucket": "ingest",
+            "INGEST_BATCH_JOB_QUEUE": "queue",
+            "INGEST_BATCH_JOB_DEFINITION": "ingester",
+            "INGEST_SHARD_SIZE": "2",
+            "AWS_LAMBDA_FUNCTION_NAME": "Ingester",
+        },
+    )
+    @patch("registry.lambdas.app.ingest_lambda.ingest_job")
+    @patch("registry.lambdas.app.ingest_lambda.iter_manifest_from_s3")
+    @patch("registry.lambdas.app.ingest_lambda.find_manifest_key")
+    @patch("registry.lambdas.app.ingest_lambda.get_dataset_entries_from_s3")
+    @patch("boto3.session.Session")
+    def test_handler_dispatch_sharded(
+        self, session, get_entries, find_manifest_key, iter_manifest, ingest_job
+    ) -> None:
+        """
+        Ingest jobs with more manifest entries than the shard size are submitted to AWS Batch, for
+        the batch worker to shard across invocations of the lambda
+        """
+        get_entries.return_value = [get_entries_from_fs(self.entries_local_file)[0]]
+        find_manifest_key.return_value = "job/MMS/manifest.csv"
+        iter_manifest.side_effect = lambda **kwargs: iter([pd.DataFrame({"filesize": [10] * 3})])
+        batch_client = session.return_value.client.return_value
+        batch_client.submit_job.return_value = {"jobId": "id", "jobName": "ingest-job"}
+
+        result = ingest_lambda.handler({"job_folder": "job/"}, None)
+
+        self.assertEqual(result["batch_job"], {"job_id": "id", "job_name": "ingest-job"})
+        ingest_job.assert_not_called()
+        _, kwargs = batch_client.submit_job.call_args
+        self.assertEqual(
+            kwargs["containerOverrides"]["environment"],
+            [
+                {"name": "INGEST_SHARD_SIZE", "value": "2"},
+                {"name": "INGEST_SHARD_FUNCTION", "value": "Ingester"},
+            ],
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "ingest_bucket": "ingest",
+            "INGEST_BATCH_JOB_QUEUE": "queue",
+            "INGEST_BATCH_JOB_DEFINITION": "ingester",
+            "INGEST_BATCH_COPY_ROLE_ARN": "arn:aws:iam::123456789012:role/copy",
+            "INGEST_BATCH_COPY_THRESHOLD": "1000",
+            "AWS_LAMBDA_FUNCTION_NAME": "Ingester",
+        },
+    )
+    @patch("registry.lambdas.app.ingest_lambda.iter_manifest_from_s3")
+    @patch("registry.lambdas.app.ingest_lambda.find_manifest_key")
+    @patch("boto3.session.Session")
+    def test_dispatch_job_batch_copy(self, session, _, iter_manifest) -> None:
+        """
+        Jobs with enough files to be copied by copy jobs are submitted to AWS Batch, as only the
+        batch worker waits on copy jobs, and passed the settings of the copy jobs
+        """
+        entry_ds = get_entries_from_fs(self.entries_local_file)[0]
+        iter_manifest.side_effect = lambda **kwargs: iter([pd.DataFrame({"filesize": [10] * 1000})])
+        batch_client = session.return_value.client.return_value
+        batch_client.submit_job.return_value = {"jobId": "id", "jobName": "ingest-job"}
+
+        batch_job = ingest_lambda.dispatch_job(session(), "ingest", "job/", [entry_ds], {})
+
+        self.assertEqual(batch_job, {"job_id": "id", "job_name": "ingest-job"})
+
+        _, kwargs = batch_client.submit_job.call_args
+        self.assertEqual(
+            kwargs["containerOverrides"]["environment"],
+            [
+                {
+                    "name": "INGEST_BATCH_COPY_ROLE_ARN",
+                    "value": "arn:aws:iam::123456789012:role/copy",
+                },
+                {"name": "INGEST_BATCH_COPY_THRESHOLD", "value": "1000"},
+                {"name": "INGEST_BATCH_COPY_FUNCTION", "value": "Ingester"},
+            ],
+        )
+
+    @patch.dict(
+        os.environ,
+        {"INGEST_BATCH_COPY_ROLE_ARN": "arn:aws:iam::123456789012:role/copy"},
+        clear=True,
+    )
+    def test_get_copy_job_runner(self) -> None:
+        """
+        Only the batch worker runs copy jobs, which need the lambda their tasks invoke to be named
+        """
+        session = MagicMock(region_name="us-east-1")
+        with self.assertRaises(IngesterException) as context:
+            ingest_lambda.get_copy_job_runner(session)
+        self.assertEqual(
+            context.exception.message,
+            "INGEST_BATCH_COPY_FUNCTION must name the Ingester lambda outside of the lambda.",
+        )
+
+        with patch.dict(os.environ, {"INGEST_BATCH_COPY_FUNCTION": "Ingester"}):
+            with patch.object(ingest_lambda, "get_client"):
+                self.assertIsNotNone(ingest_lambda.get_copy_job_runner(session))
+
+        # The lambda never waits on a copy job
+        with patch.dict(os.environ, {"AWS_LAMBDA_FUNCTION_NAME": "Ingester"}):
+            self.assertIsNone(ingest_lambda.get_copy_job_runner(session))
+
+    def test_get_function_name(self) -> None:
+        """
+        Outside of the lambda, the lambda is named by an environment variable
+        """
+        with patch.dict(os.environ, {"AWS_LAMBDA_FUNCTION_NAME": "Ingester"}):
+            self.assertEqual(ingest_lambda.get_function_name("INGEST_SHARD_FUNCTION"), "Ingester")
+        with patch.dict(os.environ, {"INGEST_SHARD_FUNCTION": "Other"}):
+            self.assertEqual(ingest_lambda.get_function_name("INGEST_SHARD_FUNCTION"), "Other")
+        with patch.dict(os.environ, clear=True):
+            with self.assertRaises(IngesterException) as context:
+                ingest_lambda.get_function_name("INGEST_SHARD_FUNCTION")
+            self.assertEqual(
+                context.exception.message,
+                "INGEST_SHARD_FUNCTION must name the Ingester lambda outside of the lambda.",
+            )
+
+    @patch.dict(os.environ, {"ingest_bucket": "ingest"})
+    @patch("registry.lambdas.app.ingest_batch.ingest_job")
+    @patch("registry.lambdas.app.ingest_batch.get_entries")
+    @patch("boto3.session.Session")
+    def test_ingest_batch(self, _, get_entries, ingest_job) -> None:
+        """
+        The batch worker ingests a job as the lambda does, sharding it as configured, and exits
+        with an error status if any of its datasets failed
+        """
+        for error, status in [(None, 0), ("Invalid manifest", 1)]:
+            with self.subTest(error=error):
+                ingest_job.return_value = {
+                    "num_datasets_updated": 1,
+                    "updates": [{"dataset": "MMS", "num_files_updated": 0, "error": error}],
+                }
+                self.assertEqual(ingest_batch.main(["job/", "--skip-unchanged"]), status)
+                args, kwargs = ingest_job.call_args
+                self.assertEqual(args[1:4], ("ingest", "job/", get_entries.return_value))
+                self.assertEqual(args[4], {"incremental": False, "skip_unchanged": True})
+                self.assertNotIn("shard_size", kwargs)
+
+    @patch("registry.lambdas.app.ingest_batch.get_dataset_repository")
+    @patch("boto3.session.Session")
+    def test_ingest_batch_storage_root(self, _, get_dataset_repository) -> None:
+        """
+        The batch worker ingests a job from and into folders of a filesystem, removing the job's
+        manifest & entries file once ingested
+        """
+        resource_path = "test/unit/resources/test_registry/ingest/"
+        manifest_df = get_manifest_from_fs(resource_path + "manifest/valid.csv")
+        with tempfile.TemporaryDirectory() as root:
+            job_path = os.path.join(root, "ingest", "job")
+            for row in manifest_df.itertuples():
+                path = os.path.join(job_path, "MMS", row.s3key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as file:
+                    file.truncate(row.filesize)
+            # The manifest is in the folder named for the dataset's bucket, as in the lambda
+            manifest_file = os.path.join(job_path, "dataset_bucket", "manifest.csv")
+            os.makedirs(os.path.dirname(manifest_file))
+            shutil.copy(resource_path + "manifest/valid.csv", manifest_file)
+            shutil.copy(self.entries_local_file, os.path.join(job_path, "entries.json"))
+            dataset_path = os.path.join(root, "test", "base_data/resources/ingest/dataset_bucket")
+            os.makedirs(dataset_path)
+
+            status = ingest_batch.main(
+                ["job/", "--ingest-bucket", "ingest", "--storage-root", root]
+            )
+
+            self.assertEqual(status, 0)
+            for key in manifest_df["s3key"]:
+                self.assertTrue(os.path.exists(os.path.join(dataset_path, key)))
+            self.assertTrue(os.path.exists(os.path.join(dataset_path, "MMS_2015.csv")))
+            self.assertFalse(os.path.exists(manifest_file))
+            self.assertFalse(os.path.exists(os.path.join(job_path, "entries.json")))
+            get_dataset_repository.return_value.save.assert_called_once()
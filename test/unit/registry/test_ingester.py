@@ -1,3 +1,6 @@
+import datetime
+import gzip
+import io
 import json
 import os
 import unittest
@@ -5,12 +8,14 @@ import unittest
 import pandas as pd
 
 import botocore.exceptions
+from boto3.s3.transfer import TransferConfig
 from unittest.mock import patch, MagicMock
-from registry.lambdas.app.ingest.ingester import Ingester
+from registry.lambdas.app.ingest.ingester import Ingester, ValidationMode
 from registry.lambdas.app.local_utils.entry import get_entries_from_fs
 from registry.lambdas.app.ingest.manifest import get_manifest_from_fs
 from registry.lambdas.app.aws_utils.s3 import get_bucket_subfolder
 from registry.lambdas.app.core.exceptions import IngesterException
+from registry.lambdas.app.model.dataset import FileType, IndexType
 
 
 class TestIngester(unittest.TestCase):
@@ -33,7 +38,7 @@ class TestIngester(unittest.TestCase):
         + "\tFile: ingest_folder/MMS/mms1/fgm/brst/l2/2015/09/01/mms1_fgm_brst_l2_20150901174500_v4.18.0.{0} - Status: {1}"
     )
 
-    def create_ingester(self, session, ds_repo, manifest_filename="valid.csv"):
+    def create_ingester(self, session, ds_repo, manifest_filename="valid.csv", **kwargs):
         """ """
         manifest_file = TestIngester.resource_path + manifest_filename
         manifest_df = get_manifest_from_fs(manifest_file=manifest_file)
@@ -46,6 +51,7 @@ class TestIngester(unittest.TestCase):
             manifest_df=manifest_df,
             ds_repo=ds_repo,
             session=session,
+            **kwargs,
         )
         return base_ingester
 
@@ -134,11 +140,200 @@ class TestIngester(unittest.TestCase):
         except IngesterException as exception:
             self.assertEqual(exception.message, self.error_template.format("bad", "BAD_EXTENSION"))
 
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_manifest_valid_concurrent(self, session, ds_repo) -> None:
+        """
+        Validate a manifest with a pool of workers, checking every file is HEADed once
+        and the validation rate is reported
+        """
+        manifest_df = get_manifest_from_fs(TestIngester.resource_path + "valid.csv")
+        sizes = {
+            os.path.join(self.ingest_folder, "MMS", row.s3key): row.filesize
+            for row in manifest_df.itertuples()
+        }
+        session.client().head_object = MagicMock(
+            side_effect=lambda Bucket, Key: {"ContentLength": sizes[Key]}
+        )
+
+        base_ingester = TestIngester.create_ingester(self, session, ds_repo, validation_workers=3)
+        base_ingester._Ingester__validate_manifest()
+
+        self.assertEqual(session.client().head_object.call_count, 4)
+        self.assertGreater(base_ingester._Ingester__result.files_validated_per_second, 0)
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_invalid_validation_workers(self, session, ds_repo) -> None:
+        """
+        Catch an IngesterException when the validation worker pool would be empty
+        """
+        with self.assertRaises(IngesterException):
+            TestIngester.create_ingester(self, session, ds_repo, validation_workers=0)
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_tmp_dir_deprecated(self, session, ds_repo) -> None:
+        """
+        The tmp_dir parameter is still accepted, in its original position, with a warning
+        """
+        manifest_df = get_manifest_from_fs(TestIngester.resource_path + "valid.csv")
+        entry_ds = get_entries_from_fs(TestIngester.entries_local_file)[0]
+        with self.assertWarns(DeprecationWarning):
+            Ingester(
+                self.ingest_bucket,
+                self.ingest_folder,
+                manifest_df,
+                entry_ds,
+                ds_repo,
+                "/tmp",
+                session,
+            )
+
+    def mock_listing(self, session, manifest_filename="valid.csv", size=None) -> None:
+        """
+        Mock a single page listing of the ingest folder containing every file in a manifest
+        """
+        manifest_df = get_manifest_from_fs(TestIngester.resource_path + manifest_filename)
+        contents = [
+            {
+                "Key": os.path.join(self.ingest_folder, "MMS", row.s3key),
+                "Size": row.filesize if size is None else size,
+            }
+            for row in manifest_df.itertuples()
+        ]
+        session.client().get_paginator().paginate = MagicMock(return_value=[{"Contents": contents}])
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_manifest_listing_valid(self, session, ds_repo) -> None:
+        """
+        Validate a manifest against a listing of the ingest folder, without any HEAD requests
+        """
+        TestIngester.mock_listing(self, session)
+
+        base_ingester = TestIngester.create_ingester(
+            self, session, ds_repo, validation_mode=ValidationMode.LIST
+        )
+        base_ingester._Ingester__validate_manifest()
+
+        session.client().get_paginator().paginate.assert_called_once_with(
+            Bucket=self.ingest_bucket, Prefix="ingest_folder/MMS/"
+        )
+        self.assertEqual(session.client().head_object.call_count, 0)
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_manifest_listing_file_not_found(self, session, ds_repo) -> None:
+        """
+        Check record status to confirm file not found when validating against a listing
+        """
+        session.client().get_paginator().paginate = MagicMock(return_value=[{}])
+
+        base_ingester = TestIngester.create_ingester(
+            self, session, ds_repo, validation_mode=ValidationMode.LIST
+        )
+
+        with self.assertRaises(IngesterException) as raised:
+            base_ingester._Ingester__validate_manifest()
+        self.assertEqual(raised.exception.message, self.error_template.format("cdf", "NOT_FOUND"))
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_manifest_listing_wrong_size(self, session, ds_repo) -> None:
+        """
+        Check record status to confirm wrong size when validating against a listing
+        """
+        TestIngester.mock_listing(self, session, size=0)
+
+        base_ingester = TestIngester.create_ingester(
+            self, session, ds_repo, validation_mode=ValidationMode.LIST
+        )
+
+        with self.assertRaises(IngesterException) as raised:
+            base_ingester._Ingester__validate_manifest()
+        self.assertEqual(raised.exception.message, self.error_template.format("cdf", "WRONG_SIZE"))
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_manifest_listing_bad_extension(self, session, ds_repo) -> None:
+        """
+        Check record status to confirm bad extension and wrong size are both reported
+        when validating against a listing
+        """
+        TestIngester.mock_listing(self, session, manifest_filename="bad_extension.csv", size=0)
+
+        base_ingester = TestIngester.create_ingester(
+            self,
+            session,
+            ds_repo,
+            manifest_filename="bad_extension.csv",
+            validation_mode=ValidationMode.LIST,
+        )
+
+        with self.assertRaises(IngesterException) as raised:
+            base_ingester._Ingester__validate_manifest()
+        self.assertEqual(
+            raised.exception.message,
+            self.error_template.format("bad", "WRONG_SIZE, BAD_EXTENSION"),
+        )
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_manifest_duplicate_keys(self, session, ds_repo) -> None:
+        """
+        Check every entry for a file listed more than once in the manifest is reported, in the
+        same pass as the other checks
+        """
+        TestIngester.mock_listing(self, session)
+        base_ingester = TestIngester.create_ingester(
+            self, session, ds_repo, validation_mode=ValidationMode.LIST
+        )
+        manifest_df = base_ingester._Ingester__manifest_df
+        manifest_df.loc[3, "s3key"] = manifest_df.loc[0, "s3key"]
+
+        with self.assertRaises(IngesterException) as raised:
+            base_ingester._Ingester__validate_manifest()
+        statuses = [
+            line.split(" - Status: ")[1] for line in raised.exception.message.split("\n")[1:]
+        ]
+        self.assertEqual(
+            statuses,
+            ["DUPLICATE", "VALID", "VALID", "WRONG_SIZE, DUPLICATE"],
+        )
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_manifest_head_batches(self, session, ds_repo) -> None:
+        """
+        Files looked up by HEAD request are checked in batches, each recorded in the journal
+        """
+        session.client().head_object = MagicMock(
+            side_effect=[{"ContentLength": 4641642}, self.client_error, {"ContentLength": 0}]
+            + [{"ContentLength": 297206}]
+        )
+        base_ingester = TestIngester.create_ingester(self, session, ds_repo, validation_workers=1)
+
+        with patch("registry.lambdas.app.ingest.ingester.VALIDATION_BATCH_SIZE", 3):
+            with self.assertRaises(IngesterException) as raised:
+                base_ingester._Ingester__validate_manifest()
+        statuses = [
+            line.split(" - Status: ")[1] for line in raised.exception.message.split("\n")[1:]
+        ]
+        self.assertEqual(statuses, ["VALID", "NOT_FOUND", "WRONG_SIZE", "VALID"])
+        self.assertEqual(
+            base_ingester._Ingester__journal.validated,
+            {
+                "ingest_folder/MMS/mms1/fgm/brst/l2/2015/09/01/mms1_fgm_brst_l2_20150901121114_v4.18.0.cdf",
+                "ingest_folder/MMS/mms1/fgm/brst/l2/2015/09/01/mms1_fgm_brst_l2_20150901174500_v4.18.0.cdf",
+            },
+        )
+
     @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
     @patch("boto3.Session")
     def test_dataset_install(self, session, ds_repo) -> None:
         """
-        Check the calling parameters to boto3's copy function
+        Check the calling parameters to boto3's copy_object function
         Assert that the source and destination information are correct
         """
 
@@ -146,7 +341,7 @@ class TestIngester(unittest.TestCase):
 
         base_ingester._Ingester__install_dataset()
 
-        self.assertEqual(session.client().copy.call_count, 4)
+        self.assertEqual(session.client().copy_object.call_count, 4)
 
         manifest_file = TestIngester.resource_path + "valid.csv"
         manifest_df = get_manifest_from_fs(manifest_file=manifest_file)
@@ -154,17 +349,152 @@ class TestIngester(unittest.TestCase):
 
         destination_folder = get_bucket_subfolder(self.entry_ds_list[0].index)
 
+        # Copies run concurrently, so find the copy of the first manifest entry
+        source_key = os.path.join(self.ingest_folder, self.entry_ds_list[0].id, manifest_s3_keys[0])
+        copies = [
+            kwargs
+            for _, kwargs in session.client().copy_object.call_args_list
+            if kwargs["CopySource"]["Key"] == source_key
+        ]
+        self.assertEqual(len(copies), 1)
+        self.assertEqual(copies[0]["CopySource"]["Bucket"], self.ingest_bucket)
+        self.assertEqual(copies[0]["Key"], os.path.join(destination_folder, manifest_s3_keys[0]))
+
+        # Installed files are recorded in manifest order
+        installed_files = base_ingester._Ingester__installed_files
+        self.assertEqual(list(installed_files["size"]), list(manifest_df["filesize"]))
         self.assertEqual(
-            session.client().copy.call_args_list[0][1]["CopySource"]["Bucket"], self.ingest_bucket
+            installed_files["key"][0],
+            "s3://test/" + os.path.join(destination_folder, manifest_s3_keys[0]),
         )
-        self.assertEqual(
-            session.client().copy.call_args_list[0][1]["CopySource"]["Key"],
-            os.path.join(self.ingest_folder, self.entry_ds_list[0].id, manifest_s3_keys[0]),
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_dataset_install_skip_unchanged(self, session, ds_repo) -> None:
+        """
+        Files already in the destination bucket with the same size & ETag aren't copied again.
+        Files copied in parts have multipart ETags, so are always copied again
+        """
+        manifest_df = get_manifest_from_fs(TestIngester.resource_path + "valid.csv")
+        destination_folder = (
+            get_bucket_subfolder(get_entries_from_fs(self.entries_local_file)[0].index) + "/"
         )
-        self.assertEqual(
-            session.client().copy.call_args_list[0][1]["Key"],
-            os.path.join(destination_folder, manifest_s3_keys[0]),
+        sources = [
+            {
+                "Key": os.path.join(self.ingest_folder, "MMS", row.s3key),
+                "Size": row.filesize,
+                "ETag": f'"etag{i}"',
+            }
+            for i, row in enumerate(manifest_df.itertuples())
+        ]
+        # Destination has the first file unchanged, the second with new content & the third with
+        # a new size. The fourth was copied in parts, so its ETag can't be compared and it is
+        # copied again
+        destinations = [
+            {**source, "Key": os.path.join(destination_folder, row.s3key)}
+            for source, row in zip(sources, manifest_df.itertuples())
+        ]
+        destinations[1]["ETag"] = '"changed"'
+        destinations[2]["Size"] = 1
+        destinations[3]["ETag"] = '"multipart-2"'
+
+        def paginate(Bucket, Prefix):
+            if Bucket == self.ingest_bucket:
+                self.assertEqual(Prefix, "ingest_folder/MMS/")
+                return [{"Contents": sources}]
+            self.assertEqual((Bucket, Prefix), ("test", destination_folder))
+            return [{"Contents": destinations}]
+
+        session.client().get_paginator().paginate = MagicMock(side_effect=paginate)
+
+        base_ingester = TestIngester.create_ingester(self, session, ds_repo, skip_unchanged=True)
+        base_ingester._Ingester__install_dataset()
+
+        copied = {
+            kwargs["CopySource"]["Key"] for _, kwargs in session.client().copy_object.call_args_list
+        }
+        self.assertEqual(copied, {source["Key"] for source in sources[1:]})
+
+        result = base_ingester._Ingester__result
+        self.assertEqual(result.bytes_skipped, manifest_df["filesize"][0])
+        self.assertEqual(result.bytes_copied, manifest_df["filesize"][1:].sum())
+
+        # Every file is still part of the dataset
+        self.assertEqual(len(base_ingester._Ingester__installed_files), 4)
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_dataset_install_multipart(self, session, ds_repo) -> None:
+        """
+        Check files at or above the multipart threshold are copied in parts
+        """
+        base_ingester = TestIngester.create_ingester(
+            self,
+            session,
+            ds_repo,
+            transfer_config=TransferConfig(
+                max_concurrency=4,
+                multipart_threshold=4 * 1024 * 1024,
+                multipart_chunksize=4 * 1024 * 1024,
+            ),
+        )
+
+        base_ingester._Ingester__install_dataset()
+
+        # Two files in valid.csv are larger than 4 MB. Parts are raised to S3's 5 MB minimum,
+        # so each is copied in a single part
+        self.assertEqual(session.client().copy_object.call_count, 2)
+        self.assertEqual(session.client().create_multipart_upload.call_count, 2)
+        self.assertEqual(session.client().upload_part_copy.call_count, 2)
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_dataset_install_copy_error(self, session, ds_repo) -> None:
+        """
+        Catch an IngesterException when a copy fails
+        """
+        session.client().copy_object = MagicMock(side_effect=self.client_error)
+
+        base_ingester = TestIngester.create_ingester(self, session, ds_repo)
+
+        with self.assertRaises(IngesterException) as raised:
+            base_ingester._Ingester__install_dataset()
+        self.assertTrue(raised.exception.message.startswith("Error copying files. 4 of 4"))
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_dataset_install_resumed(self, session, ds_repo) -> None:
+        """
+        Check a resumable Ingester skips the files its journal records as copied, and checkpoints
+        the files it copies
+        """
+        base_ingester = TestIngester.create_ingester(self, session, ds_repo, resumable=True)
+        manifest_df = get_manifest_from_fs(TestIngester.resource_path + "valid.csv")
+        copied_key = os.path.join(self.ingest_folder, "MMS", manifest_df["s3key"][0])
+        segment = {
+            "fingerprint": base_ingester._Ingester__journal._IngestJournal__fingerprint,
+            "validated": [],
+            "copied": [copied_key],
+            "phases": [],
+        }
+        session.client().get_paginator().paginate = MagicMock(
+            return_value=[{"Contents": [{"Key": "ingest_folder/.journal/MMS/00000000.json.gz"}]}]
         )
+        session.client().get_object = MagicMock(
+            return_value={"Body": io.BytesIO(gzip.compress(json.dumps(segment).encode()))}
+        )
+
+        base_ingester._Ingester__journal.load()
+        base_ingester._Ingester__install_dataset()
+
+        # Only the files not yet copied are copied, but all are recorded as installed
+        self.assertEqual(session.client().copy_object.call_count, 3)
+        self.assertEqual(len(base_ingester._Ingester__installed_files), 4)
+
+        # The copies made are checkpointed in a new journal segment
+        _, kwargs = session.client().put_object.call_args
+        self.assertEqual(kwargs["Key"], "ingest_folder/.journal/MMS/00000001.json.gz")
+        self.assertEqual(len(json.loads(gzip.decompress(kwargs["Body"]))["copied"]), 3)
 
     # install_index_files
     @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
@@ -192,9 +522,17 @@ class TestIngester(unittest.TestCase):
             session.client().put_object.call_args_list[0][1]["Key"],
             "base_data/resources/ingest/dataset_bucket/MMS_2015.csv",
         )
+        # Index is uploaded straight from memory, with an unquoted header and quoted rows
+        body = session.client().put_object.call_args_list[0][1]["Body"].decode("UTF-8")
+        lines = body.splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[0], "# startDate, key, size")
         self.assertEqual(
-            session.client().put_object.call_args_list[0][1]["Body"].name, "/tmp/MMS_2015.csv"
+            lines[1],
+            "'2015-09-01 12:11:14+00:00','s3://test/base_data/resources/ingest/dataset_bucket/mms1/"
+            "fgm/brst/l2/2015/09/01/mms1_fgm_brst_l2_20150901121114_v4.18.0.cdf','4641642'",
         )
+        self.assertTrue(body.endswith("'\n"))
 
     @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
     @patch("boto3.Session")
@@ -224,7 +562,7 @@ class TestIngester(unittest.TestCase):
         self.assertEqual(
             args_list[0][1]["Key"], "base_data/resources/ingest/dataset_bucket/MMS_2015.csv"
         )
-        self.assertEqual(args_list[0][1]["Body"].name, "/tmp/MMS_2015.csv")
+        self.assertEqual(len(args_list[0][1]["Body"].splitlines()), 3)
 
         self.assertEqual(
             args_list[1][1]["Bucket"],
@@ -233,7 +571,103 @@ class TestIngester(unittest.TestCase):
         self.assertEqual(
             args_list[1][1]["Key"], "base_data/resources/ingest/dataset_bucket/MMS_2016.csv"
         )
-        self.assertEqual(args_list[1][1]["Body"].name, "/tmp/MMS_2016.csv")
+        self.assertEqual(len(args_list[1][1]["Body"].splitlines()), 3)
+        self.assertTrue(args_list[1][1]["Body"].splitlines()[1].startswith(b"'2016-09-01 12:30:44"))
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_install_index_files_parquet(self, session, ds_repo) -> None:
+        """
+        Datasets with a Parquet index type get Parquet index files, one per year
+        """
+        base_ingester = TestIngester.create_ingester(
+            self, session, ds_repo, manifest_filename="valid_multiple_years.csv"
+        )
+        TestIngester.entry_ds_list[0].indextype = IndexType.PARQUET
+
+        base_ingester._Ingester__install_dataset()
+        base_ingester._Ingester__install_index_files()
+
+        args_list = session.client().put_object.call_args_list
+        self.assertEqual(
+            [kwargs["Key"] for _, kwargs in args_list],
+            [
+                "base_data/resources/ingest/dataset_bucket/MMS_2015.parquet",
+                "base_data/resources/ingest/dataset_bucket/MMS_2016.parquet",
+            ],
+        )
+        index_df = pd.read_parquet(io.BytesIO(args_list[1][1]["Body"]))
+        self.assertEqual(list(index_df["size"]), [3462914, 297206])
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_install_index_files_incremental(self, session, ds_repo) -> None:
+        """
+        An incremental ingest merges the new files into the existing index file for each year,
+        replacing entries for files installed again, and creates index files for new years
+        """
+        folder = "s3://test/base_data/resources/ingest/dataset_bucket/"
+        reinstalled = (
+            folder + "mms1/fgm/brst/l2/2015/09/01/mms1_fgm_brst_l2_20150901122054_v4.18.0.cdf"
+        )
+        existing_index = (
+            "# startDate, key, size\n"
+            f"'2015-01-01 00:00:00+00:00','{folder}old.cdf','10'\n"
+            f"'2015-09-01 12:20:54+00:00','{reinstalled}','1'\n"
+        )
+
+        def get_object(Bucket, Key):
+            if Key.endswith("MMS_2015.csv"):
+                return {"Body": io.BytesIO(existing_index.encode("UTF-8"))}
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "NoSuchKey", "Message": "Not found"}}, "GetObject"
+            )
+
+        session.client().get_object = MagicMock(side_effect=get_object)
+
+        base_ingester = TestIngester.create_ingester(
+            self, session, ds_repo, manifest_filename="valid_multiple_years.csv", incremental=True
+        )
+        base_ingester._Ingester__install_dataset()
+        base_ingester._Ingester__install_index_files()
+
+        bodies = {
+            kwargs["Key"].rsplit("/", 1)[1]: kwargs["Body"].decode("UTF-8").splitlines()
+            for _, kwargs in session.client().put_object.call_args_list
+        }
+        self.assertEqual(
+            bodies["MMS_2015.csv"],
+            [
+                "# startDate, key, size",
+                f"'2015-01-01 00:00:00+00:00','{folder}old.cdf','10'",
+                "'2015-09-01 12:11:14+00:00','"
+                + folder
+                + "mms1/fgm/brst/l2/2015/09/01/mms1_fgm_brst_l2_20150901121114_v4.18.0.cdf','4641642'",
+                f"'2015-09-01 12:20:54+00:00','{reinstalled}','4603372'",
+            ],
+        )
+        self.assertEqual(len(bodies["MMS_2016.csv"]), 3)
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_update_catalog_incremental(self, session, ds_repo) -> None:
+        """
+        An incremental ingest widens the existing catalog entry's time range and file formats
+        """
+        existing = get_entries_from_fs(TestIngester.entries_local_file)[0]
+        existing.start = datetime.datetime(2010, 1, 1)
+        existing.stop = datetime.datetime(2015, 9, 1, 12, 30)
+        existing.filetype = [FileType.FITS]
+        ds_repo.get_by_dataset_id = MagicMock(return_value=existing)
+
+        base_ingester = TestIngester.create_ingester(self, session, ds_repo, incremental=True)
+        base_ingester._Ingester__update_catalog()
+
+        args, _ = ds_repo.save.call_args
+        saved = args[0][0]
+        self.assertEqual(saved.start, pd.Timestamp("2010-01-01", tz="UTC"))
+        self.assertEqual(saved.stop, pd.Timestamp("2015-09-01 17:45:00", tz="UTC"))
+        self.assertEqual(saved.filetype, [FileType.CDF, FileType.FITS])
 
     @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
     @patch("boto3.Session")
@@ -255,9 +689,10 @@ class TestIngester(unittest.TestCase):
     @patch("boto3.Session")
     def test__clean_up(self, session, ds_repo) -> None:
         """
-        Check the calling parameters to boto3's delete_object function
+        Check the calling parameters to boto3's delete_objects function
         Assert that the keys are correct
         """
+        session.client().delete_objects = MagicMock(return_value={})
 
         base_ingester = TestIngester.create_ingester(self, session, ds_repo)
 
@@ -267,9 +702,47 @@ class TestIngester(unittest.TestCase):
         manifest_df = get_manifest_from_fs(manifest_file=manifest_file)
         manifest_s3_keys = manifest_df["s3key"]
 
-        for i, call in enumerate(session.client().delete_object.call_args_list):
-            _, kwargs = call
-            self.assertEqual(
-                kwargs["Key"],
-                os.path.join(self.ingest_folder, self.entry_ds_list[0].id, manifest_s3_keys[i]),
+        session.client().delete_objects.assert_called_once()
+        _, kwargs = session.client().delete_objects.call_args
+        self.assertEqual(
+            kwargs["Delete"]["Objects"],
+            [
+                {"Key": os.path.join(self.ingest_folder, self.entry_ds_list[0].id, s3key)}
+                for s3key in manifest_s3_keys
+            ],
+        )
+        self.assertEqual(base_ingester._Ingester__result.cleanup_failures, [])
+
+    @patch("registry.lambdas.app.ingest.ingester.MAX_DELETE_BATCH_SIZE", 3)
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test__clean_up_failures(self, session, ds_repo) -> None:
+        """
+        Keys are deleted in batches, and those that couldn't be deleted are reported in the Result
+        """
+
+        def delete_objects(Bucket, Delete):
+            keys = [obj["Key"] for obj in Delete["Objects"]]
+            if len(keys) == 1:
+                raise self.client_error
+            return {
+                "Errors": [{"Key": keys[0], "Code": "AccessDenied", "Message": "Access Denied"}]
+            }
+
+        session.client().delete_objects = MagicMock(side_effect=delete_objects)
+
+        base_ingester = TestIngester.create_ingester(self, session, ds_repo)
+        base_ingester._Ingester__clean_up()
+
+        self.assertEqual(session.client().delete_objects.call_count, 2)
+        failures = base_ingester._Ingester__result.cleanup_failures
+        self.assertEqual(len(failures), 2)
+        self.assertTrue(
+            failures[0].endswith("121114_v4.18.0.cdf - Error: AccessDenied Access Denied")
+        )
+        self.assertTrue(
+            failures[1].startswith(
+                "ingest_folder/MMS/mms1/fgm/brst/l2/2015/09/01/mms1_fgm_brst_l2_20150901174500_v4.18.0.cdf"
+                " - Error: An error occurred (ProvisionedThroughputExceededException)"
             )
+        )
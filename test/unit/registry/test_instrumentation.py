@@ -0,0 +1,69 @@
+import unittest
+
+import boto3
+from botocore.stub import Stubber
+
+from registry.lambdas.app.ingest.instrumentation import Instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+    """
+    Unit tests for the Instrumentation of ingest phases
+    """
+
+    def setUp(self) -> None:
+        session = boto3.session.Session(
+            aws_access_key_id="testing", aws_secret_access_key="testing", region_name="us-east-1"
+        )
+        self.s3_client = session.client("s3")
+
+    def test_phases(self) -> None:
+        """
+        Each phase counts the S3 requests made during it, by operation
+        """
+        instrumentation = Instrumentation(self.s3_client)
+        with Stubber(self.s3_client) as stubber:
+            stubber.add_response("head_bucket", {}, {"Bucket": "bucket"})
+            stubber.add_response("head_object", {"ContentLength": 1})
+            stubber.add_response("head_object", {"ContentLength": 2})
+            stubber.add_response("copy_object", {})
+
+            with instrumentation.phase("validate"):
+                self.s3_client.head_bucket(Bucket="bucket")
+                self.s3_client.head_object(Bucket="bucket", Key="a.cdf")
+                self.s3_client.head_object(Bucket="bucket", Key="b.cdf")
+            with instrumentation.phase("install"):
+                self.s3_client.copy_object(
+                    Bucket="bucket", Key="c.cdf", CopySource={"Bucket": "bucket", "Key": "a.cdf"}
+                )
+
+        phases = instrumentation.phases
+        self.assertEqual([phase.phase for phase in phases], ["validate", "install"])
+        self.assertEqual(phases[0].s3_requests, {"HeadBucket": 1, "HeadObject": 2})
+        self.assertEqual(phases[1].s3_requests, {"CopyObject": 1})
+        self.assertGreaterEqual(phases[1].seconds, 0.0)
+        self.assertGreater(phases[1].peak_rss, 0)
+
+    def test_retries(self) -> None:
+        """
+        HTTP requests sent beyond one per S3 call are counted as retries
+        """
+        instrumentation = Instrumentation(self.s3_client)
+        with Stubber(self.s3_client) as stubber:
+            stubber.add_response("head_object", {"ContentLength": 1})
+            with instrumentation.phase("validate"):
+                self.s3_client.head_object(Bucket="bucket", Key="a.cdf")
+                for _ in range(3):
+                    self.s3_client.meta.events.emit("before-send.s3.HeadObject", request=None)
+
+        self.assertEqual(instrumentation.phases[0].retries, 2)
+
+    def test_no_client(self) -> None:
+        """
+        Phases are still timed without an S3 client
+        """
+        instrumentation = Instrumentation()
+        with instrumentation.phase("catalog"):
+            pass
+        self.assertEqual(instrumentation.phases[0].s3_requests, {})
+        self.assertEqual(instrumentation.phases[0].retries, 0)
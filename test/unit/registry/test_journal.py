@@ -0,0 +1,152 @@
+import gzip
+import io
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from registry.lambdas.app.ingest.journal import IngestJournal
+from registry.lambdas.app.ingest.storage import FileSystemStorage, S3Storage
+
+
+class FakeS3Client:
+    """
+    Just enough of an in-memory S3 client to persist an IngestJournal.
+    """
+
+    def __init__(self):
+        self.objects = dict()
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            del self.objects[(Bucket, obj["Key"])]
+        return {}
+
+    def get_paginator(self, operation):
+        def paginate(Bucket, Prefix, Delimiter=None):
+            keys = [
+                key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix)
+            ]
+            return [{"Contents": [{"Key": key} for key in keys]}]
+
+        return MagicMock(paginate=paginate)
+
+
+class TestIngestJournal(unittest.TestCase):
+    """
+    Unit tests for the IngestJournal
+    """
+
+    bucket = "ingest"
+    prefix = "job/.journal/MMS/"
+
+    def create_journal(self, s3_client, fingerprint="abc") -> IngestJournal:
+        return IngestJournal(
+            storage=S3Storage(s3_client),
+            bucket=self.bucket,
+            prefix=self.prefix,
+            fingerprint=fingerprint,
+            checkpoint_interval=3600,
+        )
+
+    def test_checkpoint_and_resume(self) -> None:
+        """
+        A new journal for the same job picks up everything checkpointed by an earlier one
+        """
+        s3_client = FakeS3Client()
+        journal = self.create_journal(s3_client)
+        journal.record_validated(["job/MMS/a.cdf", "job/MMS/b.cdf"])
+        journal.checkpoint()
+        journal.record_copied("job/MMS/a.cdf")
+        journal.record_phase("INDEXED")
+        journal.checkpoint()
+
+        # Each checkpoint only holds what was recorded since the previous one
+        self.assertEqual(len(s3_client.objects), 2)
+        segment = json.loads(
+            gzip.decompress(s3_client.objects[(self.bucket, self.prefix + "00000001.json.gz")])
+        )
+        self.assertEqual(segment["validated"], [])
+        self.assertEqual(segment["copied"], ["job/MMS/a.cdf"])
+
+        resumed = self.create_journal(s3_client)
+        resumed.load()
+        self.assertEqual(resumed.validated, {"job/MMS/a.cdf", "job/MMS/b.cdf"})
+        self.assertEqual(resumed.copied, {"job/MMS/a.cdf"})
+        self.assertTrue(resumed.is_complete("INDEXED"))
+        self.assertFalse(resumed.is_complete("CATALOGED"))
+
+        # New segments continue the sequence
+        resumed.record_copied("job/MMS/b.cdf")
+        resumed.checkpoint()
+        self.assertIn((self.bucket, self.prefix + "00000002.json.gz"), s3_client.objects)
+
+    def test_checkpoint_nothing_new(self) -> None:
+        """
+        No segment is written when nothing has been recorded since the last checkpoint
+        """
+        s3_client = FakeS3Client()
+        journal = self.create_journal(s3_client)
+        journal.checkpoint()
+        journal.maybe_checkpoint()
+        self.assertEqual(len(s3_client.objects), 0)
+
+    def test_different_manifest(self) -> None:
+        """
+        Segments recorded for a different manifest are ignored
+        """
+        s3_client = FakeS3Client()
+        journal = self.create_journal(s3_client, fingerprint="abc")
+        journal.record_validated(["job/MMS/a.cdf"])
+        journal.checkpoint()
+
+        resumed = self.create_journal(s3_client, fingerprint="def")
+        resumed.load()
+        self.assertEqual(resumed.validated, set())
+
+    def test_delete(self) -> None:
+        """
+        Deleting the journal removes all its segments
+        """
+        s3_client = FakeS3Client()
+        s3_client.put_object(Bucket=self.bucket, Key="job/MMS/a.cdf", Body=b"")
+        journal = self.create_journal(s3_client)
+        journal.record_validated(["job/MMS/a.cdf"])
+        journal.checkpoint()
+        journal.delete()
+        self.assertEqual(list(s3_client.objects), [(self.bucket, "job/MMS/a.cdf")])
+
+    def test_in_memory(self) -> None:
+        """
+        A journal without storage still tracks progress, but persists nothing
+        """
+        journal = IngestJournal()
+        journal.record_validated(["job/MMS/a.cdf"])
+        journal.checkpoint()
+        journal.load()
+        journal.delete()
+        self.assertFalse(journal.persistent)
+        self.assertEqual(journal.validated, {"job/MMS/a.cdf"})
+
+    def test_filesystem(self) -> None:
+        """
+        A journal can be checkpointed to, and resumed from, a filesystem
+        """
+        with tempfile.TemporaryDirectory() as root:
+            storage = FileSystemStorage(root=root)
+            journal = IngestJournal(storage=storage, bucket=self.bucket, prefix=self.prefix)
+            journal.record_validated(["job/MMS/a.cdf"])
+            journal.checkpoint()
+
+            resumed = IngestJournal(storage=storage, bucket=self.bucket, prefix=self.prefix)
+            resumed.load()
+            self.assertEqual(resumed.validated, {"job/MMS/a.cdf"})
+
+            resumed.delete()
+            self.assertTrue(storage.list_objects(self.bucket, "job/").empty)
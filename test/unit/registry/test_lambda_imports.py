@@ -0,0 +1,117 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import unittest
+
+# Directory the registry's lambdas are deployed from, so handlers are imported as AWS Lambda does
+LAMBDAS_DIR = os.path.join(os.path.dirname(__file__), "../../../registry/lambdas")
+
+# Handler modules of the registry's lambdas
+HANDLERS = ["app.catalog_lambda", "app.ingest_lambda"]
+
+# Modules only the Ingester needs, that the Cataloger must not pay for on a cold start
+INGEST_ONLY_MODULES = ["pandas", "numpy", "pyarrow", "app.ingest.manifest"]
+
+
+# Runs the Ingester lambda's handler for a job of one dataset ingested by a ColumnarIngester, with
+# its AWS clients, catalog & ingest mocked, then prints the modules loaded
+COLUMNAR_JOB_SCRIPT = """
+import json, os, sys
+from unittest.mock import MagicMock, patch
+os.environ.update(ingest_bucket="ingest", INGEST_ENGINE="COLUMNAR", INGEST_RESUMABLE="false")
+from app import ingest_lambda
+run_columnar_ingester = MagicMock(return_value=ingest_lambda.Result())
+with patch.multiple(
+    ingest_lambda,
+    get_session=MagicMock(),
+    get_client=MagicMock(),
+    get_dataset_repository=MagicMock(),
+    get_entries=MagicMock(return_value=[MagicMock()]),
+    get_manifest_key=MagicMock(return_value="job/MMS/manifest.csv"),
+    run_columnar_ingester=run_columnar_ingester,
+):
+    response = ingest_lambda.handler({"job_folder": "job/"}, None)
+assert run_columnar_ingester.called, response
+print(json.dumps(list(sys.modules)))
+"""
+
+
+def run_script(script: str) -> str:
+    """
+    Run a script in a fresh interpreter, from the directory the lambdas are deployed from.
+    :return: what the script printed
+    """
+    return subprocess.run(
+        [sys.executable, "-c", script], cwd=LAMBDAS_DIR, capture_output=True, check=True, text=True
+    ).stdout
+
+
+def measure_import(module: str) -> tuple[float, set[str]]:
+    """
+    Import a module in a fresh interpreter, as on a cold start.
+    :return: the seconds taken to import the module, and the modules it loaded
+    """
+    seconds, modules = json.loads(
+        run_script(
+            "import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            f"import {module}\n"
+            "print(json.dumps([time.perf_counter() - start, list(sys.modules)]))\n"
+        )
+    )
+    return seconds, set(modules)
+
+
+class TestLambdaImports(unittest.TestCase):
+    """
+    Unit tests for what the registry's lambda handlers import on a cold start. Run this module to
+    benchmark the import time of each handler.
+    """
+
+    def test_catalog_lambda(self) -> None:
+        """
+        The Cataloger imports none of the Ingester's dependencies
+        """
+        _, modules = measure_import("app.catalog_lambda")
+        self.assertEqual([module for module in INGEST_ONLY_MODULES if module in modules], [])
+
+    def test_columnar_ingest(self) -> None:
+        """
+        The pandas-free ingest core imports none of pandas, numpy or pyarrow
+        """
+        _, modules = measure_import("app.ingest.columnar")
+        self.assertEqual([module for module in INGEST_ONLY_MODULES if module in modules], [])
+
+    def test_async_storage(self) -> None:
+        """
+        The asyncio engine's storage imports without pandas, which only listing objects needs
+        """
+        _, modules = measure_import("app.ingest.async_storage")
+        self.assertEqual([module for module in INGEST_ONLY_MODULES if module in modules], [])
+        self.assertNotIn("aiobotocore", modules)
+
+    def test_ingest_lambda(self) -> None:
+        """
+        The Ingester imports without pandas, which jobs ingested by a ColumnarIngester never load,
+        and without the optional dependencies of its asyncio engine
+        """
+        _, modules = measure_import("app.ingest_lambda")
+        self.assertEqual([module for module in INGEST_ONLY_MODULES if module in modules], [])
+        self.assertNotIn("app.ingest.ingester", modules)
+        self.assertNotIn("aiobotocore", modules)
+
+    def test_ingest_lambda_columnar(self) -> None:
+        """
+        The Ingester lambda ingests a job on the COLUMNAR engine without loading pandas
+        """
+        modules = set(json.loads(run_script(COLUMNAR_JOB_SCRIPT)))
+        self.assertEqual([module for module in INGEST_ONLY_MODULES if module in modules], [])
+
+
+if __name__ == "__main__":
+    # Median import time of each handler, over fresh interpreters
+    for handler in HANDLERS:
+        times = [measure_import(handler)[0] for _ in range(int(os.environ.get("REPEAT", 5)))]
+        print(f"{handler}: {statistics.median(times) * 1000:.0f} ms")
@@ -1,7 +1,19 @@
+import gzip
+import io
+import os
+import tempfile
 import unittest
 
+import pandas as pd
+import zstandard
+
 from registry.lambdas.app.core.exceptions import IngesterException
-from registry.lambdas.app.ingest.manifest import get_manifest_from_fs
+from registry.lambdas.app.ingest.manifest import (
+    ManifestSummary,
+    get_manifest_from_fs,
+    iter_manifest,
+    read_manifest,
+)
 
 
 class TestManifest(unittest.TestCase):
@@ -30,3 +42,97 @@ class TestManifest(unittest.TestCase):
         manifest_file = TestManifest.resource_path + "valid.csv"
         manifest_df = get_manifest_from_fs(manifest_file=manifest_file)
         self.assertEqual(manifest_df.columns[0], "time")
+
+    def test_read_manifest_chunked(self):
+        with open(TestManifest.resource_path + "valid.csv", "rb") as manifest:
+            expected = read_manifest(manifest)
+        with open(TestManifest.resource_path + "valid.csv", "rb") as manifest:
+            manifest_df = read_manifest(manifest, chunksize=3)
+        pd.testing.assert_frame_equal(manifest_df, expected)
+        self.assertEqual(list(manifest_df.columns), ["time", "s3key", "filesize"])
+        self.assertEqual(str(manifest_df["time"].dtype), "datetime64[ns, UTC]")
+        self.assertEqual(manifest_df["s3key"].dtype, "string")
+        self.assertEqual(manifest_df["filesize"].dtype, "int64")
+
+    def test_iter_manifest(self):
+        with open(TestManifest.resource_path + "valid.csv", "rb") as manifest:
+            data = manifest.read()
+        expected = read_manifest(io.BytesIO(data))
+        buffer = io.BytesIO()
+        expected.astype({"s3key": str}).to_parquet(buffer, index=False)
+
+        # Chunks are indexed by their rows' position in the whole manifest, in every format
+        for filename, body in {"manifest.csv": data, "manifest.parquet": buffer.getvalue()}.items():
+            with self.subTest(filename=filename):
+                chunks = list(iter_manifest(io.BytesIO(body), filename, chunksize=3))
+                self.assertEqual([len(chunk) for chunk in chunks], [3, 1])
+                pd.testing.assert_frame_equal(chunks[1], expected.iloc[3:])
+
+    def test_manifest_summary(self):
+        manifest_df = get_manifest_from_fs(TestManifest.resource_path + "valid.csv")
+        summary = ManifestSummary()
+        summary.add(manifest_df.iloc[3:])
+        summary.add(manifest_df.iloc[:0])
+        summary.add(manifest_df.iloc[:3])
+        self.assertEqual(summary, ManifestSummary.from_manifest(manifest_df))
+        self.assertEqual(summary.files, 4)
+        self.assertEqual(summary.start, pd.Timestamp("2015-09-01T12:11:14Z"))
+        self.assertEqual(summary.stop, pd.Timestamp("2015-09-01T17:45:00Z"))
+        self.assertEqual(list(summary.extensions), ["cdf"])
+
+    def test_read_manifest_quoted_key(self):
+        data = io.BytesIO(
+            b"filesize, s3key, time\n"
+            b'10,"mms1/a,b.cdf",2015-09-01T12:11:14+01:00\n'
+            b"20,mms1/c.cdf,2015-09-01T12:20:54Z\n"
+        )
+        manifest_df = read_manifest(data)
+        self.assertEqual(list(manifest_df["s3key"]), ["mms1/a,b.cdf", "mms1/c.cdf"])
+        self.assertEqual(manifest_df["time"][0], pd.Timestamp("2015-09-01T11:11:14Z"))
+        self.assertEqual(list(manifest_df["filesize"]), [10, 20])
+
+    def test_read_manifest_empty(self):
+        manifest_df = read_manifest(io.BytesIO(b"#time, s3key, filesize\n"))
+        self.assertTrue(manifest_df.empty)
+        self.assertEqual(list(manifest_df.columns), ["time", "s3key", "filesize"])
+
+    def test_read_manifest_bad_size(self):
+        data = io.BytesIO(b"#time, s3key, filesize\n2015-09-01T12:11:14Z,mms1/c.cdf,big\n")
+        with self.assertRaises(IngesterException):
+            read_manifest(data)
+
+    def test_compressed_manifests(self):
+        with open(TestManifest.resource_path + "valid.csv", "rb") as manifest:
+            data = manifest.read()
+            expected = read_manifest(io.BytesIO(data))
+        compressed = {
+            "manifest.csv.gz": gzip.compress(data),
+            "manifest.csv.zst": zstandard.ZstdCompressor().compress(data),
+        }
+        for filename, body in compressed.items():
+            with self.subTest(filename=filename):
+                manifest_df = read_manifest(io.BytesIO(body), filename, chunksize=3)
+                pd.testing.assert_frame_equal(manifest_df, expected)
+
+    def test_parquet_manifest(self):
+        expected = get_manifest_from_fs(TestManifest.resource_path + "valid.csv")
+        buffer = io.BytesIO()
+        expected.astype({"s3key": str}).to_parquet(buffer, index=False)
+        manifest_df = read_manifest(io.BytesIO(buffer.getvalue()), "manifest.parquet", chunksize=3)
+        pd.testing.assert_frame_equal(manifest_df, expected)
+
+        # Parquet manifests need the same columns
+        buffer = io.BytesIO()
+        expected.rename(columns={"s3key": "key"}).to_parquet(buffer, index=False)
+        with self.assertRaises(IngesterException):
+            read_manifest(io.BytesIO(buffer.getvalue()), "manifest.parquet")
+
+    def test_get_compressed_manifest_from_fs(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest_file = os.path.join(temp_dir, "manifest.csv.gz")
+            with open(TestManifest.resource_path + "valid.csv", "rb") as source, gzip.open(
+                manifest_file, "wb"
+            ) as destination:
+                destination.write(source.read())
+            manifest_df = get_manifest_from_fs(manifest_file)
+        self.assertEqual(len(manifest_df), 4)
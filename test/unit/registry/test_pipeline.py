@@ -0,0 +1,127 @@
+import io
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+
+from registry.lambdas.app.core.exceptions import IngesterException
+from registry.lambdas.app.ingest.ingester import Ingester
+from registry.lambdas.app.ingest.manifest import iter_manifest, read_manifest
+from registry.lambdas.app.ingest.pipeline import ChunkedIngester
+from registry.lambdas.app.local_utils.entry import get_entries_from_fs
+
+
+class TestChunkedIngester(unittest.TestCase):
+    """
+    Unit tests for chunked ingest jobs
+    """
+
+    entries_local_file = "test/unit/resources/test_registry/ingest/entry/valid.json"
+    manifest_file = "test/unit/resources/test_registry/ingest/manifest/valid.csv"
+    ingest_bucket = "s3://my_bucket_name"
+    ingest_folder = "ingest_folder/"
+
+    def setUp(self) -> None:
+        with open(self.manifest_file, "rb") as manifest:
+            self.manifest = manifest.read()
+        self.manifest_df = read_manifest(io.BytesIO(self.manifest))
+        self.entry_ds = get_entries_from_fs(self.entries_local_file)[0]
+
+    def create_chunked_ingester(self, session, ds_repo, manifest: bytes) -> ChunkedIngester:
+        def create_ingester(chunk_df: pd.DataFrame, chunk_index: int) -> Ingester:
+            return Ingester(
+                ingest_bucket=self.ingest_bucket,
+                ingest_folder=self.ingest_folder,
+                entry_dataset=self.entry_ds,
+                manifest_df=chunk_df,
+                ds_repo=ds_repo,
+                session=session,
+                shard_index=chunk_index,
+            )
+
+        return ChunkedIngester(
+            create_ingester=create_ingester,
+            manifest_chunks=lambda: iter_manifest(io.BytesIO(manifest), chunksize=3),
+        )
+
+    def mock_ingest_bucket(self, session, manifest_df: pd.DataFrame) -> None:
+        sizes = {
+            os.path.join(self.ingest_folder, "MMS", row.s3key): row.filesize
+            for row in manifest_df.itertuples()
+        }
+        session.client().head_bucket = MagicMock(
+            return_value={"ResponseMetadata": {"HTTPStatusCode": 200}}
+        )
+        session.client().head_object = MagicMock(
+            side_effect=lambda Bucket, Key: {"ContentLength": sizes[Key]}
+        )
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_execute(self, session, ds_repo) -> None:
+        """
+        Each chunk is validated then installed by its own Ingester, then the dataset is indexed &
+        cataloged once
+        """
+        self.mock_ingest_bucket(session, self.manifest_df)
+
+        result = self.create_chunked_ingester(session, ds_repo, self.manifest).execute()
+
+        # Every file was validated & copied once, by one of the chunks
+        self.assertEqual(session.client().head_object.call_count, 4)
+        self.assertEqual(session.client().copy_object.call_count, 4)
+
+        # A single index file of every chunk's files, and catalog update covering the whole manifest
+        session.client().put_object.assert_called_once()
+        _, kwargs = session.client().put_object.call_args
+        self.assertEqual(len(kwargs["Body"].decode("UTF-8").splitlines()), 5)
+        ds_repo.save.assert_called_once()
+        self.assertEqual(self.entry_ds.start, self.manifest_df["time"].min())
+        self.assertEqual(self.entry_ds.stop, self.manifest_df["time"].max())
+
+        # The manifest is read again to clean up, a chunk at a time
+        self.assertEqual(session.client().delete_objects.call_count, 2)
+        self.assertEqual(result.dataset_updated, "MMS")
+        self.assertEqual(result.files_contributed, 4)
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_execute_invalid_chunk(self, session, ds_repo) -> None:
+        """
+        Nothing is installed if any chunk is invalid, and every chunk is validated
+        """
+        self.mock_ingest_bucket(session, self.manifest_df.assign(filesize=[1, 2, 3, 4]))
+
+        with self.assertRaises(IngesterException) as context:
+            self.create_chunked_ingester(session, ds_repo, self.manifest).execute()
+
+        self.assertTrue(
+            context.exception.message.startswith(
+                "Error validating manifest entries in 2 chunks.\n\tChunk: 0 (rows 0-3) - Error: "
+            )
+        )
+        self.assertIn("\n\tChunk: 1 (rows 3-4) - Error: ", context.exception.message)
+        self.assertIn("WRONG_SIZE", context.exception.message)
+        session.client().copy_object.assert_not_called()
+        ds_repo.save.assert_not_called()
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    @patch("boto3.Session")
+    def test_execute_duplicate_across_chunks(self, session, ds_repo) -> None:
+        """
+        Keys listed in different chunks are reported as duplicates
+        """
+        first_row = self.manifest.splitlines(keepends=True)[1]
+        self.mock_ingest_bucket(session, self.manifest_df)
+
+        with self.assertRaises(IngesterException) as context:
+            self.create_chunked_ingester(session, ds_repo, self.manifest + first_row).execute()
+
+        self.assertEqual(
+            context.exception.message,
+            "Error validating manifest entries in 2 chunks.\n\tFile: "
+            + self.manifest_df["s3key"][0]
+            + " - Status: DUPLICATE",
+        )
+        session.client().copy_object.assert_not_called()
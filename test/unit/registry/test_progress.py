@@ -0,0 +1,87 @@
+import contextlib
+import io
+import json
+import unittest
+
+from registry.lambdas.app.ingest.progress import ProgressReporter
+
+
+class TestProgressReporter(unittest.TestCase):
+    """
+    Unit tests for the ProgressReporter
+    """
+
+    @staticmethod
+    def report(reporter: ProgressReporter, action) -> list[dict]:
+        """
+        :return: the JSON lines printed by the reporter while performing the action
+        """
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            action(reporter)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_percent_summaries(self) -> None:
+        """
+        Summaries are reported every percent_step percent of the files, not per file
+        """
+        reporter = ProgressReporter("install", total=100, interval=0, percent_step=25)
+
+        def copy_files(progress: ProgressReporter):
+            for _ in range(100):
+                progress.update(nbytes=10)
+
+        lines = self.report(reporter, copy_files)
+        self.assertEqual(4, len(lines))
+        self.assertEqual([25, 50, 75, 100], [line["done"] for line in lines])
+        self.assertEqual({"progress"}, {line["event"] for line in lines})
+        self.assertEqual(1000, lines[-1]["bytes"])
+        self.assertEqual(100.0, lines[-1]["percent"])
+
+    def test_interval_disabled(self) -> None:
+        """
+        No summaries are reported before the interval elapses when percentage summaries are off
+        """
+        reporter = ProgressReporter("install", total=100, interval=3600, percent_step=0)
+
+        def copy_files(progress: ProgressReporter):
+            for _ in range(100):
+                progress.update()
+
+        self.assertEqual([], self.report(reporter, copy_files))
+        self.assertEqual(100, reporter.done)
+
+    def test_failures(self) -> None:
+        """
+        Failures are reported individually, and counted in the final summary
+        """
+        reporter = ProgressReporter("validate_manifest", total=3, interval=0, percent_step=0)
+
+        def validate_files(progress: ProgressReporter):
+            progress.update(count=2)
+            progress.failure("s3://bucket/job/a.cdf NOT_FOUND")
+            progress.finish()
+
+        lines = self.report(reporter, validate_files)
+        self.assertEqual(2, len(lines))
+        self.assertEqual(
+            {
+                "event": "failure",
+                "phase": "validate_manifest",
+                "detail": "s3://bucket/job/a.cdf NOT_FOUND",
+            },
+            lines[0],
+        )
+        self.assertEqual("complete", lines[1]["event"])
+        self.assertEqual(3, lines[1]["done"])
+        self.assertEqual(1, lines[1]["failed"])
+        self.assertEqual(1, reporter.failed)
+
+    def test_empty_phase(self) -> None:
+        """
+        A phase with no files completes at 100%
+        """
+        reporter = ProgressReporter("clean_up", total=0)
+        lines = self.report(reporter, ProgressReporter.finish)
+        self.assertEqual(100.0, lines[0]["percent"])
+        self.assertEqual(0, lines[0]["done"])
@@ -159,3 +159,240 @@ class TestRegistryStack(unittest.TestCase):
                 }
             },
         )
+
+    def test_ingester_shard_size_set(self) -> None:
+        """
+        Test enabling sharded ingest jobs, which the batch worker rather than the Ingester shards.
+        """
+        # Startup a CDK app and load the default HelioCloud config
+        app = cdk.App()
+        env = cdk.Environment(region="us-east1", account="unit-test")
+        cfg = load_configs()
+
+        # Provide required overrides
+        cfg["registry"]["ingestBucketName"] = "ingest"
+        cfg["registry"]["datasetBucketNames"] = ["bucket1"]
+        cfg["registry"]["ingester"] = {"shardSize": 5000}
+
+        # Generate the template and dump a copy of it for inspection if needed
+        aws_stack = BaseAwsStack(app, "Base-Portal-Test", description="", config=cfg, env=env)
+        registry_stack = RegistryStack(
+            app, "Registry-Test", description="", config=cfg, env=env, base_aws_stack=aws_stack
+        )
+        template = Template.from_stack(registry_stack)
+        create_dumpfile(
+            test_class=self.__class__.__name__,
+            test_name=inspect.currentframe().f_code.co_name,
+            data=json.dumps(template.to_json(), indent=2),
+        )
+
+        # Check the shard size is passed to the Ingester, which doesn't invoke itself
+        template.has_resource(
+            type="AWS::Lambda::Function",
+            props={
+                "Properties": {
+                    "Handler": "app.ingest_lambda.handler",
+                    "Environment": {"Variables": Match.object_like({"INGEST_SHARD_SIZE": "5000"})},
+                }
+            },
+        )
+        for policy in template.find_resources("AWS::IAM::Policy").values():
+            for statement in policy["Properties"]["PolicyDocument"]["Statement"]:
+                self.assertNotEqual(statement["Action"], "lambda:InvokeFunction")
+
+    def test_ingester_chunk_size_set(self) -> None:
+        """
+        Test enabling chunked ingest jobs, streaming manifests a chunk at a time.
+        """
+        # Startup a CDK app and load the default HelioCloud config
+        app = cdk.App()
+        env = cdk.Environment(region="us-east1", account="unit-test")
+        cfg = load_configs()
+
+        # Provide required overrides
+        cfg["registry"]["ingestBucketName"] = "ingest"
+        cfg["registry"]["datasetBucketNames"] = ["bucket1"]
+        cfg["registry"]["ingester"] = {"chunkSize": 100000}
+
+        # Generate the template and dump a copy of it for inspection if needed
+        aws_stack = BaseAwsStack(app, "Base-Portal-Test", description="", config=cfg, env=env)
+        registry_stack = RegistryStack(
+            app, "Registry-Test", description="", config=cfg, env=env, base_aws_stack=aws_stack
+        )
+        template = Template.from_stack(registry_stack)
+        create_dumpfile(
+            test_class=self.__class__.__name__,
+            test_name=inspect.currentframe().f_code.co_name,
+            data=json.dumps(template.to_json(), indent=2),
+        )
+
+        # Check the chunk size is passed to the Ingester
+        template.has_resource(
+            type="AWS::Lambda::Function",
+            props={
+                "Properties": {
+                    "Handler": "app.ingest_lambda.handler",
+                    "Environment": {
+                        "Variables": Match.object_like({"INGEST_CHUNK_SIZE": "100000"})
+                    },
+                }
+            },
+        )
+
+    def test_ingester_dataset_parallelism_set(self) -> None:
+        """
+        Test setting how many datasets the Ingester ingests at once.
+        """
+        # Startup a CDK app and load the default HelioCloud config
+        app = cdk.App()
+        env = cdk.Environment(region="us-east1", account="unit-test")
+        cfg = load_configs()
+
+        # Provide required overrides
+        cfg["registry"]["ingestBucketName"] = "ingest"
+        cfg["registry"]["datasetBucketNames"] = ["bucket1"]
+        cfg["registry"]["ingester"] = {"datasetParallelism": 8}
+
+        # Generate the template and dump a copy of it for inspection if needed
+        aws_stack = BaseAwsStack(app, "Base-Portal-Test", description="", config=cfg, env=env)
+        registry_stack = RegistryStack(
+            app, "Registry-Test", description="", config=cfg, env=env, base_aws_stack=aws_stack
+        )
+        template = Template.from_stack(registry_stack)
+        create_dumpfile(
+            test_class=self.__class__.__name__,
+            test_name=inspect.currentframe().f_code.co_name,
+            data=json.dumps(template.to_json(), indent=2),
+        )
+
+        # Check the dataset parallelism is passed to the Ingester
+        template.has_resource(
+            type="AWS::Lambda::Function",
+            props={
+                "Properties": {
+                    "Handler": "app.ingest_lambda.handler",
+                    "Environment": {
+                        "Variables": Match.object_like({"INGEST_DATASET_PARALLELISM": "8"})
+                    },
+                }
+            },
+        )
+
+    def test_ingester_batch_job_queue_set(self) -> None:
+        """
+        Test configuring an AWS Batch job queue for ingest jobs too large for the Ingester.
+        """
+        # Startup a CDK app and load the default HelioCloud config
+        app = cdk.App()
+        env = cdk.Environment(region="us-east1", account="unit-test")
+        cfg = load_configs()
+
+        # Provide required overrides
+        cfg["registry"]["ingestBucketName"] = "ingest"
+        cfg["registry"]["datasetBucketNames"] = ["bucket1"]
+        cfg["registry"]["ingester"] = {
+            "batchJobQueue": "ingest-queue",
+            "batchJobDefinition": "ingester",
+            "lambdaMaxRows": 1000,
+        }
+
+        # Generate the template and dump a copy of it for inspection if needed
+        aws_stack = BaseAwsStack(app, "Base-Portal-Test", description="", config=cfg, env=env)
+        registry_stack = RegistryStack(
+            app, "Registry-Test", description="", config=cfg, env=env, base_aws_stack=aws_stack
+        )
+        template = Template.from_stack(registry_stack)
+        create_dumpfile(
+            test_class=self.__class__.__name__,
+            test_name=inspect.currentframe().f_code.co_name,
+            data=json.dumps(template.to_json(), indent=2),
+        )
+
+        # Check the job queue is passed to the Ingester, and it may submit jobs to it
+        template.has_resource(
+            type="AWS::Lambda::Function",
+            props={
+                "Properties": {
+                    "Handler": "app.ingest_lambda.handler",
+                    "Environment": {
+                        "Variables": Match.object_like(
+                            {
+                                "INGEST_BATCH_JOB_QUEUE": "ingest-queue",
+                                "INGEST_BATCH_JOB_DEFINITION": "ingester",
+                                "INGEST_LAMBDA_MAX_ROWS": "1000",
+                            }
+                        )
+                    },
+                }
+            },
+        )
+        template.has_resource(
+            type="AWS::IAM::Policy",
+            props={
+                "Properties": {
+                    "PolicyDocument": {
+                        "Statement": Match.array_with(
+                            [Match.object_like({"Action": "batch:SubmitJob"})]
+                        )
+                    }
+                }
+            },
+        )
+
+    def test_ingester_batch_copy_threshold_set(self) -> None:
+        """
+        Test enabling S3 Batch Operations copy jobs for datasets of many files.
+        """
+        # Startup a CDK app and load the default HelioCloud config
+        app = cdk.App()
+        env = cdk.Environment(region="us-east1", account="unit-test")
+        cfg = load_configs()
+
+        # Provide required overrides
+        cfg["registry"]["ingestBucketName"] = "ingest"
+        cfg["registry"]["datasetBucketNames"] = ["bucket1"]
+        cfg["registry"]["ingester"] = {"batchCopyThreshold": 1000000}
+
+        # Generate the template and dump a copy of it for inspection if needed
+        aws_stack = BaseAwsStack(app, "Base-Portal-Test", description="", config=cfg, env=env)
+        registry_stack = RegistryStack(
+            app, "Registry-Test", description="", config=cfg, env=env, base_aws_stack=aws_stack
+        )
+        template = Template.from_stack(registry_stack)
+        create_dumpfile(
+            test_class=self.__class__.__name__,
+            test_name=inspect.currentframe().f_code.co_name,
+            data=json.dumps(template.to_json(), indent=2),
+        )
+
+        # Check the threshold & the role copy jobs run as are passed to the Ingester
+        template.has_resource(
+            type="AWS::Lambda::Function",
+            props={
+                "Properties": {
+                    "Handler": "app.ingest_lambda.handler",
+                    "Environment": {
+                        "Variables": Match.object_like(
+                            {
+                                "INGEST_BATCH_COPY_THRESHOLD": "1000000",
+                                "INGEST_BATCH_COPY_ROLE_ARN": Match.any_value(),
+                            }
+                        )
+                    },
+                }
+            },
+        )
+        template.has_resource(
+            type="AWS::IAM::Role",
+            props={
+                "Properties": {
+                    "AssumeRolePolicyDocument": {
+                        "Statement": [
+                            Match.object_like(
+                                {"Principal": {"Service": "batchoperations.s3.amazonaws.com"}}
+                            )
+                        ]
+                    }
+                }
+            },
+        )
@@ -0,0 +1,105 @@
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+import pymongo.errors
+
+from registry.lambdas.app.aws_utils import lambdas
+from registry.lambdas.app.aws_utils.resource_cache import ResourceCache
+
+
+class TestResourceCache(unittest.TestCase):
+    """
+    Unit tests for the cache of resources kept across warm lambda invocations
+    """
+
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.cache = ResourceCache(ttl=60, clock=lambda: self.now)
+        lambdas.RESOURCE_CACHE.clear()
+
+    def tearDown(self) -> None:
+        lambdas.RESOURCE_CACHE.clear()
+
+    def test_get(self) -> None:
+        """
+        Resources are reused until they expire or are found invalid, then closed & created again
+        """
+        create, close = MagicMock(side_effect=[1, 2, 3]), MagicMock()
+        self.assertEqual(self.cache.get("key", create, close=close), 1)
+        self.now = 59
+        self.assertEqual(self.cache.get("key", create, close=close), 1)
+
+        self.now = 60
+        self.assertEqual(self.cache.get("key", create, close=close), 2)
+        close.assert_called_once_with(1)
+
+        self.assertEqual(self.cache.get("key", create, validate=lambda _: False, close=close), 3)
+        close.assert_called_with(2)
+        self.assertEqual(create.call_count, 3)
+
+    def test_get_close(self) -> None:
+        """
+        Resources with a close() method, such as boto3 clients, are closed when they are discarded
+        """
+        clients = [MagicMock(), MagicMock(), MagicMock()]
+        create = MagicMock(side_effect=clients)
+        self.cache.get("client", create)
+        self.now = 60
+        self.assertIs(self.cache.get("client", create), clients[1])
+        clients[0].close.assert_called_once()
+
+        self.assertIs(self.cache.get("client", create, validate=lambda _: False), clients[2])
+        clients[1].close.assert_called_once()
+        self.cache.invalidate("client")
+        clients[2].close.assert_called_once()
+
+        # Resources without one, such as boto3 sessions, are just dropped
+        session = MagicMock(spec=[])
+        self.cache.get("session", lambda: session)
+        self.cache.invalidate("session")
+        self.assertIsNot(self.cache.get("session", MagicMock(spec=[])), session)
+
+    @patch("boto3.session.Session")
+    def test_get_client(self, session) -> None:
+        """
+        Clients are reused by callers asking for the same service, settings & slot
+        """
+        session.return_value.client.side_effect = lambda *args, **kwargs: MagicMock()
+        s3_client = lambdas.get_client("s3", max_pool_connections=10)
+        self.assertIs(lambdas.get_client("s3", max_pool_connections=10), s3_client)
+        self.assertIsNot(lambdas.get_client("s3", max_pool_connections=10, slot=1), s3_client)
+        self.assertIsNot(lambdas.get_client("s3"), s3_client)
+
+        lambda_client = lambdas.get_client("lambda", read_timeout=900, retries={"max_attempts": 0})
+        self.assertIs(
+            lambdas.get_client("lambda", retries={"max_attempts": 0}, read_timeout=900),
+            lambda_client,
+        )
+        _, kwargs = session.return_value.client.call_args
+        self.assertEqual(kwargs["config"].read_timeout, 900)
+        self.assertEqual(session.return_value.client.call_count, 4)
+
+    @patch.dict(os.environ, {"CATALOG_DB_SECRET": "catalog"})
+    @patch("registry.lambdas.app.aws_utils.lambdas.get_documentdb_client")
+    @patch("registry.lambdas.app.aws_utils.lambdas.get_documentdb_secret")
+    @patch("boto3.session.Session")
+    def test_get_dataset_repository(self, session, get_secret, get_client) -> None:
+        """
+        The session, secret & DocumentDB connection are reused by warm invocations, reconnecting
+        with a freshly fetched secret when the connection fails
+        """
+        db_clients = []
+        get_client.side_effect = lambda **kwargs: db_clients.append(MagicMock()) or db_clients[-1]
+        lambdas.get_dataset_repository()
+        lambdas.get_dataset_repository()
+        session.assert_called_once()
+        get_secret.assert_called_once()
+        self.assertEqual(len(db_clients), 1)
+
+        # The connection is lost
+        db_clients[0].admin.command.side_effect = pymongo.errors.AutoReconnect("connection lost")
+        lambdas.get_dataset_repository()
+        db_clients[0].close.assert_called_once()
+        self.assertEqual(get_secret.call_count, 2)
+        self.assertEqual(len(db_clients), 2)
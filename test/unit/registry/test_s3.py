@@ -101,3 +101,40 @@ class TestS3(unittest.TestCase):
 
             for i, dataset in enumerate(dataset_list):
                 self.assertEqual(data[i]["id"], dataset.dataset_id)
+
+    @patch("boto3.session.Session")
+    @patch("botocore.client.BaseClient")
+    def test_get_manifest_from_s3(self, client, session) -> None:
+        """
+        Confirm the manifest is parsed from the body of the S3 object
+        """
+        with open("test/unit/resources/test_registry/ingest/manifest/valid.csv", "rb") as manifest:
+            client.get_object = MagicMock(return_value={"Body": manifest})
+            session.client = MagicMock(return_value=client)
+
+            manifest_df = s3_util.get_manifest_from_s3(session, "bucket_name", "manifest.csv")
+            self.assertEqual(len(manifest_df), 4)
+            self.assertEqual(manifest_df["filesize"][3], 297206)
+
+        with self.assertRaises(RegistryException):
+            s3_util.get_manifest_from_s3(session, "bucket_name", "manifest.txt")
+
+    @patch("boto3.session.Session")
+    def test_find_manifest_key(self, session) -> None:
+        """
+        Confirm the manifest is found in whichever format it was uploaded
+        """
+        session.client().list_objects_v2 = MagicMock(
+            return_value={
+                "Contents": [{"Key": "job/MMS/manifest.parquet"}, {"Key": "job/MMS/manifest.txt"}]
+            }
+        )
+        self.assertEqual(
+            s3_util.find_manifest_key(session, "bucket_name", "job/MMS/"),
+            "job/MMS/manifest.parquet",
+        )
+
+        session.client().list_objects_v2 = MagicMock(return_value={})
+        self.assertEqual(
+            s3_util.find_manifest_key(session, "bucket_name", "job/MMS/"), "job/MMS/manifest.csv"
+        )
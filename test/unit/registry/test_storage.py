@@ -0,0 +1,168 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from registry.lambdas.app.core.exceptions import IngesterException
+from registry.lambdas.app.ingest.ingester import Ingester
+from registry.lambdas.app.ingest.manifest import get_manifest_from_fs
+from registry.lambdas.app.ingest.storage import FileSystemStorage
+from registry.lambdas.app.local_utils.entry import get_entries_from_fs
+
+
+class TestFileSystemStorage(unittest.TestCase):
+    """
+    Unit tests for the FileSystemStorage
+    """
+
+    resource_path = "test/unit/resources/test_registry/ingest/"
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.storage = FileSystemStorage(root=self.root, max_workers=2)
+        os.makedirs(os.path.join(self.root, "ingest"))
+        os.makedirs(os.path.join(self.root, "registry"))
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def write(self, bucket: str, key: str, data: bytes) -> str:
+        self.storage.put_object(bucket, key, data)
+        return os.path.join(self.root, bucket, key)
+
+    def test_check_bucket(self) -> None:
+        """
+        Buckets are directories under the root
+        """
+        self.storage.check_bucket("ingest")
+        with self.assertRaises(IngesterException):
+            self.storage.check_bucket("missing")
+
+    def test_objects(self) -> None:
+        """
+        Objects can be written, read, sized and deleted, with missing objects not an error
+        """
+        self.write("ingest", "job/MMS/a.cdf", b"abc")
+        self.assertEqual(self.storage.get_size("ingest", "job/MMS/a.cdf"), 3)
+        self.assertEqual(self.storage.get_object("ingest", "job/MMS/a.cdf").read(), b"abc")
+        self.assertIsNone(self.storage.get_size("ingest", "job/MMS/b.cdf"))
+        self.assertIsNone(self.storage.get_object("ingest", "job/MMS/b.cdf"))
+
+        failures = self.storage.delete_objects("ingest", ["job/MMS/a.cdf", "job/MMS/b.cdf"])
+        self.assertEqual(failures, [])
+
+        # Directories left empty are removed, but not the bucket
+        self.assertFalse(os.path.exists(os.path.join(self.root, "ingest", "job")))
+        self.assertTrue(os.path.isdir(os.path.join(self.root, "ingest")))
+
+    def test_list_objects(self) -> None:
+        """
+        Listings are by prefix, optionally stopping at the last / of the prefix
+        """
+        self.write("ingest", "job/MMS/b.cdf", b"abc")
+        self.write("ingest", "job/MMS/a.cdf", b"a")
+        self.write("ingest", "job/MMS/2015/c.cdf", b"")
+        self.write("ingest", "job/MMSX/d.cdf", b"")
+
+        listing = self.storage.list_objects("ingest", "job/MMS/")
+        self.assertEqual(
+            list(listing["filename"]), ["job/MMS/2015/c.cdf", "job/MMS/a.cdf", "job/MMS/b.cdf"]
+        )
+        self.assertEqual(list(listing["content_length"]), [0, 1, 3])
+
+        listing = self.storage.list_objects("ingest", "job/MMS/", recursive=False)
+        self.assertEqual(list(listing["filename"]), ["job/MMS/a.cdf", "job/MMS/b.cdf"])
+
+        self.assertTrue(self.storage.list_objects("ingest", "other/").empty)
+
+    def test_copy_hardlink(self) -> None:
+        """
+        Files are installed as hardlinks by default, without copying any data
+        """
+        source = self.write("ingest", "job/MMS/a.cdf", b"abc")
+        self.write("registry", "MMS/a.cdf", b"old")
+        copied = MagicMock()
+
+        self.storage.copy("ingest", "registry", [("job/MMS/a.cdf", "MMS/a.cdf", 3)], copied)
+
+        destination = os.path.join(self.root, "registry", "MMS", "a.cdf")
+        self.assertTrue(os.path.samefile(source, destination))
+        copied.assert_called_once_with("job/MMS/a.cdf")
+
+    def test_copy_without_hardlinks(self) -> None:
+        """
+        Without hardlinks, files are cloned or copied, keeping their modification time so they
+        list with the same etag
+        """
+        storage = FileSystemStorage(root=self.root, hardlink=False)
+        source = self.write("ingest", "job/MMS/a.cdf", b"abc" * 1000)
+        os.utime(source, ns=(1_000_000_000, 1_000_000_000))
+
+        storage.copy("ingest", "registry", [("job/MMS/a.cdf", "MMS/a.cdf", 3000)])
+
+        destination = os.path.join(self.root, "registry", "MMS", "a.cdf")
+        self.assertFalse(os.path.samefile(source, destination))
+        with open(destination, "rb") as file:
+            self.assertEqual(file.read(), b"abc" * 1000)
+        self.assertEqual(
+            list(storage.list_objects("ingest", "job/")["etag"]),
+            list(storage.list_objects("registry", "MMS/")["etag"]),
+        )
+
+    def test_copy_plain(self) -> None:
+        """
+        Files are copied normally when the filesystem supports nothing better
+        """
+        storage = FileSystemStorage(root=self.root, hardlink=False)
+        self.write("ingest", "job/MMS/a.cdf", b"abc")
+        unsupported = OSError(18, "Invalid cross-device link")
+
+        with patch("fcntl.ioctl", side_effect=unsupported), patch(
+            "os.copy_file_range", side_effect=unsupported
+        ):
+            storage.copy("ingest", "registry", [("job/MMS/a.cdf", "MMS/a.cdf", 3)])
+
+        self.assertEqual(storage.get_object("registry", "MMS/a.cdf").read(), b"abc")
+
+    def test_copy_missing(self) -> None:
+        """
+        Every copy that failed is reported
+        """
+        with self.assertRaises(IngesterException) as raised:
+            self.storage.copy("ingest", "registry", [("job/MMS/a.cdf", "MMS/a.cdf", 3)])
+        self.assertIn("1 of 1 copies failed", raised.exception.message)
+
+    @patch("registry.lambdas.app.catalog.dataset_repository.DataSetRepository")
+    def test_ingest(self, ds_repo) -> None:
+        """
+        An Ingester can ingest a dataset from and to a filesystem
+        """
+        manifest_df = get_manifest_from_fs(self.resource_path + "manifest/valid.csv")
+        entry_ds = get_entries_from_fs(self.resource_path + "entry/valid.json")[0]
+        os.makedirs(os.path.join(self.root, "test"))
+        for row in manifest_df.itertuples():
+            path = os.path.join(self.root, "ingest", "job", "MMS", row.s3key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.truncate(row.filesize)
+
+        ingester = Ingester(
+            ingest_bucket="ingest",
+            ingest_folder="job/",
+            manifest_df=manifest_df,
+            entry_dataset=entry_ds,
+            ds_repo=ds_repo,
+            session=MagicMock(),
+            resumable=True,
+            storage=self.storage,
+        )
+        result = ingester.execute()
+
+        self.assertEqual(result.files_contributed, 4)
+        dataset_folder = "base_data/resources/ingest/dataset_bucket/"
+        listing = self.storage.list_objects("test", dataset_folder)
+        self.assertEqual(len(listing), 5)
+        self.assertIn(f"{dataset_folder}MMS_2015.csv", list(listing["filename"]))
+        self.assertTrue(self.storage.list_objects("ingest", "").empty)
+        ds_repo.save.assert_called_once()
@@ -2,6 +2,7 @@
 Simple script for invoking the HelioCloud registry's Cataloger service from the command line.
 """
 import argparse
+import json
 import sys
 from pathlib import Path
 
@@ -38,6 +39,13 @@ if __name__ == "__main__":
         "HelioCloud to AWS.",
     )
 
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate the catalog.json of every registry S3 bucket, rather than only those "
+        "whose datasets changed since it was last generated.",
+    )
+
     # Get the args out.  Note that heliocloud instance names need any hyphens stripped
     # because of how
     args = parser.parse_args()
@@ -61,11 +69,12 @@ if __name__ == "__main__":
         f"\tAWS Region: {region}\n"
         f"\tInstance: {instance}\n"
         f"\tLambda function name: {FUNCTION}\n"
+        f"\tForce: {args.force}\n"
     )
 
     # Get a lambda client and run the function
     client = boto3.Session(region_name=region).client("lambda")
-    inv_response = client.invoke(FunctionName=FUNCTION, Payload=bytes({}))
+    inv_response = client.invoke(FunctionName=FUNCTION, Payload=json.dumps({"force": args.force}))
     response = CatalogerResponse(invoke_response=inv_response)
 
     print("Received response:\n" f"\t{response}")
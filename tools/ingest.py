@@ -45,6 +45,24 @@ if __name__ == "__main__":
         help="Name of the folder in the ingest bucket (an AWS S3 bucket) provisioned for the "
         "HelioCloud instance being called.",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Add the files in the ingest job to the existing index files and catalog entries of "
+        "their datasets, instead of replacing them.",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="Don't copy files that are already in the registry with the same size and ETag, "
+        "such as when re-uploading a whole dataset to fix a few of its files.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["LAMBDA", "BATCH"],
+        help="Run the ingest job in the Ingester lambda, or submit it to the AWS Batch job queue "
+        "configured for the Ingester. Defaults to choosing from the size of the job's manifests.",
+    )
     args = parser.parse_args()
 
     region = args.region
@@ -69,17 +87,53 @@ if __name__ == "__main__":
         f"\tInstance: {instance}\n"
         f"\tLambda function name: {FUNCTION}\n"
         f"\tIngest job folder: {job_folder}\n"
+        f"\tIncremental: {args.incremental}\n"
+        f"\tSkip unchanged: {args.skip_unchanged}\n"
+        f"\tBackend: {args.backend or 'chosen from the size of the job'}\n"
     )
 
     # Get a lambda client and run the function
     client = boto3.Session(region_name=region).client("lambda")
     inv_response = client.invoke(
-        FunctionName=FUNCTION, Payload=json.dumps({"job_folder": job_folder})
+        FunctionName=FUNCTION,
+        Payload=json.dumps(
+            {
+                "job_folder": job_folder,
+                "incremental": args.incremental,
+                "skip_unchanged": args.skip_unchanged,
+                "backend": args.backend,
+            }
+        ),
     )
     response = IngestResponse(invoke_response=inv_response)
 
     if not response.success:
         print("Ingester lambda call failed with error:\n" f"\t{response.error}\n")
+    elif response.batch_job is not None:
+        print(
+            "Ingest job submitted to AWS Batch:\n"
+            f"\tJob id: {response.batch_job['job_id']}\n"
+            f"\tJob name: {response.batch_job['job_name']}\n"
+        )
     else:
         print("Ingester successful.")
+        for update in response.updates:
+            print(
+                f"\tDataset: {update['dataset']} - Files updated: {update['num_files_updated']} - "
+                f"Error: {update['error']}"
+            )
+            metrics = update.get("metrics")
+            if metrics is None:
+                continue
+            print(
+                f"\t\tBytes copied: {metrics['bytes_copied']} - Bytes skipped: "
+                f"{metrics['bytes_skipped']} - Files validated per second: "
+                f"{metrics['files_validated_per_second']:.1f}"
+            )
+            for phase in metrics["phases"]:
+                print(
+                    f"\t\tPhase: {phase['phase']} - {phase['seconds']:.2f}s - S3 requests: "
+                    f"{phase['s3_requests']} - Retries: {phase['retries']} - Peak RSS: "
+                    f"{phase['peak_rss'] / (1024 * 1024):.1f} MiB"
+                )
 # pylint: enable=duplicate-code